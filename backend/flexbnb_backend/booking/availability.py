@@ -0,0 +1,150 @@
+"""
+Per-property availability calendar.
+
+Every night a blocking reservation covers (check-in inclusive, check-out
+exclusive) is stored as a BookedNight row. Overlap checks are then a single
+range probe on the (property, date) index instead of a scan over the
+property's reservations.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import BookedNight, Reservation
+
+
+# Reservations in these states hold their nights on the calendar
+BLOCKING_STATUSES = ('pending', 'approved', 'completed')
+
+
+def stay_nights(check_in, check_out):
+    """Dates of every night between check-in (inclusive) and check-out (exclusive)"""
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def reservation_blocks(reservation):
+    return reservation.status in BLOCKING_STATUSES
+
+
+def sync_reservation_nights(reservation):
+    """Bring the calendar rows for one reservation in line with its current state"""
+    with transaction.atomic():
+        BookedNight.objects.filter(reservation=reservation).delete()
+        if reservation_blocks(reservation):
+            BookedNight.objects.bulk_create([
+                BookedNight(property_id=reservation.property_id, reservation=reservation, date=night)
+                for night in stay_nights(reservation.check_in_date, reservation.check_out_date)
+            ])
+
+
+def is_available(property_id, check_in, check_out, exclude_reservation=None):
+    """True if no blocking reservation holds any night in [check_in, check_out)"""
+    booked = BookedNight.objects.filter(
+        property_id=property_id,
+        date__gte=check_in,
+        date__lt=check_out,
+    )
+    if exclude_reservation is not None:
+        booked = booked.exclude(reservation=exclude_reservation)
+    return not booked.exists()
+
+
+def booked_property_ids(check_in, check_out):
+    """Subquery of properties with at least one night taken in [check_in, check_out)"""
+    return BookedNight.objects.filter(
+        date__gte=check_in,
+        date__lt=check_out,
+    ).values('property_id')
+
+
+def available_properties(queryset, check_in, check_out):
+    """Narrow a Property queryset to those free for the whole range, in one query"""
+    return queryset.exclude(id__in=booked_property_ids(check_in, check_out))
+
+
+def free_windows(property_id, start, count=5, min_nights=1, horizon_days=365):
+    """
+    Next ``count`` free windows of at least ``min_nights`` nights from ``start``.
+
+    Returns a list of (first free night, first booked night or None) pairs;
+    the final window is open-ended when nothing is booked after it within
+    the horizon.
+    """
+    end = start + timedelta(days=horizon_days)
+    booked = BookedNight.objects.filter(
+        property_id=property_id,
+        date__gte=start,
+        date__lt=end,
+    ).order_by('date').values_list('date', flat=True).distinct()
+
+    windows = []
+    cursor = start
+    for night in booked.iterator():
+        if night < cursor:
+            continue
+        if (night - cursor).days >= min_nights:
+            windows.append((cursor, night))
+            if len(windows) >= count:
+                return windows
+        cursor = night + timedelta(days=1)
+
+    if len(windows) < count:
+        windows.append((cursor, None))
+    return windows
+
+
+def rebuild_calendar(property_ids=None):
+    """
+    Recompute BookedNight rows from scratch. Returns the number of rows written.
+    """
+    reservations = Reservation.objects.filter(status__in=BLOCKING_STATUSES)
+    existing = BookedNight.objects.all()
+    if property_ids is not None:
+        reservations = reservations.filter(property_id__in=property_ids)
+        existing = existing.filter(property_id__in=property_ids)
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for reservation_id, property_id, check_in, check_out in reservations.values_list(
+            'id', 'property_id', 'check_in_date', 'check_out_date'
+        ).iterator(chunk_size=2000):
+            for night in stay_nights(check_in, check_out):
+                batch.append(BookedNight(property_id=property_id, reservation_id=reservation_id, date=night))
+            if len(batch) >= 5000:
+                BookedNight.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            BookedNight.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def hourly_conflicts(day, start_time, end_time):
+    """Subquery of properties with a blocking hourly booking overlapping start..end on ``day``"""
+    return Reservation.objects.filter(
+        status__in=BLOCKING_STATUSES,
+        check_in_date__lte=day,
+        check_out_date__gte=day,
+        check_in_time__lt=end_time,
+        check_out_time__gt=start_time,
+    ).values('property_id')
+
+
+def available_for_hours(queryset, day, start_time, end_time):
+    """
+    Narrow a Property queryset to hourly listings open for start..end on
+    ``day``: inside the property's available hours, with no overnight stay
+    holding that night and no overlapping hourly booking. One query.
+    """
+    return queryset.filter(
+        is_hourly_booking=True,
+        available_hours_start__lte=start_time,
+        available_hours_end__gte=end_time,
+    ).exclude(
+        id__in=booked_property_ids(day, day + timedelta(days=1))
+    ).exclude(
+        id__in=hourly_conflicts(day, start_time, end_time)
+    )
@@ -0,0 +1,136 @@
+"""
+Materialized host dashboard statistics.
+
+HostDashboardStats rows are adjusted in place with F() deltas from model
+signals (booking.signals) as rows are created, changed or deleted, so
+reading the dashboard never aggregates. Queryset update() and bulk writes
+skip signals; their callers adjust the row themselves.
+compute_host_stats() is the from-scratch definition every delta must agree
+with; rebuild_host_stats uses it to rebuild and verify all rows.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.utils import timezone
+
+from property.models import Property
+
+from .models import HostDashboardStats, HostEarnings, HostMessage, PropertyAnalytics, Reservation
+
+
+TWO_PLACES = Decimal('0.01')
+
+
+def current_month_start():
+    return timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _money(value):
+    return Decimal(value or 0).quantize(TWO_PLACES)
+
+
+def _month_earnings(host_id, month_start):
+    return HostEarnings.objects.filter(
+        host_id=host_id,
+        created_at__gte=month_start,
+    ).aggregate(total=Sum('net_earnings'))['total']
+
+
+def _analytics_averages(host_id):
+    averages = PropertyAnalytics.objects.filter(property__Host_id=host_id).aggregate(
+        occupancy_rate=Avg('occupancy_rate'),
+        average_rating=Avg('average_rating'),
+    )
+    return {
+        'occupancy_rate': _money(averages['occupancy_rate']),
+        'average_rating': _money(averages['average_rating']),
+    }
+
+
+def compute_host_stats(host_id):
+    """All dashboard numbers for one host, computed from the source tables"""
+    month_start = current_month_start()
+    reservations = Reservation.objects.filter(host_id=host_id).aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+    return {
+        'total_properties': Property.objects.filter(Host_id=host_id).count(),
+        'total_reservations': reservations['total'],
+        'pending_requests': reservations['pending'],
+        'total_earnings': _money(
+            HostEarnings.objects.filter(host_id=host_id).aggregate(total=Sum('net_earnings'))['total']
+        ),
+        'this_month_earnings': _money(_month_earnings(host_id, month_start)),
+        'month_start': month_start,
+        'unread_messages': HostMessage.objects.filter(receiver_id=host_id, is_read=False).count(),
+        **_analytics_averages(host_id),
+    }
+
+
+def refresh_host_stats(host_id):
+    stats, _ = HostDashboardStats.objects.update_or_create(
+        host_id=host_id,
+        defaults=compute_host_stats(host_id),
+    )
+    return stats
+
+
+def bump_host_stats(host_id, **deltas):
+    """
+    Apply counter deltas to a host's row, e.g. bump_host_stats(h, pending_requests=-1).
+    A host without a row yet gets one built from scratch instead.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not host_id or not deltas:
+        return
+    updated = HostDashboardStats.objects.filter(host_id=host_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+    if not updated:
+        _create_missing(host_id)
+
+
+def add_earnings(host_id, net_earnings, created_at):
+    updated = HostDashboardStats.objects.filter(host_id=host_id).update(
+        total_earnings=F('total_earnings') + net_earnings
+    )
+    if not updated:
+        _create_missing(host_id)
+        return
+    # Rows still pointing at an earlier month are corrected on the next read
+    HostDashboardStats.objects.filter(
+        host_id=host_id,
+        month_start__lte=created_at,
+    ).update(this_month_earnings=F('this_month_earnings') + net_earnings)
+
+
+def refresh_analytics_averages(host_id):
+    updated = HostDashboardStats.objects.filter(host_id=host_id).update(**_analytics_averages(host_id))
+    if not updated:
+        _create_missing(host_id)
+
+
+def _create_missing(host_id):
+    # The row is computed from committed state plus this transaction, so a
+    # concurrent creator can win the insert; its values are just as current.
+    try:
+        with transaction.atomic():
+            HostDashboardStats.objects.create(host_id=host_id, **compute_host_stats(host_id))
+    except IntegrityError:
+        pass
+
+
+def get_host_stats(host):
+    """The dashboard row for ``host``: one primary-key read in the common case"""
+    stats = HostDashboardStats.objects.filter(host=host).first()
+    if stats is None:
+        return refresh_host_stats(host.pk)
+
+    month_start = current_month_start()
+    if stats.month_start != month_start:
+        stats.this_month_earnings = _money(_month_earnings(host.pk, month_start))
+        stats.month_start = month_start
+        stats.save(update_fields=['this_month_earnings', 'month_start', 'updated_at'])
+    return stats
@@ -0,0 +1,129 @@
+import random
+import time
+from datetime import date, time as clock, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from booking.availability import available_properties, available_for_hours, stay_nights
+from booking.models import BookedNight, Reservation
+from property.models import Property
+from useraccount.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark date-availability search on a seeded catalog (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=50000)
+        parser.add_argument('--reservations', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['properties'], options['reservations'], options['seed'])
+            self._run(options['repeat'])
+            transaction.set_rollback(True)
+
+    def _seed(self, property_count, reservation_count, seed):
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        user = User.objects.create(email='benchmark-guest@example.com', name='Benchmark Guest')
+
+        properties = []
+        for i in range(property_count):
+            is_hourly = rng.random() < 0.2
+            properties.append(Property(
+                title=f'Benchmark property {i}',
+                description='Seeded for benchmark_availability',
+                price_per_night=rng.randint(20, 900),
+                price_per_hour=rng.randint(10, 150) if is_hourly else None,
+                is_hourly_booking=is_hourly,
+                available_hours_start=clock(8) if is_hourly else None,
+                available_hours_end=clock(22) if is_hourly else None,
+                bedrooms=2, bathrooms=1, guests=4,
+                country='France', country_code='FR', category='Villas',
+                image='uploads/properties/benchmark.jpg',
+                Host=user,
+            ))
+        Property.objects.bulk_create(properties, batch_size=5000)
+        property_ids = [p.id for p in properties]
+        hourly_ids = [p.id for p in properties if p.is_hourly_booking]
+
+        # Reservations are inserted with bulk_create (no signals), so the
+        # calendar rows are written alongside them
+        start = date.today()
+        reservations, nights = [], []
+        for i in range(reservation_count):
+            hourly = hourly_ids and rng.random() < 0.1
+            property_id = rng.choice(hourly_ids if hourly else property_ids)
+            check_in = start + timedelta(days=rng.randint(0, 365))
+            if hourly:
+                check_out = check_in
+                start_hour = rng.randint(8, 19)
+                times = {'check_in_time': clock(start_hour), 'check_out_time': clock(start_hour + 2)}
+            else:
+                check_out = check_in + timedelta(days=rng.randint(1, 7))
+                times = {}
+            reservation = Reservation(
+                property_id=property_id, guest=user, host=user,
+                check_in_date=check_in, check_out_date=check_out,
+                guests_count=1, total_price=Decimal('100'), host_earnings=Decimal('90'),
+                status=rng.choice(('pending', 'approved', 'approved', 'declined')),
+                **times,
+            )
+            reservations.append(reservation)
+            if reservation.status != 'declined':
+                nights.extend(
+                    BookedNight(property_id=property_id, reservation=reservation, date=night)
+                    for night in stay_nights(check_in, check_out)
+                )
+            if len(reservations) >= 5000:
+                Reservation.objects.bulk_create(reservations)
+                BookedNight.objects.bulk_create(nights, batch_size=5000)
+                reservations, nights = [], []
+        Reservation.objects.bulk_create(reservations)
+        BookedNight.objects.bulk_create(nights, batch_size=5000)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE property_property')
+                cursor.execute('ANALYZE booking_reservation')
+                cursor.execute('ANALYZE booking_bookednight')
+
+        self.stdout.write(
+            f'Seeded {property_count} properties, {reservation_count} reservations '
+            f'in {time.perf_counter() - started:.1f}s'
+        )
+
+    def _run(self, repeat):
+        today = date.today()
+        cases = [
+            ('3 nights, next week', lambda qs: available_properties(qs, today + timedelta(days=7), today + timedelta(days=10))),
+            ('14 nights, in 3 months', lambda qs: available_properties(qs, today + timedelta(days=90), today + timedelta(days=104))),
+            ('hourly 10:00-12:00', lambda qs: available_for_hours(qs, today + timedelta(days=30), clock(10), clock(12))),
+        ]
+
+        self.stdout.write(f"{'query':<26}{'free':>8}{'count ms':>10}{'page ms':>10}{'queries':>9}")
+        for label, narrow in cases:
+            count_times, page_times = [], []
+            for _ in range(repeat):
+                queryset = narrow(Property.objects.all())
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    free = queryset.count()
+                    count_times.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    list(queryset.order_by('-created_at', '-id').values('id', 'title')[:20])
+                    page_times.append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f'{label:<26}{free:>8}'
+                f'{min(count_times) * 1000:>10.1f}'
+                f'{min(page_times) * 1000:>10.1f}'
+                f'{len(queries.captured_queries):>9}'
+            )
@@ -0,0 +1,103 @@
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from booking import views
+from booking.models import PropertyReview, Reservation
+from property.models import Property, PropertyImage
+from roompooling.models import RoomPool, RoomPoolMember
+from useraccount.models import User
+
+
+# (name, view, path, user role the request is made as)
+CHECKED_VIEWS = [
+    ('host_reservations', views.host_reservations, '/api/booking/reservations/', 'host'),
+    ('guest_reservations', views.guest_reservations, '/api/booking/guest-reservations/', 'guest'),
+    ('pool_member_reservations', views.pool_member_reservations, '/api/booking/pool-member-reservations/', 'guest'),
+    ('host_pool_reservations', views.host_pool_reservations, '/api/booking/host-pool-reservations/', 'host'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed reservations at several list sizes and assert the ReservationSerializer '
+        'endpoints issue the same number of queries at every size. Seed data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 25])
+
+    def handle(self, *args, **options):
+        sizes = options['sizes']
+        counts = {name: [] for name, _, _, _ in CHECKED_VIEWS}
+
+        for size in sizes:
+            with transaction.atomic():
+                users = self.seed(size)
+                factory = APIRequestFactory()
+                for name, view, path, role in CHECKED_VIEWS:
+                    request = factory.get(path)
+                    force_authenticate(request, user=users[role])
+                    with CaptureQueriesContext(connection) as queries:
+                        response = view(request)
+                    if response.status_code != 200 or len(response.data) != size:
+                        raise CommandError(
+                            f'{name} returned {response.status_code} with '
+                            f'{len(response.data)} rows, expected {size}'
+                        )
+                    counts[name].append(len(queries))
+                transaction.set_rollback(True)
+
+        self.stdout.write('rows'.ljust(28) + ''.join(str(size).rjust(8) for size in sizes))
+        failed = []
+        for name, row in counts.items():
+            self.stdout.write(name.ljust(28) + ''.join(str(count).rjust(8) for count in row))
+            if len(set(row)) > 1:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(f'Query count grows with rows in: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS('Query counts are constant'))
+
+    def seed(self, size):
+        tag = uuid.uuid4().hex[:8]
+        host = User.objects.create(email=f'qc-host-{tag}@example.com', name='Host')
+        guest = User.objects.create(email=f'qc-guest-{tag}@example.com', name='Guest')
+        mate = User.objects.create(email=f'qc-mate-{tag}@example.com', name='Mate')
+        start = date.today() + timedelta(days=30)
+
+        for i in range(size):
+            prop = Property.objects.create(
+                title=f'Query count {tag} {i}', description='check_query_counts', price_per_night=100,
+                bedrooms=1, bathrooms=1, guests=4, country='France', country_code='FR',
+                category='Villas', image='uploads/properties/qc.jpg', Host=host,
+            )
+            PropertyImage.objects.create(property=prop, image='uploads/properties/qc-primary.jpg', is_primary=True)
+            pool = RoomPool.objects.create(
+                title=f'Pool {i}', property=prop, creator=guest,
+                check_in_date=start, check_out_date=start + timedelta(days=2),
+                max_members=4, current_members=2, total_price=200, price_per_person=100,
+                booking_deadline=timezone.now() + timedelta(days=10),
+            )
+            for user, is_creator in ((guest, True), (mate, False)):
+                RoomPoolMember.objects.create(
+                    pool=pool, user=user, status='approved', is_creator=is_creator, share_amount=100,
+                )
+            reservation = Reservation.objects.create(
+                property=prop, guest=guest, host=host,
+                check_in_date=start, check_out_date=start + timedelta(days=2),
+                guests_count=2, total_price=200, host_earnings=180, status='completed',
+                booking_type='room_pool', is_room_pool=True, room_pool_id=pool.id, pool_members_count=2,
+            )
+            if i % 2:
+                PropertyReview.objects.create(
+                    property=prop, reservation=reservation, guest=guest, rating=5, comment='Great',
+                    cleanliness_rating=5, communication_rating=5, location_rating=5, value_rating=5,
+                )
+
+        return {'host': host, 'guest': guest}
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from booking.availability import rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the BookedNight availability calendar from reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--property', action='append', dest='property_ids',
+                            help='Only rebuild this property (repeatable)')
+
+    def handle(self, *args, **options):
+        written = rebuild_calendar(options['property_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} booked nights'))
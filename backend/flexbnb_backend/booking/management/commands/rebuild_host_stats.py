@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from booking.dashboard import compute_host_stats, refresh_host_stats
+from booking.models import HostDashboardStats
+from property.models import Property
+
+
+COMPARED_FIELDS = (
+    'total_properties', 'total_reservations', 'pending_requests', 'total_earnings',
+    'this_month_earnings', 'occupancy_rate', 'average_rating', 'unread_messages',
+)
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized host dashboard stats, optionally reporting drift first'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', action='append', dest='host_ids',
+                            help='Only rebuild this host (repeatable)')
+        parser.add_argument('--verify', action='store_true',
+                            help='Compare stored rows with a fresh computation and only fix mismatches')
+
+    def handle(self, *args, **options):
+        stored = HostDashboardStats.objects.all()
+        if options['host_ids']:
+            stored = stored.filter(host_id__in=options['host_ids'])
+
+        if not options['verify']:
+            # Every host with a stats row or a property, so missing rows get built too
+            host_ids = options['host_ids'] or list(
+                set(stored.values_list('host_id', flat=True))
+                | set(Property.objects.values_list('Host_id', flat=True).distinct())
+            )
+            for host_id in host_ids:
+                refresh_host_stats(host_id)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {len(host_ids)} hosts'))
+            return
+
+        mismatched = 0
+        for stats in stored.iterator():
+            fresh = compute_host_stats(stats.host_id)
+            drift = {
+                field: (getattr(stats, field), fresh[field])
+                for field in COMPARED_FIELDS
+                if getattr(stats, field) != fresh[field]
+            }
+            if stats.month_start != fresh['month_start']:
+                # A stale month is corrected on read, not drift
+                drift.pop('this_month_earnings', None)
+            if drift:
+                mismatched += 1
+                details = ', '.join(f'{field} {old} -> {new}' for field, (old, new) in drift.items())
+                self.stdout.write(self.style.WARNING(f'{stats.host_id}: {details}'))
+                refresh_host_stats(stats.host_id)
+
+        style = self.style.WARNING if mismatched else self.style.SUCCESS
+        self.stdout.write(style(f'{mismatched} of {stored.count()} hosts needed fixing'))
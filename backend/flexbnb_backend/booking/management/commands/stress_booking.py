@@ -0,0 +1,88 @@
+import threading
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from booking.models import Reservation
+from booking.views import create_reservation
+from property.models import Property
+from useraccount.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire parallel create_reservation calls for the same property and dates '
+        'and check that exactly one succeeds. The test property is deleted afterwards; '
+        'the stress-* users are reused between runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200)
+        parser.add_argument('--same-key', action='store_true',
+                            help='Send every attempt as the same guest with one Idempotency-Key')
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        same_key = options['same_key']
+        tag = uuid.uuid4().hex[:8]
+
+        host, _ = User.objects.get_or_create(email='stress-host@example.com', defaults={'name': 'Stress Host'})
+        guests = [
+            User.objects.get_or_create(email=f'stress-guest-{i}@example.com', defaults={'name': f'Stress Guest {i}'})[0]
+            for i in range(1 if same_key else attempts)
+        ]
+        prop = Property.objects.create(
+            title=f'Stress property {tag}', description='stress_booking', price_per_night=100,
+            bedrooms=1, bathrooms=1, guests=2, country='France', country_code='FR',
+            category='Villas', image='uploads/properties/stress.jpg', Host=host,
+        )
+
+        check_in = date.today() + timedelta(days=30)
+        payload = {
+            'propertyId': str(prop.id),
+            'startDate': check_in.isoformat(),
+            'endDate': (check_in + timedelta(days=3)).isoformat(),
+        }
+        factory = APIRequestFactory()
+        barrier = threading.Barrier(attempts)
+        results = Counter()
+        lock = threading.Lock()
+
+        def attempt(i):
+            headers = {'HTTP_IDEMPOTENCY_KEY': f'stress-{tag}'} if same_key else {}
+            request = factory.post('/api/booking/reservations/create/', payload, format='json', **headers)
+            force_authenticate(request, user=guests[0 if same_key else i])
+            try:
+                barrier.wait()
+                response = create_reservation(request)
+                outcome = response.status_code
+                if response.get('Idempotent-Replayed'):
+                    outcome = f'{outcome} (replayed)'
+            except Exception as e:
+                outcome = type(e).__name__
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(attempts)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            created = Reservation.objects.filter(property=prop).count()
+            for outcome, count in sorted(results.items(), key=str):
+                self.stdout.write(f'{outcome}: {count}')
+            self.stdout.write(f'reservations in database: {created}')
+        finally:
+            prop.delete()
+
+        if created != 1 or results[201] != 1:
+            raise CommandError(f'Expected exactly one booking, got {created} (201 responses: {results[201]})')
+        self.stdout.write(self.style.SUCCESS('Exactly one booking succeeded'))
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:13
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+def backfill_booked_nights(apps, schema_editor):
+    Reservation = apps.get_model('booking', 'Reservation')
+    BookedNight = apps.get_model('booking', 'BookedNight')
+
+    batch = []
+    reservations = Reservation.objects.filter(
+        status__in=['pending', 'approved', 'completed']
+    ).values_list('id', 'property_id', 'check_in_date', 'check_out_date')
+    for reservation_id, property_id, check_in, check_out in reservations.iterator():
+        for i in range((check_out - check_in).days):
+            batch.append(BookedNight(
+                property_id=property_id,
+                reservation_id=reservation_id,
+                date=check_in + timedelta(days=i),
+            ))
+        if len(batch) >= 5000:
+            BookedNight.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BookedNight.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_reservation_booking_type_reservation_is_room_pool_and_more'),
+        ('property', '0006_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookedNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='property.property')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='booking.reservation')),
+            ],
+            options={
+                'ordering': ['property', 'date'],
+                'indexes': [models.Index(fields=['property', 'date'], name='bookednight_property_date_idx'), models.Index(fields=['date', 'property'], name='bookednight_date_property_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_booked_nights, migrations.RunPython.noop),
+    ]
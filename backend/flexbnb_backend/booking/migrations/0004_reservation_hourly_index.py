@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_bookednight'),
+        ('property', '0006_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['check_in_date', 'check_in_time', 'property'], name='reservation_hourly_idx'),
+        ),
+    ]
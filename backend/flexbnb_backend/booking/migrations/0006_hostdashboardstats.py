@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_idempotencykey'),
+        ('useraccount', '0002_user_clerk_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostDashboardStats',
+            fields=[
+                ('host', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_properties', models.IntegerField(default=0)),
+                ('total_reservations', models.IntegerField(default=0)),
+                ('pending_requests', models.IntegerField(default=0)),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('this_month_earnings', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('month_start', models.DateTimeField()),
+                ('occupancy_rate', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('average_rating', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('unread_messages', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
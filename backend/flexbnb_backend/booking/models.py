@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.conf import settings
 from django.utils import timezone
 from useraccount.models import User
@@ -52,6 +53,54 @@ class Reservation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Hourly availability checks (booking.availability.hourly_conflicts)
+            models.Index(fields=['check_in_date', 'check_in_time', 'property'], name='reservation_hourly_idx'),
+        ]
+
+
+class BookedNight(models.Model):
+    """
+    Nightly occupancy index: one row per property per night held by a
+    reservation that still blocks the calendar (see booking.availability).
+    Maintained from Reservation saves, never edited directly.
+    """
+    property = models.ForeignKey(Property, related_name='booked_nights', on_delete=models.CASCADE)
+    reservation = models.ForeignKey(Reservation, related_name='booked_nights', on_delete=models.CASCADE)
+    date = models.DateField()
+    
+    def __str__(self):
+        return f"{self.property_id} booked on {self.date}"
+    
+    class Meta:
+        ordering = ['property', 'date']
+        indexes = [
+            models.Index(fields=['property', 'date'], name='bookednight_property_date_idx'),
+            models.Index(fields=['date', 'property'], name='bookednight_date_property_idx'),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key (see booking.services)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='idempotency_keys', on_delete=models.CASCADE)
+    scope = models.CharField(max_length=50)  # endpoint the key was used on
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Idempotency key {self.key} ({self.scope})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='unique_idempotency_key'),
+        ]
 
 
 class HostEarnings(models.Model):
@@ -121,6 +170,29 @@ class PropertyAnalytics(models.Model):
         ordering = ['-last_updated']
 
 
+class HostDashboardStats(models.Model):
+    """
+    Materialized dashboard numbers for one user, kept current by signals
+    (see booking.dashboard) so the dashboard is a single primary-key read.
+    """
+    host = models.OneToOneField(User, related_name='dashboard_stats', on_delete=models.CASCADE, primary_key=True)
+    
+    total_properties = models.IntegerField(default=0)
+    total_reservations = models.IntegerField(default=0)
+    pending_requests = models.IntegerField(default=0)
+    total_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    this_month_earnings = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    month_start = models.DateTimeField()  # month this_month_earnings belongs to
+    occupancy_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    unread_messages = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Dashboard stats for {self.host_id}"
+
+
 class PropertyReview(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     property = models.ForeignKey(Property, related_name='reviews', on_delete=models.CASCADE)
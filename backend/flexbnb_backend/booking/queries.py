@@ -0,0 +1,48 @@
+"""
+Queryset builders for endpoints that render ReservationSerializer lists.
+
+ReservationSerializer reads the property (and its primary image), guest
+and host of every row; these helpers load all of that up front so a list
+costs the same handful of queries whether it has one row or five hundred.
+"""
+from django.db.models import Exists, OuterRef, Prefetch
+
+from property.models import primary_image_prefetch
+
+from .models import PropertyReview, Reservation
+
+
+def reservation_list(queryset=None):
+    """Reservations with everything ReservationSerializer touches preloaded"""
+    if queryset is None:
+        queryset = Reservation.objects.all()
+    return queryset.select_related(
+        'property', 'guest', 'host'
+    ).prefetch_related(
+        primary_image_prefetch('property__images')
+    )
+
+
+def with_has_review(queryset):
+    """Annotate ``has_review`` in the same query instead of a lookup per row"""
+    return queryset.annotate(
+        has_review=Exists(PropertyReview.objects.filter(reservation=OuterRef('pk')))
+    )
+
+
+def pools_by_id(pool_ids, approved_members=False):
+    """
+    {pool id: RoomPool} for the given ids in one query, with the creator
+    joined and, optionally, approved members (and their users) prefetched
+    onto ``pool.approved_members``.
+    """
+    from roompooling.models import RoomPool, RoomPoolMember
+
+    pools = RoomPool.objects.filter(id__in=set(pool_ids)).select_related('creator')
+    if approved_members:
+        pools = pools.prefetch_related(Prefetch(
+            'members',
+            queryset=RoomPoolMember.objects.filter(status='approved').select_related('user'),
+            to_attr='approved_members',
+        ))
+    return {pool.id: pool for pool in pools}
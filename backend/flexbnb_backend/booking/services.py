@@ -0,0 +1,190 @@
+"""
+Transactional booking path shared by every endpoint that creates reservations.
+
+All writes for one property are serialized on a per-property lock taken
+inside the transaction, the overlap check runs under that lock against the
+availability calendar, and the reservation (plus its BookedNight rows, via
+the post_save signal) commits atomically with the check.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from rest_framework.response import Response
+
+from property.models import Property
+
+from .availability import BLOCKING_STATUSES, is_available, hourly_conflicts, reservation_blocks
+from .models import IdempotencyKey, Reservation
+
+
+class BookingConflict(Exception):
+    pass
+
+
+def lock_property_calendar(property_id):
+    """
+    Block other bookings of this property until the current transaction ends.
+
+    - BOOKING_LOCK_MODE = 'advisory' on PostgreSQL: pg_advisory_xact_lock on
+      a key derived from the property id (no row is touched)
+    - otherwise SELECT ... FOR UPDATE on the property row
+    - databases without row locks (SQLite) fall back to a no-op UPDATE,
+      which takes the database write lock for the rest of the transaction
+    """
+    lock_mode = getattr(settings, 'BOOKING_LOCK_MODE', 'row')
+    if connection.vendor == 'postgresql' and lock_mode == 'advisory':
+        key = Property._meta.pk.to_python(property_id).int & 0x7FFFFFFFFFFFFFFF
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+    elif connection.features.has_select_for_update:
+        list(Property.objects.select_for_update().filter(id=property_id).values_list('id', flat=True))
+    else:
+        Property.objects.filter(id=property_id).update(price_per_night=F('price_per_night'))
+
+
+def ensure_available(property_id, check_in, check_out, check_in_time=None, check_out_time=None, exclude_reservation=None):
+    """
+    Raise BookingConflict unless the dates are free. ``exclude_reservation``
+    is left out of the check, for a reservation re-entering the calendar.
+    """
+    others = Reservation.objects.filter(property_id=property_id)
+    if exclude_reservation is not None:
+        others = others.exclude(pk=exclude_reservation.pk)
+    if check_in_time and check_out_time:
+        # Hourly slot: no overlapping hourly booking and no stay holding that night
+        free = (
+            not hourly_conflicts(check_in, check_in_time, check_out_time).filter(
+                id__in=others.values('id')
+            ).exists()
+            and is_available(property_id, check_in, check_in + timedelta(days=1), exclude_reservation)
+        )
+    else:
+        # Stay: no night taken and no hourly booking on any of the nights
+        free = (
+            is_available(property_id, check_in, check_out, exclude_reservation)
+            and not others.filter(
+                status__in=BLOCKING_STATUSES,
+                check_in_time__isnull=False,
+                check_in_date__gte=check_in,
+                check_in_date__lt=check_out,
+            ).exists()
+        )
+    if not free:
+        raise BookingConflict('The property is not available for the selected dates')
+
+
+def book_reservation(**fields):
+    """
+    Create a Reservation after an overlap check, both under the property's
+    calendar lock. Raises BookingConflict if any night is already taken.
+    """
+    property_id = fields['property'].id if 'property' in fields else fields['property_id']
+    with transaction.atomic():
+        lock_property_calendar(property_id)
+        ensure_available(
+            property_id,
+            fields['check_in_date'],
+            fields['check_out_date'],
+            fields.get('check_in_time'),
+            fields.get('check_out_time'),
+        )
+        return Reservation.objects.create(**fields)
+
+
+def set_reservation_status(reservation, new_status):
+    """
+    Save ``reservation`` with ``new_status``. Moving it back into the
+    calendar (say declined to approved) re-checks its dates under the
+    calendar lock first, so it cannot take nights booked since. Raises
+    BookingConflict if they are.
+    """
+    if reservation_blocks(reservation) or new_status not in BLOCKING_STATUSES:
+        reservation.status = new_status
+        reservation.save()
+        return reservation
+    with transaction.atomic():
+        lock_property_calendar(reservation.property_id)
+        ensure_available(
+            reservation.property_id,
+            reservation.check_in_date,
+            reservation.check_out_date,
+            reservation.check_in_time,
+            reservation.check_out_time,
+            exclude_reservation=reservation,
+        )
+        reservation.status = new_status
+        reservation.save()
+    return reservation
+
+
+class _RollbackResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def _request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key was already used with a different request'},
+            status=422
+        )
+    if record.response_status is None:
+        return Response(
+            {'error': 'A request with this Idempotency-Key is still in progress'},
+            status=409
+        )
+    return Response(
+        record.response_body,
+        status=record.response_status,
+        headers={'Idempotent-Replayed': 'true'}
+    )
+
+
+def run_idempotent(request, scope, handler):
+    """
+    Run ``handler()`` (which returns a DRF Response) at most once per
+    ``Idempotency-Key`` header for this user and scope.
+
+    The key row is inserted in the same transaction as the work, so a
+    concurrent retry with the same key waits on the unique index and then
+    replays the stored response. Server errors roll everything back so the
+    client may retry with the same key.
+    """
+    key = request.headers.get('Idempotency-Key')
+    if not key:
+        return handler()
+
+    fingerprint = _request_fingerprint(request)
+    lookup = {'user': request.user, 'scope': scope, 'key': key[:255]}
+
+    existing = IdempotencyKey.objects.filter(**lookup).first()
+    if existing:
+        return _replay(existing, fingerprint)
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(request_hash=fingerprint, **lookup)
+            response = handler()
+            if response.status_code >= 500:
+                raise _RollbackResponse(response)
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['response_status', 'response_body'])
+        return response
+    except _RollbackResponse as e:
+        return e.response
+    except IntegrityError:
+        existing = IdempotencyKey.objects.filter(**lookup).first()
+        if existing is None:
+            raise
+        return _replay(existing, fingerprint)
@@ -0,0 +1,157 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from property.models import Property
+
+from .availability import sync_reservation_nights
+from .dashboard import add_earnings, bump_host_stats, refresh_analytics_averages
+from .models import HostEarnings, HostMessage, PropertyAnalytics, Reservation
+
+
+CALENDAR_FIELDS = ('status', 'property_id', 'check_in_date', 'check_out_date')
+STATS_FIELDS = ('host_id', 'status')
+EARNINGS_FIELDS = ('host_id', 'net_earnings', 'created_at')
+MESSAGE_FIELDS = ('receiver_id', 'is_read')
+
+
+def _snapshot(instance, fields):
+    # Read from __dict__ so deferred fields are never loaded from here
+    return tuple(instance.__dict__.get(field) for field in fields)
+
+
+def _calendar_key(reservation):
+    return _snapshot(reservation, CALENDAR_FIELDS)
+
+
+@receiver(post_init, sender=Reservation)
+def remember_calendar_state(sender, instance, **kwargs):
+    instance._calendar_key = _calendar_key(instance)
+    instance._stats_key = _snapshot(instance, STATS_FIELDS)
+
+
+@receiver(post_save, sender=Reservation)
+def update_availability_calendar(sender, instance, created, **kwargs):
+    """Keep BookedNight rows in step with reservation dates and status"""
+    key = _calendar_key(instance)
+    if created or key != instance._calendar_key:
+        sync_reservation_nights(instance)
+    instance._calendar_key = key
+
+
+# Host dashboard counters (booking.dashboard)
+
+def _reservation_counts(host_id, status, sign):
+    if host_id is not None and status is not None:
+        bump_host_stats(host_id, total_reservations=sign, pending_requests=sign if status == 'pending' else 0)
+
+
+@receiver(post_save, sender=Reservation)
+def update_reservation_stats(sender, instance, created, **kwargs):
+    key = _snapshot(instance, STATS_FIELDS)
+    if created:
+        _reservation_counts(*key, sign=1)
+    elif key != instance._stats_key:
+        _reservation_counts(*instance._stats_key, sign=-1)
+        _reservation_counts(*key, sign=1)
+    instance._stats_key = key
+
+
+@receiver(post_delete, sender=Reservation)
+def forget_reservation_stats(sender, instance, **kwargs):
+    _reservation_counts(*instance._stats_key, sign=-1)
+
+
+@receiver(post_save, sender=Property)
+def count_new_property(sender, instance, created, **kwargs):
+    if created:
+        bump_host_stats(instance.Host_id, total_properties=1)
+
+
+@receiver(post_delete, sender=Property)
+def uncount_property(sender, instance, **kwargs):
+    bump_host_stats(instance.Host_id, total_properties=-1)
+
+
+def _load_deferred_key(sender, instance, fields):
+    # A field deferred when loaded has no snapshot: read the stored values instead
+    if None in instance._stats_key and not instance._state.adding:
+        stored = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+        if stored is not None:
+            instance._stats_key = stored
+
+
+def _saved_key(instance, fields):
+    # Fields still deferred were not saved, so they keep their stored values
+    return tuple(
+        new if new is not None else old
+        for new, old in zip(_snapshot(instance, fields), instance._stats_key)
+    )
+
+
+def _earnings(host_id, net_earnings, created_at, sign):
+    if host_id is not None and net_earnings is not None:
+        add_earnings(host_id, sign * net_earnings, created_at)
+
+
+@receiver(post_init, sender=HostEarnings)
+def remember_earnings_state(sender, instance, **kwargs):
+    instance._stats_key = _snapshot(instance, EARNINGS_FIELDS)
+
+
+@receiver([pre_save, pre_delete], sender=HostEarnings)
+def load_earnings_state(sender, instance, **kwargs):
+    _load_deferred_key(sender, instance, EARNINGS_FIELDS)
+
+
+@receiver(post_save, sender=HostEarnings)
+def count_earnings(sender, instance, created, **kwargs):
+    key = _snapshot(instance, EARNINGS_FIELDS) if created else _saved_key(instance, EARNINGS_FIELDS)
+    if created:
+        _earnings(*key, sign=1)
+    elif key != instance._stats_key:
+        _earnings(*instance._stats_key, sign=-1)
+        _earnings(*key, sign=1)
+    instance._stats_key = key
+
+
+@receiver(post_delete, sender=HostEarnings)
+def uncount_earnings(sender, instance, **kwargs):
+    _earnings(*instance._stats_key, sign=-1)
+
+
+def _unread(receiver_id, is_read, sign):
+    if receiver_id is not None and is_read is False:
+        bump_host_stats(receiver_id, unread_messages=sign)
+
+
+@receiver(post_init, sender=HostMessage)
+def remember_message_state(sender, instance, **kwargs):
+    instance._stats_key = _snapshot(instance, MESSAGE_FIELDS)
+
+
+@receiver([pre_save, pre_delete], sender=HostMessage)
+def load_message_state(sender, instance, **kwargs):
+    _load_deferred_key(sender, instance, MESSAGE_FIELDS)
+
+
+@receiver(post_save, sender=HostMessage)
+def count_unread_message(sender, instance, created, **kwargs):
+    key = _snapshot(instance, MESSAGE_FIELDS) if created else _saved_key(instance, MESSAGE_FIELDS)
+    if created:
+        _unread(*key, sign=1)
+    elif key != instance._stats_key:
+        _unread(*instance._stats_key, sign=-1)
+        _unread(*key, sign=1)
+    instance._stats_key = key
+
+
+@receiver(post_delete, sender=HostMessage)
+def uncount_unread_message(sender, instance, **kwargs):
+    _unread(*instance._stats_key, sign=-1)
+
+
+@receiver([post_save, post_delete], sender=PropertyAnalytics)
+def update_analytics_averages(sender, instance, **kwargs):
+    host_id = Property.objects.filter(id=instance.property_id).values_list('Host_id', flat=True).first()
+    if host_id is not None:
+        refresh_analytics_averages(host_id)
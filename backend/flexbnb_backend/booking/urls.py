@@ -7,6 +7,7 @@ urlpatterns = [
     path('reservations/<uuid:reservation_id>/status/', views.update_reservation_status, name='update_reservation_status'),
     path('reservations/create/', views.create_reservation, name='create_reservation'),
     path('earnings/', views.host_earnings, name='host_earnings'),
+    path('earnings/export/', views.host_earnings_export, name='host_earnings_export'),
     path('messages/', views.host_messages, name='host_messages'),
     path('messages/send/', views.send_message, name='send_message'),
     path('analytics/', views.property_analytics, name='property_analytics'),
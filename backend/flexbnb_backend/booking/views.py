@@ -3,6 +3,7 @@ from rest_framework.decorators import api_view, authentication_classes, permissi
 from rest_framework.response import Response
 from django.db.models import Sum, Avg, Count, Q
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime, timedelta
 from decimal import Decimal
 from useraccount.auth import ClerkAuthentication
@@ -23,6 +24,10 @@ from .serializers import (
     GuestReviewSerializer,
     HostDashboardStatsSerializer
 )
+from .dashboard import bump_host_stats, get_host_stats
+from .export import EXPORT_FORMATS, stream_earnings
+from .queries import pools_by_id, reservation_list, with_has_review
+from .services import BookingConflict, book_reservation, run_idempotent, set_reservation_status
 from property.models import Property
 from django.core.exceptions import ValidationError
 
@@ -43,52 +48,10 @@ def _serialize_validation_error(e: ValidationError):
 @permission_classes([permissions.IsAuthenticated])
 def host_dashboard_stats(request):
     """Get comprehensive dashboard statistics for the host"""
-    user = request.user
-    
-    # Get all properties for this host
-    host_properties = Property.objects.filter(Host=user)
-    
-    # Calculate stats
-    total_properties = host_properties.count()
-    
-    # Reservations stats
-    all_reservations = Reservation.objects.filter(host=user)
-    total_reservations = all_reservations.count()
-    pending_requests = all_reservations.filter(status='pending').count()
-    
-    # Earnings stats
-    earnings = HostEarnings.objects.filter(host=user)
-    total_earnings = earnings.aggregate(total=Sum('net_earnings'))['total'] or 0
-    
-    # This month earnings
-    this_month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    this_month_earnings = earnings.filter(
-        created_at__gte=this_month_start
-    ).aggregate(total=Sum('net_earnings'))['total'] or 0
-    
-    # Analytics aggregation
-    analytics = PropertyAnalytics.objects.filter(property__in=host_properties)
-    occupancy_rate = analytics.aggregate(avg_rate=Avg('occupancy_rate'))['avg_rate'] or 0
-    average_rating = analytics.aggregate(avg_rating=Avg('average_rating'))['avg_rating'] or 0
-    
-    # Unread messages
-    unread_messages = HostMessage.objects.filter(
-        receiver=user, 
-        is_read=False
-    ).count()
+    # Maintained incrementally by booking.signals; see booking.dashboard
+    stats = get_host_stats(request.user)
     
-    stats_data = {
-        'total_properties': total_properties,
-        'total_reservations': total_reservations,
-        'pending_requests': pending_requests,
-        'total_earnings': total_earnings,
-        'this_month_earnings': this_month_earnings,
-        'occupancy_rate': occupancy_rate,
-        'average_rating': average_rating,
-        'unread_messages': unread_messages
-    }
-    
-    serializer = HostDashboardStatsSerializer(stats_data)
+    serializer = HostDashboardStatsSerializer(stats)
     return Response(serializer.data)
 
 
@@ -100,7 +63,7 @@ def host_reservations(request):
     user = request.user
     status_filter = request.query_params.get('status', None)
     
-    reservations = Reservation.objects.filter(host=user)
+    reservations = reservation_list(Reservation.objects.filter(host=user))
     
     if status_filter:
         reservations = reservations.filter(status=status_filter)
@@ -126,8 +89,10 @@ def update_reservation_status(request, reservation_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reservation.status = new_status
-        reservation.save()
+        try:
+            set_reservation_status(reservation, new_status)
+        except BookingConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
         # If approved, create earnings record
         if new_status == 'approved' and not hasattr(reservation, 'earnings_record'):
@@ -205,6 +170,39 @@ def host_earnings(request):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@authentication_classes([ClerkAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def host_earnings_export(request):
+    """Stream the host's earnings as CSV or NDJSON (?output=csv|ndjson)"""
+    export_format = request.query_params.get('output', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    earnings = HostEarnings.objects.filter(host=request.user).order_by('-created_at')
+    
+    # Validate dates up front; errors can't be reported once streaming starts
+    for param, lookup in (('start_date', 'created_at__date__gte'), ('end_date', 'created_at__date__lte')):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            return Response(
+                {'error': f'{param} must be a valid date (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        earnings = earnings.filter(**{lookup: day})
+    
+    return stream_earnings(earnings, export_format)
+
+
 @api_view(['GET'])
 @authentication_classes([ClerkAuthentication])
 @permission_classes([permissions.IsAuthenticated])
@@ -218,7 +216,9 @@ def host_messages(request):
     
     # Mark messages as read if they're received by current user
     unread_messages = messages.filter(receiver=user, is_read=False)
-    unread_messages.update(is_read=True)
+    marked_read = unread_messages.update(is_read=True)
+    # update() skips the post_save signal, so adjust the dashboard counter here
+    bump_host_stats(user.pk, unread_messages=-marked_read)
     
     serializer = HostMessageSerializer(messages, many=True)
     return Response(serializer.data)
@@ -480,22 +480,19 @@ def guest_reservations(request):
     user = request.user
     status_filter = request.query_params.get('status', None)
 
-    reservations = Reservation.objects.filter(guest=user)
+    reservations = with_has_review(reservation_list(Reservation.objects.filter(guest=user)))
 
     if status_filter:
         reservations = reservations.filter(status=status_filter)
 
-    reservations = reservations.order_by('-created_at')[:50]
+    reservations = list(reservations.order_by('-created_at')[:50])
 
     serializer = ReservationSerializer(reservations, many=True)
     data = serializer.data
 
-    # Inject hasReview flag based on presence of related review
-    # Note: serializer.data is a list of dicts detached from model instances; we need a lookup.
-    id_to_has_review = {str(r.id): hasattr(r, 'review') for r in reservations}
-    for item in data:
-        reservation_id = str(item.get('id'))
-        item['hasReview'] = bool(id_to_has_review.get(reservation_id, False))
+    # Inject hasReview flag from the has_review annotation (same order as data)
+    for item, reservation in zip(data, reservations):
+        item['hasReview'] = reservation.has_review
 
     return Response(data)
 
@@ -540,7 +537,14 @@ def can_review_property(request):
 @authentication_classes([ClerkAuthentication])
 @permission_classes([permissions.IsAuthenticated])
 def create_reservation(request):
-    """Create a reservation for a property by the authenticated guest."""
+    """
+    Create a reservation for a property by the authenticated guest.
+    Send an Idempotency-Key header to make client retries safe.
+    """
+    return run_idempotent(request, 'create_reservation', lambda: _create_reservation(request))
+
+
+def _create_reservation(request):
     try:
         property_id = request.data.get('propertyId') or request.data.get('property_id')
         start_date = request.data.get('startDate') or request.data.get('check_in_date')
@@ -575,19 +579,25 @@ def create_reservation(request):
         booking_fee = round(total_price * 0.1, 2)
         host_earnings = round(total_price - booking_fee, 2)
 
-        reservation = Reservation.objects.create(
-            property=prop,
-            guest=request.user,
-            host=prop.Host,
-            check_in_date=check_in,
-            check_out_date=check_out,
-            guests_count=guests_count,
-            total_price=total_price,
-            booking_fee=booking_fee,
-            host_earnings=host_earnings,
-            status='pending',
-            special_requests=special_requests,
-        )
+        if check_out <= check_in:
+            return Response({'error': 'End date must be after start date'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reservation = book_reservation(
+                property=prop,
+                guest=request.user,
+                host=prop.Host,
+                check_in_date=check_in,
+                check_out_date=check_out,
+                guests_count=guests_count,
+                total_price=total_price,
+                booking_fee=booking_fee,
+                host_earnings=host_earnings,
+                status='pending',
+                special_requests=special_requests,
+            )
+        except BookingConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
 
         serializer = ReservationSerializer(reservation)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -608,19 +618,22 @@ def pool_member_reservations(request):
     user = request.user
     
     try:
-        from roompooling.models import RoomPoolMember, RoomPool
+        from roompooling.models import RoomPoolMember
         
         # Find pools where user is an approved member
-        member_pools = RoomPoolMember.objects.filter(
-            user=user,
-            status='approved'
-        ).values_list('pool_id', flat=True)
+        memberships = {
+            m.pool_id: m
+            for m in RoomPoolMember.objects.filter(
+                user=user,
+                status='approved'
+            ).select_related('pool')
+        }
         
         # Get reservations linked to those pools
-        pool_reservations = Reservation.objects.filter(
+        pool_reservations = reservation_list(Reservation.objects.filter(
             is_room_pool=True,
-            room_pool_id__in=member_pools
-        ).order_by('-created_at')
+            room_pool_id__in=list(memberships)
+        )).order_by('-created_at')
         
         # Enrich with pool membership info
         results = []
@@ -629,8 +642,8 @@ def pool_member_reservations(request):
             
             # Get member's specific payment info
             try:
-                pool = RoomPool.objects.get(id=res.room_pool_id)
-                membership = RoomPoolMember.objects.get(pool=pool, user=user)
+                membership = memberships[res.room_pool_id]
+                pool = membership.pool
                 res_data['pool_info'] = {
                     'pool_id': str(pool.id),
                     'pool_title': pool.title,
@@ -661,12 +674,20 @@ def host_pool_reservations(request):
     Get room pool reservations for the host's properties.
     Shows additional pool information for the host.
     """
+    from roompooling.ledger import pool_balances
+    
     user = request.user
     
-    pool_reservations = Reservation.objects.filter(
+    pool_reservations = list(reservation_list(Reservation.objects.filter(
         host=user,
         is_room_pool=True
-    ).order_by('-created_at')
+    )).order_by('-created_at'))
+    
+    pools = pools_by_id(
+        [res.room_pool_id for res in pool_reservations if res.room_pool_id],
+        approved_members=True
+    )
+    collected = pool_balances(list(pools))
     
     results = []
     for res in pool_reservations:
@@ -675,9 +696,8 @@ def host_pool_reservations(request):
         # Add pool details if available
         if res.room_pool_id:
             try:
-                from roompooling.models import RoomPool, RoomPoolMember
-                pool = RoomPool.objects.get(id=res.room_pool_id)
-                members = RoomPoolMember.objects.filter(pool=pool, status='approved')
+                pool = pools[res.room_pool_id]
+                members = pool.approved_members
                 
                 res_data['pool_details'] = {
                     'pool_id': str(pool.id),
@@ -693,7 +713,7 @@ def host_pool_reservations(request):
                         }
                         for m in members
                     ],
-                    'total_collected': float(sum(m.amount_paid for m in members)),
+                    'total_collected': float(collected.get(pool.id, 0)),
                     'visibility': pool.visibility
                 }
             except Exception:
@@ -2,6 +2,8 @@
 ASGI config for flexbnb_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django as before; WebSocket connections go to the Channels
+consumers (pool chat).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +15,18 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'flexbnb_backend.settings')
 
-application = get_asgi_application()
+# Set up Django before anything imports models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from roompooling.routing import websocket_urlpatterns  # noqa: E402
+from useraccount.ws_auth import ClerkWebSocketAuthMiddleware  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(
+        ClerkWebSocketAuthMiddleware(URLRouter(websocket_urlpatterns))
+    ),
+})
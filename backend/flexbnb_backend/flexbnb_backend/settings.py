@@ -54,6 +54,55 @@ CLERK_FRONTEND_API = os.environ.get('NEXT_PUBLIC_CLERK_PUBLISHABLE_KEY', '')
 CLERK_API_KEY = os.environ.get('CLERK_SECRET_KEY', '')
 CLERK_JWT_KEY = os.environ.get('CLERK_JWT_KEY', '')
 CLERK_ISSUER = "https://noted-ghoul-41.clerk.accounts.dev"  # Replace with your Clerk issuer
+CLERK_JWKS_URL = os.environ.get('CLERK_JWKS_URL', f"{CLERK_ISSUER}/.well-known/jwks.json")
+CLERK_JWKS_CACHE_TTL = int(os.environ.get('CLERK_JWKS_CACHE_TTL', 3600))  # seconds
+CLERK_JWKS_REFRESH_AHEAD = 300  # start a background refresh this long before expiry
+CLERK_JWKS_MIN_REFETCH_INTERVAL = 30  # rate limit for refetches on unknown kid
+CLERK_TOKEN_CACHE_SIZE = 10000  # verified tokens kept in memory (LRU)
+CLERK_TOKEN_CACHE_MAX_TTL = 300  # seconds, never longer than the token's exp
+CLERK_USER_CACHE_SIZE = 10000
+CLERK_USER_CACHE_TTL = 300  # seconds; saves/deletes in this process invalidate immediately
+
+# Booking concurrency: 'row' locks the property row (SELECT ... FOR UPDATE),
+# 'advisory' uses pg_advisory_xact_lock on PostgreSQL
+BOOKING_LOCK_MODE = os.environ.get('BOOKING_LOCK_MODE', 'row')
+
+# Precomputed roommate matches (roompooling.match_lists)
+ROOMMATE_MATCH_LIST_SIZE = 50  # matches stored per profile
+ROOMMATE_MATCH_ASYNC = True  # refresh lists on a background thread after commit
+
+# Expiry sweeper for invitations and pool deadlines (roompooling.expiry)
+POOL_EXPIRY_SWEEP_INTERVAL = None  # seconds; set to sweep on a thread in each process, or use `manage.py sweep_expired`
+POOL_EXPIRY_BATCH_SIZE = 500  # rows per UPDATE
+
+# Item-item collaborative filtering (recommendation.collaborative)
+RECOMMENDATION_NEIGHBORS = 50  # neighbours stored per property
+RECOMMENDATION_SHRINK = 10  # damps similarities resting on few shared users
+
+# Per-process memory caches; point 'recommendations' at a shared backend
+# (django.core.cache.backends.redis.RedisCache) when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recommendations': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recommendations',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Per-user ranking cache (recommendation.cache)
+RECOMMENDATION_CACHE = 'recommendations'  # CACHES alias
+RECOMMENDATION_CACHE_FRESH_FOR = 600  # seconds an untouched ranking is served as is
+RECOMMENDATION_CACHE_MAX_AGE = 3600  # seconds a stale ranking may be served while it is recomputed
+RECOMMENDATION_CACHE_SIZE = 100  # ranked ids kept per user
+RECOMMENDATION_CACHE_ASYNC = True  # False recomputes stale rankings inline
+
+# Trending list (recommendation.trending)
+RECOMMENDATION_TRENDING_INTERVAL = None  # seconds; set to refresh on a thread in each process, or use `manage.py refresh_trending`
+RECOMMENDATION_TRENDING_HALF_LIFE = 24  # hours for a view or booking to count half
+RECOMMENDATION_TRENDING_SIZE = 100  # properties kept in the list
 
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
@@ -80,6 +129,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 REST_AUTH = {
@@ -90,6 +140,7 @@ REST_AUTH = {
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver (WebSockets); must precede staticfiles
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -108,6 +159,7 @@ INSTALLED_APPS = [
     'dj_rest_auth.registration',
 
     'corsheaders',
+    'channels',
     
     'property',
     'useraccount',
@@ -146,6 +198,16 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'flexbnb_backend.wsgi.application'
+ASGI_APPLICATION = 'flexbnb_backend.asgi.application'
+
+# Pool chat push (roompooling.consumers). The in-memory layer only reaches
+# sockets in the same process, which covers runserver and tests; run several
+# workers behind a shared layer (e.g. channels_redis) instead.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
 
 
 # Database
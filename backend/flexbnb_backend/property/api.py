@@ -8,6 +8,8 @@ from useraccount.auth import ClerkAuthentication
 from .models import Property, PropertyImage
 from .forms import PropertyForm
 from .serializers import PropertiesListSerializer, PropertiesDetailSerializer, PropertyImageSerializer
+from .listing import InvalidCursor, build_listing, filter_available, parse_fields, parse_page_size
+from .search import PropertySearch
 
 CORS_ALLOWED_ORIGINS = [
     'http://127.0.0.1:3000',  # Frontend origin
@@ -33,6 +35,74 @@ def properties_list(request):
     })
 
 
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([])
+def properties_list_v2(request):
+    """Cursor-paginated listing: ?cursor=&page_size=&fields=&category=&check_in=&check_out="""
+    properties = Property.objects.all()
+
+    category = request.query_params.get('category')
+    if category:
+        properties = properties.filter(category__iexact=category)
+
+    try:
+        fields = parse_fields(request.query_params.get('fields'))
+        properties = filter_available(properties, request.query_params)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    page_size = parse_page_size(request.query_params.get('page_size'))
+    cursor = request.query_params.get('cursor')
+
+    try:
+        data, next_cursor = build_listing(properties, fields, cursor=cursor, page_size=page_size)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'data': data,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+    })
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([])
+def properties_search(request):
+    """Faceted search; accepts the v2 listing params plus the filters in PropertySearch"""
+    try:
+        fields = parse_fields(request.query_params.get('fields'))
+        search = PropertySearch(
+            request.query_params,
+            queryset=filter_available(Property.objects.all(), request.query_params),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    page_size = parse_page_size(request.query_params.get('page_size'))
+    cursor = request.query_params.get('cursor')
+
+    try:
+        data, next_cursor = build_listing(search.results(), fields, cursor=cursor, page_size=page_size)
+    except InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    response = {
+        'data': data,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+    }
+
+    # Counts and facets only change with the filters, so skip them when paging
+    if not cursor and request.query_params.get('facets', '1') not in ('0', 'false'):
+        response['count'] = search.count()
+        response['facets'] = search.facets()
+
+    return JsonResponse(response)
+
+
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([])
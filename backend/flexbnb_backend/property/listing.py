@@ -0,0 +1,201 @@
+import base64
+import uuid
+from datetime import date, time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import PropertyImage
+
+
+# Fields that can be requested with ?fields= on the v2 listing
+LISTING_FIELDS = (
+    'id',
+    'title',
+    'price_per_night',
+    'price_per_hour',
+    'is_hourly_booking',
+    'image_url',
+    'allow_room_pooling',
+    'max_pool_members',
+    'bedrooms',
+    'bathrooms',
+    'guests',
+    'country',
+    'country_code',
+    'category',
+    'available_hours_start',
+    'available_hours_end',
+    'created_at',
+)
+
+# Same shape as PropertiesListSerializer
+DEFAULT_LISTING_FIELDS = (
+    'id',
+    'title',
+    'price_per_night',
+    'price_per_hour',
+    'is_hourly_booking',
+    'image_url',
+    'allow_room_pooling',
+)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _parse_date(raw, name):
+    try:
+        return date.fromisoformat(str(raw)[:10])
+    except ValueError:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def _parse_time(raw, name):
+    try:
+        return time.fromisoformat(str(raw))
+    except ValueError:
+        raise ValueError(f'{name} must be a time (HH:MM)')
+
+
+def filter_available(queryset, params):
+    """
+    Apply ?check_in=&check_out= (whole stay) or
+    ?check_in=&check_in_time=&check_out_time= (hourly slot on one day)
+    against the booking calendar as a single set-based query.
+    """
+    from booking.availability import available_properties, available_for_hours
+
+    check_in = params.get('check_in')
+    check_out = params.get('check_out')
+    start_time = params.get('check_in_time')
+    end_time = params.get('check_out_time')
+
+    if start_time or end_time:
+        if not (check_in and start_time and end_time):
+            raise ValueError('check_in, check_in_time and check_out_time are required for hourly search')
+        day = _parse_date(check_in, 'check_in')
+        start_time = _parse_time(start_time, 'check_in_time')
+        end_time = _parse_time(end_time, 'check_out_time')
+        if end_time <= start_time:
+            raise ValueError('check_out_time must be after check_in_time')
+        return available_for_hours(queryset, day, start_time, end_time)
+
+    if check_in or check_out:
+        if not (check_in and check_out):
+            raise ValueError('check_in and check_out must be given together')
+        check_in = _parse_date(check_in, 'check_in')
+        check_out = _parse_date(check_out, 'check_out')
+        if check_out <= check_in:
+            raise ValueError('check_out must be after check_in')
+        return available_properties(queryset, check_in, check_out)
+
+    return queryset
+
+
+def parse_fields(raw):
+    """Turn ?fields=a,b,c into a tuple of known listing fields"""
+    if not raw:
+        return DEFAULT_LISTING_FIELDS
+    requested = [f.strip() for f in raw.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in LISTING_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    return tuple(requested)
+
+
+def parse_page_size(raw):
+    try:
+        page_size = int(raw or DEFAULT_PAGE_SIZE)
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at_raw, pk_raw = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        created_at = parse_datetime(created_at_raw)
+        if created_at is None:
+            raise ValueError(created_at_raw)
+        return created_at, uuid.UUID(pk_raw)
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+
+
+def keyset_page(queryset, cursor, page_size):
+    """
+    Newest-first keyset pagination on (created_at, id).
+
+    Cost is one indexed range scan of ``page_size + 1`` rows no matter how
+    deep the cursor is; the extra row tells the caller there is a next page.
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+    return queryset[:page_size + 1]
+
+
+def media_url(name):
+    if not name:
+        return ''
+    return f'{settings.WEBSITE_URL}{default_storage.url(name)}'
+
+
+def primary_image_names(property_ids):
+    """{property_id: image name} for the primary images of a whole page in one query"""
+    rows = PropertyImage.objects.filter(
+        property_id__in=property_ids,
+        is_primary=True,
+    ).order_by('order', 'created_at').values_list('property_id', 'image')
+
+    names = {}
+    for property_id, name in rows:
+        names.setdefault(property_id, name)
+    return names
+
+
+def build_listing(queryset, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Build one page of the listing payload straight from ``.values()`` rows.
+
+    Returns (rows, next_cursor).
+    """
+    columns = [f for f in fields if f != 'image_url']
+    for required in ('id', 'created_at'):
+        if required not in columns:
+            columns.append(required)
+    if 'image_url' in fields:
+        columns.append('image')
+
+    rows = list(keyset_page(queryset, cursor, page_size).values(*columns))
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last['created_at'], last['id'])
+
+    if 'image_url' in fields:
+        primary = primary_image_names([row['id'] for row in rows])
+        for row in rows:
+            row['image_url'] = media_url(primary.get(row['id']) or row['image'])
+
+    return [{f: row[f] for f in fields} for row in rows], next_cursor
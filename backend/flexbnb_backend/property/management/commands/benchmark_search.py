@@ -0,0 +1,107 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from property.models import Property
+from property.search import PropertySearch
+from property.listing import build_listing, DEFAULT_LISTING_FIELDS
+from useraccount.models import User
+
+
+COUNTRIES = [
+    ('France', 'FR'), ('Spain', 'ES'), ('Italy', 'IT'), ('United States', 'US'),
+    ('Japan', 'JP'), ('Maldives', 'MV'), ('Switzerland', 'CH'), ('Pakistan', 'PK'),
+    ('Brazil', 'BR'), ('Australia', 'AU'), ('Canada', 'CA'), ('Greece', 'GR'),
+]
+CATEGORIES = ['BeachFront', 'Top Cities', 'Top Of The World', 'Cabins', 'Villas', 'Lakefront']
+
+QUERIES = [
+    ('no filters', {}),
+    ('country', {'country': 'france'}),
+    ('country_code + category', {'country_code': 'IT', 'category': 'Villas'}),
+    ('price range', {'min_price': 100, 'max_price': 200}),
+    ('hourly price range', {'is_hourly_booking': 'true', 'min_price': 20, 'max_price': 60}),
+    ('capacity', {'guests': 6, 'bedrooms': 3, 'bathrooms': 2}),
+    ('everything', {
+        'country_code': 'ES', 'category': 'BeachFront', 'min_price': 50, 'max_price': 400,
+        'guests': 4, 'bedrooms': 2, 'allow_room_pooling': 'true',
+    }),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark property search and facets on a seeded catalog (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['properties'], options['seed'])
+            self._run(options['repeat'])
+            transaction.set_rollback(True)
+
+    def _seed(self, count, seed):
+        rng = random.Random(seed)
+        host = User.objects.create(email='benchmark-host@example.com', name='Benchmark Host')
+
+        started = time.perf_counter()
+        batch = []
+        for i in range(count):
+            country, code = rng.choice(COUNTRIES)
+            is_hourly = rng.random() < 0.2
+            batch.append(Property(
+                title=f'Benchmark property {i}',
+                description='Seeded for benchmark_search',
+                price_per_night=rng.randint(20, 900),
+                price_per_hour=rng.randint(10, 150) if is_hourly else None,
+                is_hourly_booking=is_hourly,
+                bedrooms=rng.randint(1, 6),
+                bathrooms=rng.randint(1, 4),
+                guests=rng.randint(1, 12),
+                country=country,
+                country_code=code,
+                category=rng.choice(CATEGORIES),
+                image='uploads/properties/benchmark.jpg',
+                Host=host,
+                allow_room_pooling=rng.random() < 0.3,
+            ))
+            if len(batch) == 5000:
+                Property.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Property.objects.bulk_create(batch)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE property_property')
+
+        self.stdout.write(f'Seeded {count} properties in {time.perf_counter() - started:.1f}s')
+
+    def _run(self, repeat):
+        self.stdout.write(f"{'query':<26}{'results':>9}{'page ms':>10}{'facets ms':>11}{'queries':>9}")
+        for label, params in QUERIES:
+            search = PropertySearch(params)
+            page_times, facet_times = [], []
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    build_listing(search.results(), DEFAULT_LISTING_FIELDS)
+                    page_times.append(time.perf_counter() - started)
+
+                    started = time.perf_counter()
+                    total = search.count()
+                    search.facets()
+                    facet_times.append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f'{label:<26}{total:>9}'
+                f'{min(page_times) * 1000:>10.1f}'
+                f'{min(facet_times) * 1000:>11.1f}'
+                f'{len(queries.captured_queries):>9}'
+            )
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0004_propertyimage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', 'is_primary'], name='propertyimage_primary_idx'),
+        ),
+    ]
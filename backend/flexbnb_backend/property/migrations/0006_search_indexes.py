@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:12
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0005_listing_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(django.db.models.functions.text.Upper('country'), django.db.models.functions.text.Upper('category'), models.F('price_per_night'), name='property_country_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(django.db.models.functions.text.Upper('category'), models.F('price_per_night'), name='property_category_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['country_code', 'category', 'price_per_night'], name='property_code_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_hourly_booking', 'price_per_hour'], name='property_hourly_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['allow_room_pooling', 'price_per_night'], name='property_pooling_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['guests', 'bedrooms', 'bathrooms'], name='property_capacity_idx'),
+        ),
+    ]
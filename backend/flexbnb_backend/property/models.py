@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Upper
 
 from useraccount.models import User
 
@@ -30,9 +31,27 @@ class Property(models.Model):
     allow_room_pooling = models.BooleanField(default=False)
     max_pool_members = models.IntegerField(default=6, null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination for the v2 listing
+            models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+            # Faceted search (property.search); country/category are matched
+            # with iexact, which compiles to UPPER(col) = UPPER(value)
+            models.Index(Upper('country'), Upper('category'), 'price_per_night', name='property_country_cat_idx'),
+            models.Index(Upper('category'), 'price_per_night', name='property_category_price_idx'),
+            models.Index(fields=['country_code', 'category', 'price_per_night'], name='property_code_cat_price_idx'),
+            models.Index(fields=['is_hourly_booking', 'price_per_hour'], name='property_hourly_price_idx'),
+            models.Index(fields=['allow_room_pooling', 'price_per_night'], name='property_pooling_price_idx'),
+            models.Index(fields=['guests', 'bedrooms', 'bathrooms'], name='property_capacity_idx'),
+        ]
+    
     def image_url(self):
         """Returns primary image URL or legacy image URL"""
-        primary_image = self.images.filter(is_primary=True).first()
+        if hasattr(self, 'primary_images'):
+            # Loaded by primary_image_prefetch(), no query needed
+            primary_image = self.primary_images[0] if self.primary_images else None
+        else:
+            primary_image = self.images.filter(is_primary=True).first()
         if primary_image:
             return f'{settings.WEBSITE_URL}{primary_image.image.url}'
         return f'{settings.WEBSITE_URL}{self.image.url}'
@@ -65,6 +84,9 @@ class PropertyImage(models.Model):
     
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['property', 'is_primary'], name='propertyimage_primary_idx'),
+        ]
         verbose_name = 'Property Image'
         verbose_name_plural = 'Property Images'
     
@@ -84,3 +106,10 @@ class PropertyImage(models.Model):
         return f"Image for {self.property.title} (Order: {self.order})"
 
 
+def primary_image_prefetch(lookup='images'):
+    """Prefetch for a queryset whose rows call Property.image_url(), e.g. 'property__images'"""
+    return models.Prefetch(
+        lookup,
+        queryset=PropertyImage.objects.filter(is_primary=True),
+        to_attr='primary_images',
+    )
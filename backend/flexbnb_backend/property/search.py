@@ -0,0 +1,173 @@
+from django.db.models import Count, Q
+
+from .models import Property
+
+
+# Price facet buckets as (label, min inclusive, max exclusive)
+NIGHTLY_PRICE_BUCKETS = (
+    ('0-50', 0, 50),
+    ('50-100', 50, 100),
+    ('100-200', 100, 200),
+    ('200-500', 200, 500),
+    ('500+', 500, None),
+)
+
+HOURLY_PRICE_BUCKETS = (
+    ('0-20', 0, 20),
+    ('20-50', 20, 50),
+    ('50-100', 50, 100),
+    ('100+', 100, None),
+)
+
+FACET_DIMENSIONS = (
+    'country_code',
+    'category',
+    'price',
+    'guests',
+    'bedrooms',
+    'bathrooms',
+    'is_hourly_booking',
+    'allow_room_pooling',
+)
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def _parse_int(raw, name):
+    if raw in (None, ''):
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def _parse_bool(raw, name):
+    if raw in (None, ''):
+        return None
+    value = str(raw).lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+
+class PropertySearch:
+    """
+    Faceted search over Property.
+
+    Every filter is an equality or range predicate on an indexed column, so
+    the planner never needs a leading-wildcard ``icontains`` scan:
+
+    - country_code: exact match (use this when the client knows the code)
+    - country / category: case-insensitive equality, backed by UPPER() indexes
+    - min_price / max_price: range on price_per_night or price_per_hour
+      (``price_type=hourly`` or ``is_hourly_booking=true`` selects hourly)
+    - guests / bedrooms / bathrooms: minimums
+    - is_hourly_booking / allow_room_pooling: booleans
+
+    Facet counts are disjunctive: the counts for a dimension apply every
+    filter except the one on that dimension, so the client can show how many
+    results each alternative value would give.
+    """
+
+    def __init__(self, params, queryset=None):
+        self.queryset = queryset if queryset is not None else Property.objects.all()
+        self.filters = self._parse(params)
+
+    def _parse(self, params):
+        filters = {}
+
+        country_code = params.get('country_code')
+        if country_code:
+            filters['country_code'] = Q(country_code=country_code.upper())
+
+        country = params.get('country')
+        if country:
+            filters['country'] = Q(country__iexact=country.strip())
+
+        category = params.get('category')
+        if category:
+            filters['category'] = Q(category__iexact=category.strip())
+
+        is_hourly = _parse_bool(params.get('is_hourly_booking'), 'is_hourly_booking')
+        if is_hourly is not None:
+            filters['is_hourly_booking'] = Q(is_hourly_booking=is_hourly)
+
+        allow_pooling = _parse_bool(params.get('allow_room_pooling'), 'allow_room_pooling')
+        if allow_pooling is not None:
+            filters['allow_room_pooling'] = Q(allow_room_pooling=allow_pooling)
+
+        price_type = params.get('price_type') or ('hourly' if is_hourly else 'nightly')
+        if price_type not in ('nightly', 'hourly'):
+            raise ValueError('price_type must be nightly or hourly')
+        self.price_type = price_type
+        self.price_field = 'price_per_hour' if price_type == 'hourly' else 'price_per_night'
+
+        min_price = _parse_int(params.get('min_price'), 'min_price')
+        max_price = _parse_int(params.get('max_price'), 'max_price')
+        if min_price is not None or max_price is not None:
+            price_q = Q()
+            if min_price is not None:
+                price_q &= Q(**{f'{self.price_field}__gte': min_price})
+            if max_price is not None:
+                price_q &= Q(**{f'{self.price_field}__lte': max_price})
+            filters['price'] = price_q
+
+        for name in ('guests', 'bedrooms', 'bathrooms'):
+            minimum = _parse_int(params.get(name), name)
+            if minimum is not None:
+                filters[name] = Q(**{f'{name}__gte': minimum})
+
+        return filters
+
+    def _filtered(self, exclude=None):
+        queryset = self.queryset
+        for name, condition in self.filters.items():
+            if name == exclude:
+                continue
+            # country and country_code narrow the same dimension
+            if exclude == 'country_code' and name == 'country':
+                continue
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def results(self):
+        return self._filtered()
+
+    def count(self):
+        return self._filtered().count()
+
+    def facets(self):
+        facets = {}
+        for dimension in FACET_DIMENSIONS:
+            queryset = self._filtered(exclude=dimension)
+            if dimension == 'price':
+                facets['price'] = self._price_facet(queryset)
+            else:
+                facets[dimension] = self._value_facet(queryset, dimension)
+        return facets
+
+    def _value_facet(self, queryset, field):
+        rows = queryset.order_by().values(field).annotate(count=Count('id')).order_by(field)
+        return [{'value': row[field], 'count': row['count']} for row in rows]
+
+    def _price_facet(self, queryset):
+        buckets = HOURLY_PRICE_BUCKETS if self.price_type == 'hourly' else NIGHTLY_PRICE_BUCKETS
+        aggregates = {}
+        for index, (label, low, high) in enumerate(buckets):
+            condition = Q(**{f'{self.price_field}__gte': low})
+            if high is not None:
+                condition &= Q(**{f'{self.price_field}__lt': high})
+            aggregates[f'bucket_{index}'] = Count('id', filter=condition)
+
+        counts = queryset.order_by().aggregate(**aggregates)
+        return {
+            'price_type': self.price_type,
+            'buckets': [
+                {'label': label, 'min': low, 'max': high, 'count': counts[f'bucket_{index}']}
+                for index, (label, low, high) in enumerate(buckets)
+            ],
+        }
@@ -5,6 +5,8 @@ from . import api
 
 urlpatterns = [
     path('', api.properties_list, name='api_properties_list'),
+    path('v2/', api.properties_list_v2, name='api_properties_list_v2'),
+    path('search/', api.properties_search, name='api_properties_search'),
     path('create/', api.create_property, name='api_create_property'),
     path('<uuid:pk>/', api.properties_detail, name='api_properties_detail'),
     # Property Images endpoints
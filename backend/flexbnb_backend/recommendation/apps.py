@@ -6,3 +6,8 @@ class RecommendationConfig(AppConfig):
     name = 'recommendation'
     verbose_name = 'AI Recommendations'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .trending import start_refresher
+        start_refresher()
@@ -0,0 +1,175 @@
+"""
+Per-user cache of ranked recommendations.
+
+A user's ranking (property ids with scores, plus the reasons and
+personalization score) only changes when they search, view, book or edit
+their preferences. It is cached under the user in the RECOMMENDATION_CACHE
+alias of Django's cache framework: local memory by default, Redis (or any
+shared backend) in production.
+
+Those writes bump a per-user generation (recommendation.signals) rather
+than deleting the entry. A read fetches the entry and the generation in one
+round trip:
+
+- same generation and younger than FRESH_FOR: served as is (hit)
+- otherwise, younger than MAX_AGE: served as is while one background
+  refresh recomputes it (stale)
+- otherwise, or no entry: computed before responding (miss)
+
+Hit, stale, miss and invalidation counts live in the cache too, so every
+process sharing it reports the same stats().
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+FRESH_FOR = getattr(settings, 'RECOMMENDATION_CACHE_FRESH_FOR', 600)
+MAX_AGE = getattr(settings, 'RECOMMENDATION_CACHE_MAX_AGE', 3600)
+# Ranked ids kept per user; requests for more are cut to this
+SIZE = getattr(settings, 'RECOMMENDATION_CACHE_SIZE', 100)
+
+COUNTERS = ('hits', 'stale', 'misses', 'invalidations')
+
+
+def _cache():
+    return caches[getattr(settings, 'RECOMMENDATION_CACHE', 'default')]
+
+
+def _entry_key(user_id):
+    return f'recs:ranking:{user_id}'
+
+
+def _generation_key(user_id):
+    return f'recs:generation:{user_id}'
+
+
+def _incr(key, timeout):
+    cache = _cache()
+    # add() seeds the key without overwriting one another process started
+    cache.add(key, 0, timeout=timeout)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, timeout=timeout)
+
+
+def _count(counter):
+    _incr(f'recs:stats:{counter}', None)
+
+
+def _store(user_id, generation, ranking):
+    entry = {
+        'generation': generation,
+        'computed_at': time.time(),
+        'ranking': {**ranking, 'ranked': ranking['ranked'][:SIZE]},
+    }
+    _cache().set(_entry_key(user_id), entry, timeout=MAX_AGE)
+    return entry
+
+
+_refreshes = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        user_id, compute = _refreshes.get()
+        try:
+            _refresh(user_id, compute)
+        except Exception:
+            logger.exception('Recommendation refresh failed for user %s', user_id)
+        finally:
+            _cache().delete(f'recs:refreshing:{user_id}')
+            close_old_connections()
+            _refreshes.task_done()
+
+
+def _start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='recommendation-cache', daemon=True)
+            _worker.start()
+
+
+def _refresh(user_id, compute):
+    # Read the generation before computing, so a write landing meanwhile
+    # leaves the new entry stale rather than wrongly fresh
+    generation = _cache().get(_generation_key(user_id), 0)
+    return _store(user_id, generation, compute())
+
+
+def _schedule_refresh(user_id, compute):
+    # One refresh per user at a time across every process sharing the cache
+    if not _cache().add(f'recs:refreshing:{user_id}', 1, timeout=60):
+        return
+    if getattr(settings, 'RECOMMENDATION_CACHE_ASYNC', True):
+        _start_worker()
+        _refreshes.put((user_id, compute))
+    else:
+        try:
+            _refresh(user_id, compute)
+        finally:
+            _cache().delete(f'recs:refreshing:{user_id}')
+
+
+def cached_ranking(user_id, compute):
+    """
+    The user's ranking from the cache, or from ``compute()`` (which returns
+    a dict with a 'ranked' list) when there is no usable entry.
+    """
+    values = _cache().get_many([_entry_key(user_id), _generation_key(user_id)])
+    entry = values.get(_entry_key(user_id))
+    generation = values.get(_generation_key(user_id), 0)
+
+    if entry is not None:
+        age = time.time() - entry['computed_at']
+        if entry['generation'] == generation and age < FRESH_FOR:
+            _count('hits')
+            return entry['ranking']
+        if age < MAX_AGE:
+            _count('stale')
+            _schedule_refresh(user_id, compute)
+            return entry['ranking']
+
+    _count('misses')
+    return _store(user_id, generation, compute())['ranking']
+
+
+def invalidate(user_id):
+    """Mark the user's cached ranking stale once the current transaction commits"""
+    def bump():
+        # Outlives every entry stored before it, so it can expire with them
+        _incr(_generation_key(user_id), MAX_AGE)
+        _count('invalidations')
+
+    transaction.on_commit(bump)
+
+
+def wait_for_refreshes():
+    """Block until queued refreshes have run (management commands, tests)"""
+    _refreshes.join()
+
+
+def stats():
+    counts = _cache().get_many([f'recs:stats:{counter}' for counter in COUNTERS])
+    counts = {counter: counts.get(f'recs:stats:{counter}', 0) for counter in COUNTERS}
+    served = counts['hits'] + counts['stale'] + counts['misses']
+    return {
+        **counts,
+        'hit_rate': round(counts['hits'] / served, 4) if served else 0.0,
+        # Stale entries are still answered from the cache
+        'served_from_cache': round((counts['hits'] + counts['stale']) / served, 4) if served else 0.0,
+        'fresh_for': FRESH_FOR,
+        'max_age': MAX_AGE,
+    }
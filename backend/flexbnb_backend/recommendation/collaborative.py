@@ -0,0 +1,238 @@
+"""
+Item-item collaborative filtering.
+
+Offline, every signed-in user's interactions are folded into one weight per
+(user, property): reservations, wishlist adds, started bookings, time spent
+on the listing, and the review left afterwards. The weights fill a sparse
+user x property matrix. Each property's neighbours are the properties with
+the highest cosine similarity between their user columns, shrunk towards
+zero when few users are behind it. Only the top NEIGHBORS are kept, one
+PropertyNeighbors row per property.
+
+Online, a user's recommendations are the neighbours of what they
+interacted with, each scored by similarity times the user's weight for
+the property it came from. That costs one query per signal plus one for
+the neighbour rows, with no matrix in memory.
+
+evaluate() measures recall@k offline. It holds out one interaction per
+user, rebuilds the model without it, and checks whether the held-out
+property makes the top k.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from scipy import sparse
+
+from booking.models import PropertyReview, Reservation
+
+from .models import PropertyNeighbors, PropertyView
+
+
+NEIGHBORS = getattr(settings, 'RECOMMENDATION_NEIGHBORS', 50)
+# Pairs co-interacted by n users keep n / (n + SHRINK) of their similarity
+SHRINK = getattr(settings, 'RECOMMENDATION_SHRINK', 10)
+
+# Interaction weights
+RESERVATION_WEIGHT = 3.0
+WISHLIST_WEIGHT = 2.0
+INITIATED_BOOKING_WEIGHT = 1.5
+VIEW_WEIGHT = 1.0  # reached after VIEW_SECONDS on the listing
+VIEW_SECONDS = 300
+REVIEW_WEIGHT = 1.0  # per star above (or below) 3
+
+BOOKED_STATUSES = ('pending', 'approved', 'completed')
+
+
+def interactions(user=None):
+    """
+    {(user id, property id): weight} from reservations, property views and
+    reviews, one grouped query each. Pairs that net to nothing are dropped.
+    """
+    reservations = Reservation.objects.filter(status__in=BOOKED_STATUSES)
+    views = PropertyView.objects.filter(user__isnull=False)
+    reviews = PropertyReview.objects.all()
+    if user is not None:
+        reservations = reservations.filter(guest=user)
+        views = views.filter(user=user)
+        reviews = reviews.filter(guest=user)
+
+    weights = defaultdict(float)
+    for user_id, property_id in reservations.values_list('guest_id', 'property_id').order_by().distinct():
+        weights[user_id, property_id] += RESERVATION_WEIGHT
+
+    views = views.values_list('user_id', 'property_id').annotate(
+        wishlisted=Count('id', filter=Q(added_to_wishlist=True)),
+        initiated=Count('id', filter=Q(initiated_booking=True)),
+        seconds=Sum('view_duration'),
+    ).order_by()
+    for user_id, property_id, wishlisted, initiated, seconds in views:
+        weights[user_id, property_id] += (
+            WISHLIST_WEIGHT * bool(wishlisted)
+            + INITIATED_BOOKING_WEIGHT * bool(initiated)
+            + VIEW_WEIGHT * min(seconds or 0, VIEW_SECONDS) / VIEW_SECONDS
+        )
+
+    reviews = reviews.values_list('guest_id', 'property_id').annotate(rating=Avg('rating')).order_by()
+    for user_id, property_id, rating in reviews:
+        weights[user_id, property_id] += REVIEW_WEIGHT * (rating - 3)
+
+    return {pair: weight for pair, weight in weights.items() if weight > 0}
+
+
+def interaction_matrix():
+    """(user x property CSR matrix of weights, user ids, property ids) with ids in row/column order"""
+    weights = interactions()
+    user_ids = sorted({user_id for user_id, _ in weights})
+    property_ids = sorted({property_id for _, property_id in weights})
+    user_row = {user_id: i for i, user_id in enumerate(user_ids)}
+    property_col = {property_id: i for i, property_id in enumerate(property_ids)}
+
+    rows = np.fromiter((user_row[user_id] for user_id, _ in weights), dtype=np.int32, count=len(weights))
+    cols = np.fromiter((property_col[property_id] for _, property_id in weights), dtype=np.int32, count=len(weights))
+    data = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+    matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(user_ids), len(property_ids)))
+    return matrix, user_ids, property_ids
+
+
+def _top_k(similarities, k):
+    """Keep each row's ``k`` largest entries, largest first"""
+    indptr = np.zeros(similarities.shape[0] + 1, dtype=np.int64)
+    indices, data = [], []
+    for row in range(similarities.shape[0]):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        row_data = similarities.data[start:end]
+        keep = np.argpartition(-row_data, k - 1)[:k] if end - start > k else np.arange(end - start)
+        keep = keep[np.argsort(-row_data[keep], kind='stable')]
+        indices.append(similarities.indices[start:end][keep])
+        data.append(row_data[keep])
+        indptr[row + 1] = indptr[row] + len(keep)
+    return sparse.csr_matrix(
+        (np.concatenate(data) if data else np.empty(0, np.float32),
+         np.concatenate(indices) if indices else np.empty(0, np.int32),
+         indptr),
+        shape=similarities.shape,
+    )
+
+
+def neighbor_matrix(matrix, neighbors=NEIGHBORS, shrink=SHRINK):
+    """Property x property CSR matrix of each property's top ``neighbors`` shrunk cosine similarities"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = matrix @ sparse.diags(1 / norms)
+    similarities = (normalized.T @ normalized).tocsr()
+
+    if shrink:
+        occurrences = (matrix > 0).astype(np.float32)
+        co_users = (occurrences.T @ occurrences).tocsr()
+        co_users.data = co_users.data / (co_users.data + shrink)
+        similarities = similarities.multiply(co_users).tocsr()
+
+    similarities.setdiag(0)
+    similarities.eliminate_zeros()
+    return _top_k(similarities, neighbors)
+
+
+@transaction.atomic
+def rebuild_neighbors(neighbors=NEIGHBORS, shrink=SHRINK):
+    """Rebuild every PropertyNeighbors row from current interactions. Returns how many were written"""
+    matrix, _, property_ids = interaction_matrix()
+    top = neighbor_matrix(matrix, neighbors, shrink)
+    computed_at = timezone.now()
+    rows = []
+    for col, property_id in enumerate(property_ids):
+        start, end = top.indptr[col], top.indptr[col + 1]
+        if start == end:
+            continue
+        rows.append(PropertyNeighbors(
+            property_id=property_id,
+            neighbors=[
+                [str(property_ids[neighbor]), round(float(similarity), 4)]
+                for neighbor, similarity in zip(top.indices[start:end], top.data[start:end])
+            ],
+            computed_at=computed_at,
+        ))
+    PropertyNeighbors.objects.all().delete()
+    PropertyNeighbors.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def recommend(user, limit=10):
+    """[(property id, score)] best first, never a property the user already interacted with"""
+    weights = {str(property_id): weight for (_, property_id), weight in interactions(user).items()}
+    if not weights:
+        return []
+
+    scores = defaultdict(float)
+    for property_id, neighbors in PropertyNeighbors.objects.filter(property_id__in=weights).values_list(
+        'property_id', 'neighbors',
+    ):
+        weight = weights[str(property_id)]
+        for neighbor_id, similarity in neighbors:
+            scores[neighbor_id] += weight * similarity
+
+    ranked = sorted(
+        ((property_id, score) for property_id, score in scores.items() if property_id not in weights),
+        key=lambda pair: pair[1],
+        reverse=True,
+    )
+    return ranked[:limit]
+
+
+def _hits(scores, held_out, k):
+    """Rows whose held-out column is among their ``k`` best positive scores"""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    in_top = (top == held_out[:, None]).any(axis=1)
+    return int((in_top & (scores[np.arange(len(held_out)), held_out] > 0)).sum())
+
+
+def evaluate(ks=(10,), neighbors=NEIGHBORS, shrink=SHRINK, max_users=None, seed=42, chunk_size=256):
+    """
+    Leave-one-out recall@k for each k in ``ks``: one random interaction is
+    held out for every user with at least two, the model is rebuilt without
+    them, and a hit is the held-out property ranking in the user's top k.
+    Returns {'users', 'properties', 'recall': {k: r}, 'popularity_recall': {k: r}};
+    the popularity baseline recommends the most interacted-with properties.
+    """
+    matrix, _, property_ids = interaction_matrix()
+    rng = np.random.default_rng(seed)
+    users = np.flatnonzero(np.diff(matrix.indptr) >= 2)
+    if max_users and len(users) > max_users:
+        users = np.sort(rng.choice(users, max_users, replace=False))
+
+    train = matrix.copy()
+    held_out = np.empty(len(users), dtype=np.int64)
+    for n, user in enumerate(users):
+        position = rng.integers(train.indptr[user], train.indptr[user + 1])
+        held_out[n] = train.indices[position]
+        train.data[position] = 0
+    train.eliminate_zeros()
+
+    top = neighbor_matrix(train, neighbors, shrink)
+    popularity = np.diff(train.tocsc().indptr).astype(np.float32)
+    hits = {k: 0 for k in ks}
+    popularity_hits = {k: 0 for k in ks}
+    for start in range(0, len(users), chunk_size):
+        rows = train[users[start:start + chunk_size]]
+        held = held_out[start:start + chunk_size]
+        seen = rows.nonzero()
+
+        scores = (rows @ top).toarray()
+        scores[seen] = -np.inf
+        baseline = np.tile(popularity, (len(held), 1))
+        baseline[seen] = -np.inf
+        for k in ks:
+            hits[k] += _hits(scores, held, k)
+            popularity_hits[k] += _hits(baseline, held, k)
+
+    total = max(len(users), 1)
+    return {
+        'users': len(users),
+        'properties': len(property_ids),
+        'recall': {k: hits[k] / total for k in ks},
+        'popularity_recall': {k: popularity_hits[k] / total for k in ks},
+    }
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recommendation.collaborative import NEIGHBORS, SHRINK, evaluate
+
+
+class Command(BaseCommand):
+    help = (
+        'Offline leave-one-out recall@k of the item-item model against a popularity '
+        'baseline, on current interactions. Nothing is written.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, nargs='+', default=[5, 10, 20])
+        parser.add_argument('--neighbors', type=int, default=NEIGHBORS)
+        parser.add_argument('--shrink', type=float, default=SHRINK)
+        parser.add_argument('--users', type=int, help='Evaluate a random sample of this many users')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        result = evaluate(
+            options['k'], options['neighbors'], options['shrink'], max_users=options['users'], seed=options['seed'],
+        )
+        self.stdout.write(f"{result['users']} users with a held-out interaction, {result['properties']} properties")
+        self.stdout.write(f"{'k':>4}{'item-item':>12}{'popularity':>12}")
+        for k in options['k']:
+            self.stdout.write(f"{k:>4}{result['recall'][k]:>12.3f}{result['popularity_recall'][k]:>12.3f}")
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recommendation.matching import Catalog, generate_matches
+from useraccount.models import User
+
+
+class Command(BaseCommand):
+    help = 'Regenerate guest-property matches for many users against one snapshot of the catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='emails', metavar='EMAIL', help='Only this user (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=200, help='Users written per transaction')
+
+    def handle(self, *args, **options):
+        if options['emails']:
+            users = User.objects.filter(email__in=options['emails'])
+        else:
+            # Everyone who set preferences or already has matches
+            users = User.objects.filter(Q(preference__isnull=False) | Q(property_matches__isnull=False)).distinct()
+        user_ids = list(users.order_by().values_list('id', flat=True))
+
+        started = time.perf_counter()
+        catalog = Catalog()
+        written = 0
+        for start in range(0, len(user_ids), options['batch_size']):
+            written += generate_matches(user_ids[start:start + options['batch_size']], catalog)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} match(es) for {len(user_ids)} user(s) across {len(catalog)} properties '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
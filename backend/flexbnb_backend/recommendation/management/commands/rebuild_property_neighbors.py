@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendation.collaborative import NEIGHBORS, SHRINK, rebuild_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the item-item neighbour table used for collaborative recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbors', type=int, default=NEIGHBORS, help='Neighbours stored per property')
+        parser.add_argument('--shrink', type=float, default=SHRINK)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_neighbors(options['neighbors'], options['shrink'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt neighbours for {count} properties in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recommendation.trending import SIZE, rebuild_activity, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute the trending property list from the hourly activity buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=SIZE, help='Properties kept in the list')
+        parser.add_argument('--rebuild', action='store_true', help='Re-aggregate the buckets from views, reservations and reviews first')
+        parser.add_argument('--every', type=int, help='Keep running, refreshing every this many seconds')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f'Rebuilt {rebuild_activity()} activity bucket(s)')
+        while True:
+            started = time.perf_counter()
+            count = refresh_trending(size=options['size'])
+            self.stdout.write(f'Ranked {count} trending properties in {time.perf_counter() - started:.1f}s')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
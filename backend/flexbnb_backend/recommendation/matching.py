@@ -0,0 +1,176 @@
+"""
+Guest preference matching.
+
+Every property is scored against a user's preferences on category, price,
+location, capacity (amenities) and budget style, with a boost for highly
+rated properties; those scoring MIN_SCORE or more become GuestMatch rows.
+
+A Catalog is a columnar snapshot of the properties and their average
+ratings, loaded in two queries and shared by every user in a job, so each
+user is scored with a handful of array operations over the whole catalog.
+Matches are written with one upsert per batch, which keeps each row's id,
+created_at and viewed/dismissed flags; a user's matches that no longer
+qualify are deleted.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+
+from booking.models import PropertyReview
+from property.models import Property, primary_image_prefetch
+
+from .models import GuestMatch, UserPreference
+
+
+MIN_SCORE = 50
+MATCH_TTL = timedelta(days=7)
+HIGHLY_RATED = 4.5
+RATING_BOOST = 10
+
+WEIGHTS = {
+    'category': 0.25,
+    'price': 0.25,
+    'location': 0.20,
+    'amenities': 0.15,
+    'style': 0.15,
+}
+
+# Nightly price range for each budget preference
+BUDGET_PRICE_RANGES = {
+    'budget': (0, 100),
+    'moderate': (50, 200),
+    'luxury': (150, 10000),
+    'any': (0, 10000),
+}
+
+SCORE_FIELDS = ['overall_match_score', 'category_match', 'price_match', 'location_match', 'amenities_match', 'style_match']
+
+
+class Catalog:
+    """Every property's matchable fields and average rating as aligned arrays"""
+
+    def __init__(self):
+        rows = list(Property.objects.order_by().values_list(
+            'id', 'category', 'country', 'price_per_night', 'guests', 'bedrooms',
+        ))
+        ratings = dict(PropertyReview.objects.order_by().values_list('property_id').annotate(avg=Avg('rating')))
+
+        self.ids = [row[0] for row in rows]
+        self.category = np.array([row[1] for row in rows], dtype=object)
+        self.country = np.array([row[2] for row in rows], dtype=object)
+        self.price = np.array([row[3] for row in rows], dtype=np.float64)
+        self.guests = np.array([row[4] for row in rows], dtype=np.int64)
+        self.bedrooms = np.array([row[5] for row in rows], dtype=np.int64)
+        self.rating = np.array([ratings.get(property_id) or 0 for property_id in self.ids], dtype=np.float64)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _preferred(values, preferred, hit, miss):
+    if not preferred:
+        return np.full(len(values), 70.0)  # Neutral
+    return np.where(np.isin(values, list(preferred)), float(hit), float(miss))
+
+
+def score(catalog, preference):
+    """{'category', 'price', 'location', 'amenities', 'style', 'overall'}: 0-100 arrays aligned with the catalog"""
+    scores = {
+        'category': _preferred(catalog.category, preference.preferred_categories, 100, 30),
+        'location': _preferred(catalog.country, preference.preferred_countries, 100, 40),
+    }
+
+    max_price = preference.max_price_per_night
+    if max_price:
+        # Cheaper is better
+        scores['price'] = np.where(catalog.price <= max_price, 100 - catalog.price / max_price * 30, 20.0)
+    else:
+        scores['price'] = np.full(len(catalog), 70.0)
+
+    group = np.where(catalog.guests >= preference.typical_group_size, 50.0, 0.0)
+    scores['amenities'] = np.where(catalog.bedrooms >= preference.min_bedrooms, group + 50, np.maximum(0, group - 20))
+
+    low, high = BUDGET_PRICE_RANGES.get(preference.budget_preference, (0, 10000))
+    scores['style'] = np.where((catalog.price >= low) & (catalog.price <= high), 100.0, 50.0)
+
+    overall = sum(scores[key] * weight for key, weight in WEIGHTS.items())
+    scores['overall'] = np.where(catalog.rating >= HIGHLY_RATED, np.minimum(100, overall + RATING_BOOST), overall)
+    return scores
+
+
+def reasons(catalog, i, preference):
+    """Why property ``i`` of the catalog suits the user, in the order the scores are built"""
+    result = []
+    price = int(catalog.price[i])
+    if preference.preferred_categories and catalog.category[i] in preference.preferred_categories:
+        result.append(f"Matches your preferred category: {catalog.category[i]}")
+    if preference.max_price_per_night and price <= preference.max_price_per_night:
+        result.append(f"Within your budget (${price}/night)")
+    if preference.preferred_countries and catalog.country[i] in preference.preferred_countries:
+        result.append(f"Located in {catalog.country[i]} - one of your favorites")
+    if catalog.guests[i] >= preference.typical_group_size:
+        result.append(f"Perfect for your group size ({catalog.guests[i]} guests)")
+    low, high = BUDGET_PRICE_RANGES.get(preference.budget_preference, (0, 10000))
+    if low <= price <= high:
+        if preference.budget_preference == 'luxury' and price > 200:
+            result.append("Premium luxury property")
+        elif preference.budget_preference == 'budget':
+            result.append("Great value for money")
+    if catalog.rating[i] >= HIGHLY_RATED:
+        result.append(f"Highly rated ({catalog.rating[i]:.1f}⭐)")
+    return result
+
+
+def _matches(catalog, preference, expires_at):
+    scores = score(catalog, preference)
+    for i in np.flatnonzero(scores['overall'] >= MIN_SCORE):
+        yield GuestMatch(
+            user_id=preference.user_id,
+            property_id=catalog.ids[i],
+            overall_match_score=float(scores['overall'][i]),
+            category_match=float(scores['category'][i]),
+            price_match=float(scores['price'][i]),
+            location_match=float(scores['location'][i]),
+            amenities_match=float(scores['amenities'][i]),
+            style_match=float(scores['style'][i]),
+            match_reasons=reasons(catalog, i, preference),
+            expires_at=expires_at,
+        )
+
+
+def generate_matches(user_ids, catalog=None, batch_size=1000):
+    """
+    Rescore and store the matches of every user in ``user_ids``. Users
+    without saved preferences are scored on the defaults. Returns how many
+    matches were written.
+    """
+    catalog = catalog if catalog is not None else Catalog()
+    user_ids = list(user_ids)
+    preferences = {preference.user_id: preference for preference in UserPreference.objects.filter(user_id__in=user_ids)}
+    expires_at = timezone.now() + MATCH_TTL
+
+    written = 0
+    with transaction.atomic():
+        for user_id in user_ids:
+            preference = preferences.get(user_id) or UserPreference(user_id=user_id)
+            matches = list(_matches(catalog, preference, expires_at))
+            GuestMatch.objects.bulk_create(
+                matches,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['user', 'property'],
+                update_fields=SCORE_FIELDS + ['match_reasons', 'expires_at'],
+            )
+            written += len(matches)
+        # Every match still qualifying was just given this expiry
+        GuestMatch.objects.filter(user_id__in=user_ids, expires_at__lt=expires_at).delete()
+    return written
+
+
+def top_matches(user, limit=10):
+    return GuestMatch.objects.filter(user=user, is_dismissed=False, expires_at__gt=timezone.now()).select_related(
+        'property',
+    ).prefetch_related(primary_image_prefetch('property__images')).order_by('-overall_match_score')[:limit]
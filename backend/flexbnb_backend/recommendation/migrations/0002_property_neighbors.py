@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0006_search_indexes'),
+        ('recommendation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyNeighbors',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='neighbors', serialize=False, to='property.property')),
+                ('neighbors', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
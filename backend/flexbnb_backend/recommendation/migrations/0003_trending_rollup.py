@@ -0,0 +1,74 @@
+# Generated by Django 5.1.5 on 2026-10-17 00:05
+
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+
+def backfill_activity(apps, schema_editor):
+    """Bucket the last week of views, reservations and reviews by property and hour"""
+    PropertyActivity = apps.get_model('recommendation', 'PropertyActivity')
+    since = timezone.now() - timedelta(days=7)
+
+    def hourly(model, **aggregates):
+        return apps.get_model(*model.split('.')).objects.filter(created_at__gte=since).order_by().values_list(
+            'property_id', TruncHour('created_at', tzinfo=dt_timezone.utc),
+        ).annotate(**aggregates)
+
+    buckets = defaultdict(dict)
+    for property_id, bucket, n in hourly('recommendation.PropertyView', n=Count('id')):
+        buckets[property_id, bucket]['views'] = n
+    for property_id, bucket, n in hourly('booking.Reservation', n=Count('id')):
+        buckets[property_id, bucket]['bookings'] = n
+    for property_id, bucket, total, n in hourly('booking.PropertyReview', total=Sum('rating'), n=Count('id')):
+        buckets[property_id, bucket].update(rating_sum=total, ratings=n)
+    PropertyActivity.objects.bulk_create(
+        [PropertyActivity(property_id=property_id, bucket=bucket, **counts) for (property_id, bucket), counts in buckets.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_hostdashboardstats'),
+        ('property', '0006_search_indexes'),
+        ('recommendation', '0002_property_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingProperty',
+            fields=[
+                ('rank', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='property.property')),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('ratings', models.PositiveIntegerField(default=0)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='property.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='property_activity_bucket_idx')],
+                'unique_together': {('property', 'bucket')},
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
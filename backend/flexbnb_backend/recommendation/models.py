@@ -103,6 +103,59 @@ class PropertyView(models.Model):
         ordering = ['-created_at']
 
 
+class PropertyNeighbors(models.Model):
+    """
+    A property's most similar properties by who interacted with both, built
+    offline by recommendation.collaborative.rebuild_neighbors.
+    """
+    property = models.OneToOneField(Property, related_name='neighbors', on_delete=models.CASCADE, primary_key=True)
+    
+    neighbors = models.JSONField(default=list)  # [[property id, similarity], ...] most similar first
+    
+    computed_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Neighbors of {self.property_id}"
+
+
+class PropertyActivity(models.Model):
+    """
+    Views, bookings and review ratings a property received in one hour,
+    bumped as they are written (recommendation.trending)
+    """
+    property = models.ForeignKey(Property, related_name='activity', on_delete=models.CASCADE)
+    bucket = models.DateTimeField()  # start of the hour
+
+    views = models.PositiveIntegerField(default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    ratings = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['property', 'bucket']
+        indexes = [
+            models.Index(fields=['bucket'], name='property_activity_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} @ {self.bucket:%Y-%m-%d %H:00}"
+
+
+class TrendingProperty(models.Model):
+    """The current trending list, best first; rebuilt whole by recommendation.trending.refresh_trending"""
+    rank = models.PositiveIntegerField(primary_key=True)
+    property = models.ForeignKey(Property, related_name='+', on_delete=models.CASCADE)
+
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"#{self.rank}: {self.property_id}"
+
+
 class PriceTrend(models.Model):
     """Historical price data for dynamic pricing insights"""
     
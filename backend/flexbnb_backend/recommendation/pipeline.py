@@ -0,0 +1,269 @@
+"""
+Personalized recommendation pipeline.
+
+candidates -> rank -> hydrate:
+
+- every strategy (preferences, collaborative filtering, search history, or
+  trending for anonymous visitors) returns {property id: score in 0..1}
+  from id-only queries, plus the reasons it applies
+- the union is ranked by the weighted sum of each property's strategy
+  scores, so a property several strategies agree on rises
+- only the top ``limit`` ids are loaded, in one query with their primary
+  images prefetched, and serialized
+
+Signed-in users' rankings are cached per user (recommendation.cache), so a
+cache hit only runs the hydrate stage. Each stage is timed into a
+StageTimer; the view reports the timings in a Server-Timing header.
+"""
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Avg, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from booking.models import Reservation
+from property.models import Property, primary_image_prefetch
+from property.serializers import PropertiesListSerializer
+from useraccount.models import User
+
+from .cache import cached_ranking
+from .collaborative import recommend
+from .models import PropertyView, SearchHistory, UserPreference
+from .trending import trending
+
+
+logger = logging.getLogger(__name__)
+
+# Candidates each strategy contributes before ranking
+CANDIDATES = 50
+
+STRATEGY_WEIGHTS = {
+    'content': 1.0,
+    'collaborative': 1.0,
+    'history': 0.8,
+    'trending': 1.0,
+}
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (time.perf_counter() - started) * 1000
+
+    def header(self):
+        """Server-Timing header value"""
+        return ', '.join(f'{name};dur={ms:.1f}' for name, ms in self.timings.items())
+
+
+def _ranked_scores(ids):
+    """Scores falling linearly with position, for strategies that only order"""
+    return {property_id: 1 - i / len(ids) for i, property_id in enumerate(ids)}
+
+
+def content_candidates(preference):
+    """Top-rated properties matching the user's explicit preferences"""
+    properties = Property.objects.all()
+    reasons = []
+
+    if preference.preferred_categories:
+        properties = properties.filter(category__in=preference.preferred_categories)
+        reasons.append("Matches your preferred categories")
+    if preference.preferred_countries:
+        properties = properties.filter(country__in=preference.preferred_countries)
+        reasons.append("In your favorite destinations")
+    if preference.max_price_per_night:
+        properties = properties.filter(price_per_night__lte=preference.max_price_per_night)
+        reasons.append("Within your budget")
+    if preference.min_bedrooms:
+        properties = properties.filter(bedrooms__gte=preference.min_bedrooms)
+    if preference.typical_group_size:
+        properties = properties.filter(guests__gte=preference.typical_group_size)
+
+    rated = properties.annotate(avg_rating=Avg('reviews__rating')).order_by(
+        Coalesce('avg_rating', 0.0).desc(),
+    ).values_list('id', 'avg_rating')[:CANDIDATES]
+    # Matching the preferences is worth half; the rating decides the rest
+    return {property_id: 0.5 + 0.1 * (rating or 0) for property_id, rating in rated}, reasons
+
+
+def collaborative_candidates(user):
+    """Neighbours of what the user booked, saved or reviewed well (recommendation.collaborative)"""
+    ranked = recommend(user, CANDIDATES)
+    if not ranked:
+        return {}, []
+    best = ranked[0][1]
+    return {property_id: score / best for property_id, score in ranked}, ["Popular among travelers like you"]
+
+
+def history_candidates(user):
+    """Properties in the location and category the user searches for most, and ones they viewed but didn't book"""
+    recent = list(
+        SearchHistory.objects.filter(user=user).order_by('-created_at').values_list('location', 'category')[:10]
+    )
+    locations = [location for location, _ in recent if location]
+    categories = [category for _, category in recent if category]
+
+    properties = Property.objects.order_by()
+    reasons = []
+    if locations:
+        location = max(set(locations), key=locations.count)
+        properties = properties.filter(country__icontains=location)
+        reasons.append(f"Based on your searches in {location}")
+    if categories:
+        category = max(set(categories), key=categories.count)
+        properties = properties.filter(category=category)
+        reasons.append(f"Based on your interest in {category}")
+
+    # Without any searches these are only filler
+    score = 1.0 if reasons else 0.1
+    scores = {property_id: score for property_id in properties.values_list('id', flat=True)[:CANDIDATES]}
+
+    viewed = PropertyView.objects.filter(user=user, completed_booking=False).order_by('-created_at').values_list(
+        'property_id', flat=True,
+    )[:CANDIDATES]
+    viewed = list(dict.fromkeys(viewed))
+    if viewed:
+        reasons.append("Properties you viewed but haven't booked")
+        # Most recently viewed first
+        for property_id, viewed_score in _ranked_scores(viewed).items():
+            scores[property_id] = max(scores.get(property_id, 0), viewed_score)
+    return scores, reasons
+
+
+def trending_candidates():
+    """The precomputed trending list (recommendation.trending)"""
+    ranked = trending(CANDIDATES)
+    best = ranked[0][1] if ranked else 0
+    if not best:
+        # Only quiet properties, which carry no score of their own
+        return _ranked_scores([property_id for property_id, _ in ranked]), ['Popular among travelers']
+    return {property_id: score / best for property_id, score in ranked}, ['Trending this week', 'Popular among travelers']
+
+
+def _count(queryset, user_field):
+    counts = queryset.filter(**{user_field: OuterRef('pk')}).order_by().values(user_field).annotate(n=Count('pk'))
+    return Coalesce(Subquery(counts.values('n')[:1]), 0)
+
+
+def personalization_score(user, preference):
+    """How much the recommendations can be personalized (0-100), from one counting query"""
+    if not user:
+        return 0
+    searches, views, bookings = User.objects.filter(pk=user.pk).annotate(
+        searches=_count(SearchHistory.objects.all(), 'user'),
+        views=_count(PropertyView.objects.all(), 'user'),
+        bookings=_count(Reservation.objects.all(), 'guest'),
+    ).values_list('searches', 'views', 'bookings').get()
+
+    score = 30 if preference else 0
+    score += min(20, searches * 2)
+    score += min(25, views * 2.5)
+    score += min(25, bookings * 5)
+    return min(100, score)
+
+
+def rank(candidates):
+    """
+    [(property id, score)] best first from {strategy: {property id: score}}.
+    Scores are out of what the strategies that ran could give together (0..1).
+    """
+    possible = sum(STRATEGY_WEIGHTS[strategy] for strategy in candidates) or 1
+    totals = defaultdict(float)
+    for strategy, scores in candidates.items():
+        weight = STRATEGY_WEIGHTS[strategy] / possible
+        for property_id, score in scores.items():
+            totals[str(property_id)] += weight * score
+    return sorted(totals.items(), key=lambda pair: pair[1], reverse=True)
+
+
+def hydrate(ranked):
+    """Serialized properties for ``ranked`` in order, each with its recommendation_score (0-100)"""
+    properties = {
+        str(prop.id): prop
+        for prop in Property.objects.filter(id__in=[property_id for property_id, _ in ranked]).prefetch_related(
+            primary_image_prefetch(),
+        )
+    }
+    results = []
+    for property_id, score in ranked:
+        if property_id not in properties:
+            continue
+        data = PropertiesListSerializer(properties[property_id]).data
+        data['recommendation_score'] = round(score * 100, 1)
+        results.append(data)
+    return results
+
+
+def compute_ranking(user, timer):
+    """
+    Every candidate for ``user`` (None for an anonymous visitor), ranked:
+    {'ranked': [(property id, score)], 'reasons', 'personalization_score'}
+    """
+    candidates = {}
+    reasons = []
+    preference = None
+
+    if user:
+        with timer.stage('preferences'):
+            preference = UserPreference.objects.filter(user=user).first()
+        strategies = [
+            ('collaborative', lambda: collaborative_candidates(user)),
+            ('history', lambda: history_candidates(user)),
+        ]
+        if preference:
+            strategies.insert(0, ('content', lambda: content_candidates(preference)))
+    else:
+        strategies = [('trending', trending_candidates)]
+
+    for name, strategy in strategies:
+        with timer.stage(name):
+            candidates[name], strategy_reasons = strategy()
+        if candidates[name]:
+            reasons.extend(strategy_reasons)
+
+    with timer.stage('rank'):
+        ranked = rank(candidates)
+    with timer.stage('personalization'):
+        score = personalization_score(user, preference)
+
+    return {
+        'ranked': ranked,
+        'total_count': len(ranked),
+        'reasons': list(dict.fromkeys(reasons))[:5],
+        'personalization_score': score,
+    }
+
+
+def personalized_recommendations(user, limit=10, timer=None):
+    """
+    {'recommendations', 'recommendation_type', 'total_count', 'reasons',
+    'personalization_score'} for ``user`` (None for an anonymous visitor).
+    Signed-in users' rankings come from recommendation.cache.
+    """
+    timer = timer or StageTimer()
+    if user:
+        with timer.stage('cache'):
+            ranking = cached_ranking(user.pk, lambda: compute_ranking(user, StageTimer()))
+    else:
+        ranking = compute_ranking(None, timer)
+
+    with timer.stage('hydrate'):
+        recommendations = hydrate(ranking['ranked'][:limit])
+
+    logger.debug('Recommendation stages (ms): %s', timer.timings)
+    return {
+        'recommendations': recommendations,
+        'recommendation_type': 'personalized' if user else 'trending',
+        'total_count': ranking['total_count'],
+        'reasons': ranking['reasons'],
+        'personalization_score': ranking['personalization_score'],
+    }
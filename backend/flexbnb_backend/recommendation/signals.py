@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from booking.models import PropertyReview, Reservation
+
+from .cache import invalidate
+from .models import PropertyView, SearchHistory, UserPreference
+from .trending import bump
+
+
+@receiver(post_save, sender=SearchHistory)
+@receiver(post_delete, sender=SearchHistory)
+@receiver(post_save, sender=PropertyView)
+@receiver(post_delete, sender=PropertyView)
+@receiver(post_save, sender=UserPreference)
+@receiver(post_delete, sender=UserPreference)
+def invalidate_user_recommendations(sender, instance, **kwargs):
+    """Anything the user's ranking reads changed; anonymous activity has no cache entry"""
+    if instance.user_id:
+        invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Reservation)
+@receiver(post_delete, sender=Reservation)
+def invalidate_guest_recommendations(sender, instance, **kwargs):
+    invalidate(instance.guest_id)
+
+
+@receiver(post_save, sender=PropertyView)
+def count_trending_view(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.property_id, instance.created_at, views=1)
+
+
+@receiver(post_save, sender=Reservation)
+def count_trending_booking(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.property_id, instance.created_at, bookings=1)
+
+
+@receiver(post_save, sender=PropertyReview)
+def count_trending_rating(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.property_id, instance.created_at, rating=instance.rating)
@@ -0,0 +1,184 @@
+"""
+Trending properties.
+
+Every view, booking and review bumps its property's PropertyActivity row
+for the hour it happened in (recommendation.signals), so a week of activity
+is a few small rows per property rather than a join over the raw tables.
+
+refresh_trending() turns the last WINDOW of buckets into a decayed score,
+
+    sum over buckets of 0.5 ** (age in hours / HALF_LIFE)
+        * (BOOKING_WEIGHT * bookings + VIEW_WEIGHT * views)
+    + RATING_WEIGHT * the average rating, decayed the same way
+
+and stores the best SIZE as TrendingProperty rows, topped up with the
+best-rated quiet properties. Reading trending is then one primary key range
+scan. Run it hourly from cron with ``manage.py refresh_trending``, as its own
+process with ``--every``, or in-process by setting
+RECOMMENDATION_TRENDING_INTERVAL (seconds).
+
+rebuild_activity() re-aggregates the window from the raw tables, for rows
+written without signals (bulk_create, imports) or deleted since.
+"""
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, F, Sum
+from django.db.models.functions import Coalesce, TruncHour
+from django.utils import timezone
+
+from booking.models import PropertyReview, Reservation
+from property.models import Property
+
+from .models import PropertyActivity, PropertyView, TrendingProperty
+
+
+logger = logging.getLogger(__name__)
+
+WINDOW = timedelta(days=7)
+HALF_LIFE = getattr(settings, 'RECOMMENDATION_TRENDING_HALF_LIFE', 24)  # hours
+SIZE = getattr(settings, 'RECOMMENDATION_TRENDING_SIZE', 100)
+
+BOOKING_WEIGHT = 10.0
+VIEW_WEIGHT = 1.0
+RATING_WEIGHT = 1.0  # per star of the average rating
+
+
+def bucket_of(moment):
+    return moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def bump(property_id, moment=None, views=0, bookings=0, rating=None):
+    """Add activity to the property's bucket for ``moment`` (default now)"""
+    bucket = bucket_of(moment or timezone.now())
+    counts = {'views': views, 'bookings': bookings, 'rating_sum': rating or 0, 'ratings': int(rating is not None)}
+    changes = {field: F(field) + n for field, n in counts.items() if n}
+    if not changes:
+        return
+    if not PropertyActivity.objects.filter(property_id=property_id, bucket=bucket).update(**changes):
+        # First activity this hour: open the bucket, then bump it like any other
+        PropertyActivity.objects.get_or_create(property_id=property_id, bucket=bucket)
+        bump(property_id, moment, views, bookings, rating)
+
+
+def _hourly(queryset, since, **aggregates):
+    return queryset.filter(created_at__gte=since).order_by().values_list(
+        'property_id', TruncHour('created_at', tzinfo=dt_timezone.utc),
+    ).annotate(**aggregates)
+
+
+@transaction.atomic
+def rebuild_activity(now=None):
+    """
+    Replace the last WINDOW of buckets with counts re-aggregated from views,
+    reservations and reviews. Returns how many buckets were written. Bumps
+    committed while it runs can be lost, so run it when writes are quiet.
+    """
+    now = now or timezone.now()
+    since = bucket_of(now - WINDOW)
+    buckets = defaultdict(lambda: PropertyActivity())
+
+    for property_id, bucket, n in _hourly(PropertyView.objects.all(), since, n=Count('id')):
+        buckets[property_id, bucket].views = n
+    for property_id, bucket, n in _hourly(Reservation.objects.all(), since, n=Count('id')):
+        buckets[property_id, bucket].bookings = n
+    for property_id, bucket, total, n in _hourly(PropertyReview.objects.all(), since, total=Sum('rating'), n=Count('id')):
+        buckets[property_id, bucket].rating_sum = total
+        buckets[property_id, bucket].ratings = n
+
+    for (property_id, bucket), activity in buckets.items():
+        activity.property_id = property_id
+        activity.bucket = bucket
+    PropertyActivity.objects.filter(bucket__gte=since).delete()
+    PropertyActivity.objects.bulk_create(buckets.values(), batch_size=2000)
+    return len(buckets)
+
+
+def compute_trending(now=None, size=SIZE):
+    """[(property id, score)] best first from the buckets of the last WINDOW"""
+    now = now or timezone.now()
+    activity = defaultdict(float)
+    rating_sums = defaultdict(float)
+    ratings = defaultdict(float)
+    for property_id, bucket, views, bookings, rating_sum, n in PropertyActivity.objects.filter(
+        bucket__gte=now - WINDOW,
+    ).values_list('property_id', 'bucket', 'views', 'bookings', 'rating_sum', 'ratings').iterator(chunk_size=5000):
+        decay = 0.5 ** ((now - bucket).total_seconds() / 3600 / HALF_LIFE)
+        activity[property_id] += decay * (BOOKING_WEIGHT * bookings + VIEW_WEIGHT * views)
+        rating_sums[property_id] += decay * rating_sum
+        ratings[property_id] += decay * n
+
+    scores = {
+        property_id: score + (RATING_WEIGHT * rating_sums[property_id] / ratings[property_id] if ratings[property_id] else 0)
+        for property_id, score in activity.items()
+    }
+    ranked = heapq.nlargest(size, scores.items(), key=itemgetter(1))
+    if len(ranked) < size:
+        # A quiet week still needs a home page: the best-rated properties fill the rest
+        quiet = Property.objects.exclude(id__in=list(scores)).annotate(avg_rating=Avg('reviews__rating')).order_by(
+            Coalesce('avg_rating', 0.0).desc(), '-created_at',
+        ).values_list('id', flat=True)[:size - len(ranked)]
+        ranked.extend((property_id, 0.0) for property_id in quiet)
+    return ranked
+
+
+@transaction.atomic
+def refresh_trending(now=None, size=SIZE):
+    """Drop buckets older than WINDOW and store the new trending list. Returns its length"""
+    now = now or timezone.now()
+    PropertyActivity.objects.filter(bucket__lt=bucket_of(now - WINDOW)).delete()
+    ranked = compute_trending(now, size)
+    # Overwriting rank by rank keeps concurrent refreshes from colliding, and
+    # readers never see the list empty
+    TrendingProperty.objects.bulk_create(
+        [
+            TrendingProperty(rank=rank, property_id=property_id, score=score, computed_at=now)
+            for rank, (property_id, score) in enumerate(ranked, 1)
+        ],
+        update_conflicts=True,
+        unique_fields=['rank'],
+        update_fields=['property', 'score', 'computed_at'],
+    )
+    TrendingProperty.objects.filter(rank__gt=len(ranked)).delete()
+    return len(ranked)
+
+
+def trending(limit=SIZE):
+    """[(property id, score)] best first, from the stored list once refresh_trending has run"""
+    ranked = list(TrendingProperty.objects.values_list('property_id', 'score')[:limit])
+    return ranked or compute_trending(size=limit)
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def _run_every(interval):
+    while True:
+        # Sleep first so startup (and migrate) is never raced
+        time.sleep(interval)
+        try:
+            refresh_trending()
+        except Exception:
+            logger.exception('Trending refresh failed')
+        finally:
+            close_old_connections()
+
+
+def start_refresher():
+    """Start the in-process refresh thread if RECOMMENDATION_TRENDING_INTERVAL is set"""
+    global _refresher
+    interval = getattr(settings, 'RECOMMENDATION_TRENDING_INTERVAL', None)
+    if not interval:
+        return
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_run_every, args=(interval,), name='trending-refresh', daemon=True)
+            _refresher.start()
@@ -10,7 +10,8 @@ from .views import (
     GuestPreferenceMatchingView,
     UserPreferenceViewSet,
     track_search,
-    track_property_view
+    track_property_view,
+    recommendation_cache_stats,
 )
 
 router = DefaultRouter()
@@ -23,6 +24,7 @@ urlpatterns = [
     
     # Personalized Recommendations
     path('recommendations/', PersonalizedRecommendationsView.as_view(), name='recommendations'),
+    path('recommendations/cache-stats/', recommendation_cache_stats, name='recommendation-cache-stats'),
     
     # Dynamic Pricing Insights
     path('pricing-insights/', DynamicPricingInsightsView.as_view(), name='pricing-insights'),
@@ -7,12 +7,13 @@ from collections import defaultdict
 from django.db.models import Avg, Count, Q, F
 from django.utils import timezone
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from property.models import Property
-from booking.models import Reservation, PropertyReview
+from booking.models import Reservation
 from useraccount.models import User
 from useraccount.auth import ClerkAuthentication
 
@@ -20,6 +21,9 @@ from .models import (
     UserPreference, SearchHistory, PropertyView, PriceTrend,
     LocationPriceIndex, Itinerary, ChatbotConversation, GuestMatch
 )
+from .cache import stats as cache_stats
+from .matching import generate_matches, top_matches
+from .pipeline import StageTimer, personalized_recommendations
 from .serializers import (
     UserPreferenceSerializer, SearchHistorySerializer, PropertyViewSerializer,
     ItinerarySerializer, ChatMessageSerializer, GuestMatchSerializer,
@@ -45,211 +49,13 @@ class PersonalizedRecommendationsView(APIView):
     
     def get(self, request):
         user = request.user if request.user.is_authenticated else None
-        session_id = request.query_params.get('session_id', '')
         limit = int(request.query_params.get('limit', 10))
         
-        recommendations = []
-        recommendation_reasons = []
-        
-        if user:
-            # Get user preferences
-            preference = UserPreference.objects.filter(user=user).first()
-            
-            # 1. Content-based filtering: Based on user preferences
-            if preference:
-                content_based = self._get_content_based_recommendations(user, preference, limit=5)
-                recommendations.extend(content_based['properties'])
-                recommendation_reasons.extend(content_based['reasons'])
-            
-            # 2. Collaborative filtering: Based on similar users
-            collaborative = self._get_collaborative_recommendations(user, limit=5)
-            recommendations.extend(collaborative['properties'])
-            recommendation_reasons.extend(collaborative['reasons'])
-            
-            # 3. History-based: Based on search and view history
-            history_based = self._get_history_based_recommendations(user, limit=5)
-            recommendations.extend(history_based['properties'])
-            recommendation_reasons.extend(history_based['reasons'])
-        else:
-            # Anonymous user: Show trending and popular properties
-            trending = self._get_trending_properties(session_id, limit)
-            recommendations.extend(trending['properties'])
-            recommendation_reasons.extend(trending['reasons'])
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_recommendations = []
-        for prop in recommendations:
-            if prop['id'] not in seen:
-                seen.add(prop['id'])
-                unique_recommendations.append(prop)
-        
-        # Score and sort recommendations
-        scored_recommendations = self._score_recommendations(unique_recommendations, user)
-        
-        return Response({
-            'recommendations': scored_recommendations[:limit],
-            'recommendation_type': 'personalized' if user else 'trending',
-            'total_count': len(scored_recommendations),
-            'reasons': list(set(recommendation_reasons))[:5],
-            'personalization_score': self._calculate_personalization_score(user)
-        })
-    
-    def _get_content_based_recommendations(self, user, preference, limit=5):
-        """Recommend properties matching user preferences"""
-        properties = Property.objects.all()
-        reasons = []
-        
-        # Filter by preferred categories
-        if preference.preferred_categories:
-            properties = properties.filter(category__in=preference.preferred_categories)
-            reasons.append(f"Matches your preferred categories")
-        
-        # Filter by preferred countries
-        if preference.preferred_countries:
-            properties = properties.filter(country__in=preference.preferred_countries)
-            reasons.append(f"In your favorite destinations")
-        
-        # Filter by price
-        if preference.max_price_per_night:
-            properties = properties.filter(price_per_night__lte=preference.max_price_per_night)
-            reasons.append("Within your budget")
-        
-        # Filter by bedrooms
-        if preference.min_bedrooms:
-            properties = properties.filter(bedrooms__gte=preference.min_bedrooms)
-        
-        # Filter by guest capacity
-        if preference.typical_group_size:
-            properties = properties.filter(guests__gte=preference.typical_group_size)
-        
-        # Get top-rated properties
-        properties = properties.annotate(
-            avg_rating=Avg('reviews__rating')
-        ).order_by('-avg_rating')[:limit]
-        
-        serializer = PropertyListSerializer(properties, many=True)
-        return {'properties': serializer.data, 'reasons': reasons}
-    
-    def _get_collaborative_recommendations(self, user, limit=5):
-        """Find properties liked by similar users"""
-        reasons = []
-        
-        # Find users with similar booking patterns
-        user_bookings = Reservation.objects.filter(guest=user).values_list('property_id', flat=True)
-        
-        if not user_bookings:
-            return {'properties': [], 'reasons': []}
-        
-        # Find users who booked the same properties
-        similar_users = Reservation.objects.filter(
-            property_id__in=user_bookings
-        ).exclude(guest=user).values_list('guest_id', flat=True).distinct()[:20]
-        
-        # Get properties those users also booked
-        recommended_property_ids = Reservation.objects.filter(
-            guest_id__in=similar_users
-        ).exclude(
-            property_id__in=user_bookings
-        ).values_list('property_id', flat=True).distinct()[:limit]
-        
-        properties = Property.objects.filter(id__in=recommended_property_ids)
-        
-        if properties.exists():
-            reasons.append("Popular among travelers like you")
-        
-        serializer = PropertyListSerializer(properties, many=True)
-        return {'properties': serializer.data, 'reasons': reasons}
-    
-    def _get_history_based_recommendations(self, user, limit=5):
-        """Recommend based on search and view history"""
-        reasons = []
-        
-        # Get recent searches
-        recent_searches = SearchHistory.objects.filter(user=user).order_by('-created_at')[:10]
-        
-        # Extract common patterns
-        locations = [s.location for s in recent_searches if s.location]
-        categories = [s.category for s in recent_searches if s.category]
-        
-        properties = Property.objects.all()
-        
-        if locations:
-            most_searched_location = max(set(locations), key=locations.count)
-            properties = properties.filter(country__icontains=most_searched_location)
-            reasons.append(f"Based on your searches in {most_searched_location}")
-        
-        if categories:
-            most_searched_category = max(set(categories), key=categories.count)
-            properties = properties.filter(category=most_searched_category)
-            reasons.append(f"Based on your interest in {most_searched_category}")
-        
-        # Get recently viewed but not booked
-        viewed_property_ids = PropertyView.objects.filter(
-            user=user, completed_booking=False
-        ).values_list('property_id', flat=True)[:limit]
-        
-        if viewed_property_ids:
-            reasons.append("Properties you viewed but haven't booked")
-        
-        properties = properties[:limit]
-        serializer = PropertyListSerializer(properties, many=True)
-        return {'properties': serializer.data, 'reasons': reasons}
-    
-    def _get_trending_properties(self, session_id, limit=10):
-        """Get trending properties for anonymous users"""
-        # Properties with most views/bookings in last 7 days
-        week_ago = timezone.now() - timedelta(days=7)
-        
-        trending = Property.objects.annotate(
-            recent_views=Count('user_views', filter=Q(user_views__created_at__gte=week_ago)),
-            recent_bookings=Count('reservations', filter=Q(reservations__created_at__gte=week_ago)),
-            avg_rating=Avg('reviews__rating')
-        ).order_by('-recent_bookings', '-recent_views', '-avg_rating')[:limit]
-        
-        serializer = PropertyListSerializer(trending, many=True)
-        return {
-            'properties': serializer.data,
-            'reasons': ['Trending this week', 'Popular among travelers']
-        }
-    
-    def _score_recommendations(self, recommendations, user):
-        """Score and rank recommendations"""
-        for i, rec in enumerate(recommendations):
-            base_score = 100 - (i * 5)  # Position-based score
-            
-            # Boost for high ratings
-            if 'average_rating' in rec:
-                base_score += float(rec.get('average_rating', 0)) * 10
-            
-            rec['recommendation_score'] = min(100, base_score)
-        
-        return sorted(recommendations, key=lambda x: x.get('recommendation_score', 0), reverse=True)
-    
-    def _calculate_personalization_score(self, user):
-        """Calculate how personalized the recommendations are (0-100)"""
-        if not user:
-            return 0
-        
-        score = 0
-        
-        # Check if user has preferences
-        if UserPreference.objects.filter(user=user).exists():
-            score += 30
-        
-        # Check search history
-        search_count = SearchHistory.objects.filter(user=user).count()
-        score += min(20, search_count * 2)
-        
-        # Check property views
-        view_count = PropertyView.objects.filter(user=user).count()
-        score += min(25, view_count * 2.5)
-        
-        # Check booking history
-        booking_count = Reservation.objects.filter(guest=user).count()
-        score += min(25, booking_count * 5)
-        
-        return min(100, score)
+        # Candidates from every strategy are ranked together; only the top `limit` are loaded
+        timer = StageTimer()
+        response = Response(personalized_recommendations(user, limit, timer))
+        response['Server-Timing'] = timer.header()
+        return response
 
 
 # ============================================================================
@@ -1233,19 +1039,13 @@ class GuestPreferenceMatchingView(APIView):
         if not user.is_authenticated:
             return Response({'error': 'Authentication required'}, status=401)
         
-        # Check for existing fresh matches
-        fresh_matches = GuestMatch.objects.filter(
-            user=user,
-            is_dismissed=False,
-            expires_at__gt=timezone.now()
-        ).order_by('-overall_match_score')[:10]
-        
-        if fresh_matches.exists():
-            serializer = GuestMatchSerializer(fresh_matches, many=True)
+        matches = list(top_matches(user))
+        if matches:
+            serializer = GuestMatchSerializer(matches, many=True)
             return Response({
                 'matches': serializer.data,
-                'match_count': fresh_matches.count(),
-                'last_updated': fresh_matches.first().created_at
+                'match_count': len(matches),
+                'last_updated': matches[0].created_at
             })
         
         # Generate new matches
@@ -1286,136 +1086,10 @@ class GuestPreferenceMatchingView(APIView):
         return Response(serializer.errors, status=400)
     
     def _generate_matches(self, user):
-        """Generate property matches for user"""
-        # Get or create preferences
-        preference, _ = UserPreference.objects.get_or_create(user=user)
-        
-        # Get all properties
-        properties = Property.objects.all()
-        
-        matches = []
-        expires_at = timezone.now() + timedelta(days=7)
-        
-        for prop in properties:
-            # Calculate match scores
-            scores = self._calculate_match_scores(prop, preference, user)
-            
-            if scores['overall'] >= 50:  # Minimum 50% match
-                match, created = GuestMatch.objects.update_or_create(
-                    user=user,
-                    property=prop,
-                    defaults={
-                        'overall_match_score': scores['overall'],
-                        'category_match': scores['category'],
-                        'price_match': scores['price'],
-                        'location_match': scores['location'],
-                        'amenities_match': scores['amenities'],
-                        'style_match': scores['style'],
-                        'match_reasons': scores['reasons'],
-                        'expires_at': expires_at
-                    }
-                )
-                matches.append(match)
-        
-        # Sort by overall score
-        matches.sort(key=lambda x: x.overall_match_score, reverse=True)
-        return matches[:10]
-    
-    def _calculate_match_scores(self, property_obj, preference, user):
-        """Calculate match scores between property and user preferences"""
-        scores = {
-            'category': 0,
-            'price': 0,
-            'location': 0,
-            'amenities': 0,
-            'style': 0,
-            'reasons': []
-        }
-        
-        # Category match
-        if preference.preferred_categories:
-            if property_obj.category in preference.preferred_categories:
-                scores['category'] = 100
-                scores['reasons'].append(f"Matches your preferred category: {property_obj.category}")
-            else:
-                scores['category'] = 30
-        else:
-            scores['category'] = 70  # Neutral
-        
-        # Price match
-        if preference.max_price_per_night:
-            if property_obj.price_per_night <= preference.max_price_per_night:
-                price_ratio = property_obj.price_per_night / preference.max_price_per_night
-                scores['price'] = 100 - (price_ratio * 30)  # Cheaper = higher score
-                scores['reasons'].append(f"Within your budget (${property_obj.price_per_night}/night)")
-            else:
-                scores['price'] = 20
-        else:
-            scores['price'] = 70
-        
-        # Location match
-        if preference.preferred_countries:
-            if property_obj.country in preference.preferred_countries:
-                scores['location'] = 100
-                scores['reasons'].append(f"Located in {property_obj.country} - one of your favorites")
-            else:
-                scores['location'] = 40
-        else:
-            scores['location'] = 70
-        
-        # Guest capacity match
-        if property_obj.guests >= preference.typical_group_size:
-            scores['amenities'] += 50
-            scores['reasons'].append(f"Perfect for your group size ({property_obj.guests} guests)")
-        
-        # Bedroom match
-        if property_obj.bedrooms >= preference.min_bedrooms:
-            scores['amenities'] += 50
-        else:
-            scores['amenities'] = max(0, scores['amenities'] - 20)
-        
-        # Style match based on budget preference
-        budget_price_ranges = {
-            'budget': (0, 100),
-            'moderate': (50, 200),
-            'luxury': (150, 10000),
-            'any': (0, 10000)
-        }
-        
-        price_range = budget_price_ranges.get(preference.budget_preference, (0, 10000))
-        if price_range[0] <= property_obj.price_per_night <= price_range[1]:
-            scores['style'] = 100
-            if preference.budget_preference == 'luxury' and property_obj.price_per_night > 200:
-                scores['reasons'].append("Premium luxury property")
-            elif preference.budget_preference == 'budget':
-                scores['reasons'].append("Great value for money")
-        else:
-            scores['style'] = 50
-        
-        # Calculate overall score
-        weights = {
-            'category': 0.25,
-            'price': 0.25,
-            'location': 0.20,
-            'amenities': 0.15,
-            'style': 0.15
-        }
-        
-        scores['overall'] = sum(
-            scores[key] * weight
-            for key, weight in weights.items()
-        )
-        
-        # Boost for highly-rated properties
-        avg_rating = PropertyReview.objects.filter(
-            property=property_obj
-        ).aggregate(avg=Avg('rating'))['avg'] or 0
-        
-        if avg_rating >= 4.5:
-            scores['overall'] = min(100, scores['overall'] + 10)
-            scores['reasons'].append(f"Highly rated ({avg_rating:.1f}⭐)")
-        
-        return scores
+        """Score every property for the user (recommendation.matching) and return the top 10"""
+        UserPreference.objects.get_or_create(user=user)
+        generate_matches([user.pk])
+        return list(top_matches(user))
 
 
 # ============================================================================
@@ -1504,3 +1178,9 @@ def track_property_view(request):
     
     return Response({'status': 'tracked'})
 
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def recommendation_cache_stats(request):
+    """Hit, stale, miss and invalidation counts for the per-user ranking cache"""
+    return Response(cache_stats())
@@ -89,4 +89,11 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     list_display = ['pool_member', 'transaction_type', 'amount', 'status', 'created_at']
     list_filter = ['transaction_type', 'status']
     readonly_fields = ['id', 'created_at']
+    
+    # The ledger is append-only and written through roompooling.ledger
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
 
@@ -6,3 +6,8 @@ class RoompoolingConfig(AppConfig):
     name = 'roompooling'
     verbose_name = 'Room Pooling & Cost Sharing'
 
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .expiry import start_sweeper
+        start_sweeper()
@@ -0,0 +1,81 @@
+"""
+Live pool chat.
+
+Every PoolChat row, whether sent by a member or created as a system message
+(joins, leaves, payments, bookings), is pushed to the pool's channel group
+once its transaction commits (see roompooling.signals). Connected members
+(roompooling.consumers) receive it without polling; the REST endpoint stays
+the history/backfill source.
+
+Read state is one PoolChatReadCursor per (pool, user) rather than a list of
+readers on every message, so marking a chat read is a single upsert and an
+unread count is a single indexed count.
+"""
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import DateTimeField, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PoolChat, PoolChatReadCursor, RoomPool
+from .serializers import PoolChatSerializer
+
+
+# Cursor of a user who has never opened the chat
+NEVER = Value(datetime(1970, 1, 1, tzinfo=dt_timezone.utc), output_field=DateTimeField())
+
+
+def group_name(pool_id):
+    return f'pool_chat_{pool_id}'
+
+
+def is_pool_member(pool_id, user):
+    """Approved members and the creator may read and write a pool's chat"""
+    return RoomPool.objects.filter(
+        Q(creator=user) | Q(members__user=user, members__status='approved'),
+        id=pool_id,
+    ).exists()
+
+
+def mark_read(pool_id, user, read_at=None):
+    """Everything in the pool up to ``read_at`` (default: now) is read by ``user``"""
+    PoolChatReadCursor.objects.bulk_create(
+        [PoolChatReadCursor(pool_id=pool_id, user=user, last_read_at=read_at or timezone.now())],
+        update_conflicts=True,
+        unique_fields=['pool', 'user'],
+        update_fields=['last_read_at', 'updated_at'],
+    )
+
+
+def unread_count(pool_id, user):
+    """Messages in the pool from anyone else (or the system) after the user's cursor"""
+    last_read_at = PoolChatReadCursor.objects.filter(pool_id=pool_id, user=user).values('last_read_at')[:1]
+    return PoolChat.objects.filter(
+        pool_id=pool_id,
+        created_at__gt=Coalesce(Subquery(last_read_at), NEVER),
+    ).exclude(sender=user).count()
+
+
+def _send(pool_id, event):
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(group_name(pool_id), event)
+
+
+def broadcast_message(message):
+    # Plain JSON types only, so any channel layer backend can carry it
+    # A brand-new message is read by its sender only, so no cursor lookup is needed
+    serializer = PoolChatSerializer(message, context={'read_cursors': {message.pool_id: {}}})
+    data = json.loads(json.dumps(serializer.data, cls=DjangoJSONEncoder))
+    transaction.on_commit(lambda: _send(message.pool_id, {'type': 'chat.message', 'message': data}))
+
+
+def broadcast_member_removed(pool_id, user_id):
+    """Disconnect a user's open sockets once they stop being an approved member"""
+    user_id = str(user_id)
+    transaction.on_commit(lambda: _send(pool_id, {'type': 'member.removed', 'user_id': user_id}))
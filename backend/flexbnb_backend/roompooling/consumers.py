@@ -0,0 +1,61 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .chat import group_name, is_pool_member
+from .models import PoolChat
+
+
+# Close codes (4000-4999 are free for applications)
+UNAUTHORIZED = 4401
+FORBIDDEN = 4403
+
+
+class PoolChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws/pools/<pool_id>/chat/: one socket per member per pool.
+
+    The user (ClerkWebSocketAuthMiddleware) and their membership are checked
+    once on connect; afterwards every new PoolChat row in the pool is pushed
+    as it commits. Clients send {"message": "..."} to post, and backfill
+    history from the REST chat endpoint.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.pool_id = str(self.scope['url_route']['kwargs']['pool_id'])
+        self.group = group_name(self.pool_id)
+
+        if self.user is None or not self.user.is_authenticated:
+            await self.close(code=UNAUTHORIZED)
+            return
+        if not await database_sync_to_async(is_pool_member)(self.pool_id, self.user):
+            await self.close(code=FORBIDDEN)
+            return
+
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        message_text = str(content.get('message', '')).strip() if isinstance(content, dict) else ''
+        if not message_text:
+            await self.send_json({'error': 'Message cannot be empty'})
+            return
+        # The saved row reaches every socket, this one included, through the group
+        await database_sync_to_async(PoolChat.objects.create)(
+            pool_id=self.pool_id,
+            sender=self.user,
+            message_type='text',
+            message=message_text,
+        )
+
+    async def chat_message(self, event):
+        is_mine = event['message']['sender'] == str(self.user.id)
+        message = dict(event['message'], is_mine=is_mine, is_read=is_mine)
+        await self.send_json(message)
+
+    async def member_removed(self, event):
+        if event['user_id'] == str(self.user.id):
+            await self.close(code=FORBIDDEN)
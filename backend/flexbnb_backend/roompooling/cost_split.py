@@ -0,0 +1,183 @@
+"""
+Cost split engine.
+
+The pool's accommodation price (RoomPool.total_price) is divided among the
+approved members by weight: equally, by custom percentages, or by nights
+stayed. Every member then adds the per-person booking fee. Amounts are
+Decimal cents throughout; the cents left over after rounding down go to the
+largest remainders, so the parts always add up to the price exactly.
+
+apply_cost_split() writes the result in one transaction: the members'
+share_amount with one bulk_update, and the same figures in
+CostSplit.individual_amounts ({user id: amount}).
+"""
+from decimal import Decimal, InvalidOperation, ROUND_DOWN
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import CostSplit, RoomPool, RoomPoolMember
+
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class CostSplitError(ValueError):
+    pass
+
+
+def allocate(total, weights):
+    """Split ``total`` into cents proportionally to ``weights`` (largest remainder)"""
+    weights = [Decimal(weight) for weight in weights]
+    weight_sum = sum(weights)
+    if not weights or weight_sum <= 0:
+        raise CostSplitError('Nothing to split the cost between')
+
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [amount.quantize(CENT, rounding=ROUND_DOWN) for amount in exact]
+    leftover = int((total - sum(parts)) / CENT)
+    by_remainder = sorted(range(len(parts)), key=lambda i: exact[i] - parts[i], reverse=True)
+    for i in by_remainder[:leftover]:
+        parts[i] += CENT
+    return parts
+
+
+def _custom_weights(members, custom_percentages):
+    if not isinstance(custom_percentages, dict):
+        raise CostSplitError('custom_percentages must map user ids to percentages')
+    percentages = {}
+    for user_id, percentage in custom_percentages.items():
+        try:
+            percentages[str(user_id)] = Decimal(str(percentage))
+        except InvalidOperation:
+            raise CostSplitError('custom_percentages must be numbers')
+
+    member_ids = {str(member.user_id) for member in members}
+    if set(percentages) != member_ids:
+        raise CostSplitError('custom_percentages must list every approved member, and only them')
+    if any(percentage < 0 for percentage in percentages.values()):
+        raise CostSplitError('custom_percentages cannot be negative')
+    if sum(percentages.values()) != HUNDRED:
+        raise CostSplitError('custom_percentages must add up to 100')
+    return [percentages[str(member.user_id)] for member in members]
+
+
+def _night_weights(pool, members, member_nights):
+    if not isinstance(member_nights, dict):
+        raise CostSplitError('member_nights must map user ids to nights')
+    pool_nights = (pool.check_out_date - pool.check_in_date).days
+    weights = []
+    for member in members:
+        nights = member_nights.get(str(member.user_id), pool_nights)
+        try:
+            nights = int(nights)
+        except (TypeError, ValueError):
+            raise CostSplitError('nights must be whole numbers')
+        if not 1 <= nights <= pool_nights:
+            raise CostSplitError(f'nights must be between 1 and {pool_nights}')
+        weights.append(nights)
+    return weights
+
+
+def compute_shares(pool, members, split_type='equal', custom_percentages=None, member_nights=None):
+    """
+    {member id: share} for ``members`` (approved, in a fixed order) without
+    touching the database. Raises CostSplitError on an invalid configuration.
+    """
+    if split_type == 'equal':
+        weights = [1] * len(members)
+    elif split_type == 'custom':
+        weights = _custom_weights(members, custom_percentages)
+    elif split_type == 'by_nights':
+        weights = _night_weights(pool, members, member_nights)
+    else:
+        raise CostSplitError(f'Unsupported split type: {split_type}')
+
+    parts = allocate(pool.total_price, weights)
+    return {member.id: part + pool.booking_fee_per_person for member, part in zip(members, parts)}
+
+
+def _approved(pool):
+    return pool.members.filter(status='approved')
+
+
+@transaction.atomic
+def apply_cost_split(pool, split_type=None, custom_percentages=None, member_nights=None):
+    """
+    Recompute and store every approved member's share. Arguments left as
+    None keep the pool's current configuration; a custom split that no
+    longer matches the members (someone joined or left) falls back to equal.
+    """
+    pool = RoomPool.objects.select_for_update().get(pk=pool.pk)
+    cost_split, _ = CostSplit.objects.get_or_create(
+        pool=pool,
+        defaults={
+            'base_accommodation': pool.total_price,
+            'total_amount': pool.total_price + (pool.booking_fee_per_person * pool.max_members),
+        },
+    )
+    explicit = split_type is not None
+    split_type = split_type or cost_split.split_type
+    if custom_percentages is None:
+        custom_percentages = cost_split.custom_percentages
+    if member_nights is None:
+        member_nights = cost_split.member_nights
+
+    members = list(_approved(pool).order_by('joined_at', 'id'))
+    if not members:
+        shares = {}
+    else:
+        try:
+            shares = compute_shares(pool, members, split_type, custom_percentages, member_nights)
+        except CostSplitError:
+            if explicit or split_type == 'equal':
+                raise
+            split_type = 'equal'
+            shares = compute_shares(pool, members, split_type)
+
+    for member in members:
+        member.share_amount = shares[member.id]
+        member.custom_split_percentage = (
+            Decimal(str(custom_percentages[str(member.user_id)])) if split_type == 'custom' else None
+        )
+    RoomPoolMember.objects.bulk_update(members, ['share_amount', 'custom_split_percentage'])
+
+    cost_split.split_type = split_type
+    cost_split.custom_percentages = custom_percentages if split_type == 'custom' else {}
+    cost_split.member_nights = member_nights if split_type == 'by_nights' else {}
+    cost_split.base_accommodation = pool.total_price
+    cost_split.individual_amounts = {str(member.user_id): float(member.share_amount) for member in members}
+    cost_split.save()
+    return cost_split
+
+
+def payment_totals(pool):
+    """Members count and due/collected/remaining totals, as one aggregate query"""
+    return _approved(pool).aggregate(
+        members_count=Count('id'),
+        total_due=Coalesce(Sum('share_amount'), ZERO),
+        total_collected=Coalesce(Sum('amount_paid'), ZERO),
+        total_remaining=Coalesce(Sum(F('share_amount') - F('amount_paid')), ZERO),
+    )
+
+
+def payment_summary(pool):
+    """Per-member payment rows (one query, users joined) and payment_totals()"""
+    members = _approved(pool).select_related('user').annotate(
+        remaining=F('share_amount') - F('amount_paid'),
+    ).order_by('joined_at', 'id')
+    rows = [
+        {
+            'user_id': str(member.user_id),
+            'user_name': member.user.name,
+            'share_amount': float(member.share_amount),
+            'amount_paid': float(member.amount_paid),
+            'payment_status': member.payment_status,
+            'remaining': float(member.remaining),
+        }
+        for member in members
+    ]
+    return rows, payment_totals(pool)
@@ -0,0 +1,94 @@
+"""
+Public pool discovery.
+
+Every filter is a predicate on RoomPool's own indexed columns: location is
+read from the denormalized location_country / location_country_code rather
+than a join to property with a wildcard scan, and country names are
+matched case-insensitively through an UPPER() index (as in
+property.search). A page costs a fixed number of queries whatever its
+size: count, rows (property and creator joined), primary images, and the
+viewer's memberships.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from property.models import primary_image_prefetch
+
+from .models import RoomPool, RoomPoolMember
+
+
+DISCOVERABLE_STATUSES = ('open', 'full')
+
+
+def _parse_date(raw, name):
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+    return value
+
+
+def _parse_price(raw, name):
+    if not raw:
+        return None
+    try:
+        return Decimal(raw)
+    except (InvalidOperation, TypeError):
+        raise ValueError(f'{name} must be a number')
+
+
+def discover_pools(params):
+    """
+    Open/full public pools still taking members, filtered by ``params``
+    (location, check_in, check_out, max_price). Raises ValueError on bad input.
+    """
+    pools = RoomPool.objects.filter(
+        visibility='public',
+        status__in=DISCOVERABLE_STATUSES,
+        booking_deadline__gt=timezone.now(),
+    )
+
+    location = (params.get('location') or '').strip()
+    if location:
+        pools = pools.annotate(location_country_upper=Upper('location_country')).filter(
+            Q(location_country_upper=location.upper()) | Q(location_country_code=location.upper())
+        )
+
+    check_in = _parse_date(params.get('check_in'), 'check_in')
+    if check_in:
+        pools = pools.filter(check_in_date__gte=check_in)
+    check_out = _parse_date(params.get('check_out'), 'check_out')
+    if check_out:
+        pools = pools.filter(check_out_date__lte=check_out)
+
+    max_price = _parse_price(params.get('max_price'), 'max_price')
+    if max_price is not None:
+        pools = pools.filter(price_per_person__lte=max_price)
+
+    return pools
+
+
+def for_listing(pools):
+    """Load everything RoomPoolListSerializer reads, in two queries"""
+    return pools.select_related('property', 'creator').prefetch_related(primary_image_prefetch('property__images'))
+
+
+def member_pool_ids(user, pools):
+    """Ids among ``pools`` the user has joined or asked to join, in one query"""
+    if not user or not user.is_authenticated:
+        return set()
+    return set(
+        RoomPoolMember.objects.filter(
+            user=user,
+            status__in=['approved', 'pending'],
+            pool_id__in=[pool.id for pool in pools],
+        ).values_list('pool_id', flat=True)
+    )
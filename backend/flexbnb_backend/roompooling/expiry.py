@@ -0,0 +1,105 @@
+"""
+Expiry sweeper.
+
+Pending invitations past expires_at become 'expired', and open/full pools
+past booking_deadline become 'closed' with a system message in their chat.
+Each batch is one indexed range scan (status, then the deadline column),
+one UPDATE and, for pools, one bulk_create of messages, so stale rows leave
+the pending/open slices that every listing and discovery query scans.
+
+Run it from cron with ``manage.py sweep_expired``, as its own process with
+``--every``, or in-process by setting POOL_EXPIRY_SWEEP_INTERVAL (seconds).
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .chat import broadcast_message
+from .models import PoolChat, PoolInvitation, RoomPool
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'POOL_EXPIRY_BATCH_SIZE', 500)
+
+CLOSED_MESSAGE = 'The booking deadline has passed, so this pool is now closed.'
+
+
+def _claim(queryset, batch_size):
+    # Rows another sweeper holds are left to it. Every matching row is swept,
+    # so the default ordering is dropped rather than sorting the range.
+    return list(queryset.order_by().select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size])
+
+
+def expire_invitations(now=None, batch_size=BATCH_SIZE):
+    """Mark pending invitations past expires_at as expired. Returns how many"""
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            ids = _claim(PoolInvitation.objects.filter(status='pending', expires_at__lte=now), batch_size)
+            if not ids:
+                return expired
+            expired += PoolInvitation.objects.filter(id__in=ids, status='pending').update(status='expired')
+
+
+def close_expired_pools(now=None, batch_size=BATCH_SIZE):
+    """Close open/full pools past their booking deadline and tell their chats. Returns how many"""
+    now = now or timezone.now()
+    closed = 0
+    while True:
+        with transaction.atomic():
+            ids = _claim(RoomPool.objects.filter(status__in=['open', 'full'], booking_deadline__lte=now), batch_size)
+            if not ids:
+                return closed
+            closed += RoomPool.objects.filter(id__in=ids, status__in=['open', 'full']).update(
+                status='closed',
+                updated_at=now,
+            )
+            messages = PoolChat.objects.bulk_create([
+                PoolChat(pool_id=pool_id, message_type='system', message=CLOSED_MESSAGE)
+                for pool_id in ids
+            ])
+            # bulk_create skips post_save, so push to connected members here
+            for message in messages:
+                broadcast_message(message)
+
+
+def sweep(now=None, batch_size=BATCH_SIZE):
+    now = now or timezone.now()
+    return {
+        'invitations_expired': expire_invitations(now, batch_size),
+        'pools_closed': close_expired_pools(now, batch_size),
+    }
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _run_every(interval):
+    while True:
+        # Sleep first so startup (and migrate) is never raced
+        time.sleep(interval)
+        try:
+            sweep()
+        except Exception:
+            logger.exception('Expiry sweep failed')
+        finally:
+            close_old_connections()
+
+
+def start_sweeper():
+    """Start the in-process sweeper thread if POOL_EXPIRY_SWEEP_INTERVAL is set"""
+    global _sweeper
+    interval = getattr(settings, 'POOL_EXPIRY_SWEEP_INTERVAL', None)
+    if not interval:
+        return
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(target=_run_every, args=(interval,), name='pool-expiry', daemon=True)
+            _sweeper.start()
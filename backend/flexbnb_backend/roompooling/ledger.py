@@ -0,0 +1,255 @@
+"""
+Pool payment ledger.
+
+PaymentTransaction rows are append-only: an entry is never edited once
+written. Each completed entry moves two running balances in the same
+transaction, so reading a balance is a single row rather than a sum:
+
+- RoomPoolMember.amount_paid (and payment_status), per member
+- PoolBalance.total_collected, per pool: what its approved members have
+  paid, the same members payment_summary lists and total_due covers
+
+and records the member's balance after it in balance_after. Leaving
+refunds nothing, so a member who leaves or is removed takes what they paid
+out of the pool balance (member_left) and brings it back if approved again
+(member_joined); membership calls both inside its transactions. Settlement
+entries, written in one INSERT when a pool booking is finalized, record what
+each member had paid towards the booking without moving either balance.
+
+replay() recomputes both balances from the entries alone and reports (or
+fixes) any drift; check_payment_ledger runs it.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import PaymentTransaction, PoolBalance, RoomPoolMember
+
+
+CENT = Decimal('0.01')
+
+# How a completed entry moves the balances; adjustments carry their own sign
+EFFECT = {'payment': 1, 'refund': -1, 'adjustment': 1, 'settlement': 0}
+# The same, as a database expression over completed entries
+SIGNED_AMOUNT = Case(
+    *[When(transaction_type=transaction_type, then=F('amount') * sign) for transaction_type, sign in EFFECT.items()],
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+class LedgerError(ValueError):
+    pass
+
+
+def effect(transaction_type, amount, status='completed'):
+    if status != 'completed':
+        return Decimal('0')
+    return EFFECT[transaction_type] * amount
+
+
+def _limit(field):
+    """Largest magnitude a DecimalField on PaymentTransaction can store"""
+    field = PaymentTransaction._meta.get_field(field)
+    return Decimal(10) ** (field.max_digits - field.decimal_places) - CENT
+
+
+def _amount(raw, signed=False):
+    try:
+        amount = Decimal(str(raw))
+        # quantize() raises too once the digits overflow the context
+        exact = amount.is_finite() and amount == amount.quantize(CENT)
+    except InvalidOperation:
+        raise LedgerError('Invalid amount')
+    if not exact or amount == 0 or (amount < 0 and not signed):
+        raise LedgerError('Invalid amount')
+    if abs(amount) > _limit('amount'):
+        raise LedgerError('Amount is too large')
+    return amount
+
+
+def _payment_status(member):
+    if member.amount_paid >= member.share_amount:
+        return 'paid'
+    if member.amount_paid > 0:
+        return 'partial'
+    return 'pending'
+
+
+def _move_pool_balance(pool_id, delta):
+    moved = PoolBalance.objects.filter(pool_id=pool_id).update(
+        total_collected=F('total_collected') + delta,
+        updated_at=timezone.now(),
+    )
+    if not moved:
+        # First entry for the pool: open its row, then move it like any other
+        PoolBalance.objects.get_or_create(pool_id=pool_id)
+        _move_pool_balance(pool_id, delta)
+
+
+@transaction.atomic
+def record_entry(member, amount, transaction_type='payment', **fields):
+    """
+    Append a completed entry for ``member`` and move its balances. Amounts
+    are positive (adjustments may be negative); an entry can never take a
+    member below zero. Raises LedgerError on a bad amount.
+    """
+    if transaction_type not in EFFECT or transaction_type == 'settlement':
+        raise LedgerError(f'Unsupported transaction type: {transaction_type}')
+    amount = _amount(amount, signed=transaction_type == 'adjustment')
+
+    member = RoomPoolMember.objects.select_for_update().get(pk=member.pk)
+    delta = effect(transaction_type, amount)
+    if member.amount_paid + delta < 0:
+        raise LedgerError('Amount is more than the member has paid')
+    if member.amount_paid + delta > _limit('balance_after'):
+        raise LedgerError('Amount is too large')
+    member.amount_paid += delta
+    member.payment_status = _payment_status(member)
+    member.save(update_fields=['amount_paid', 'payment_status'])
+    if member.status == 'approved':
+        _move_pool_balance(member.pool_id, delta)
+
+    return PaymentTransaction.objects.create(
+        pool_member=member,
+        transaction_type=transaction_type,
+        amount=amount,
+        status='completed',
+        balance_after=member.amount_paid,
+        completed_at=timezone.now(),
+        **fields,
+    )
+
+
+def _move_member(member_id, sign):
+    # The member row is locked first, as in record_entry
+    member = RoomPoolMember.objects.select_for_update().get(pk=member_id)
+    if member.amount_paid:
+        _move_pool_balance(member.pool_id, sign * member.amount_paid)
+
+
+def member_joined(member_id):
+    """Count a newly approved member's payments in the pool balance. Call in the approving transaction"""
+    _move_member(member_id, 1)
+
+
+def member_left(member_id):
+    """Take a departed member's payments out of the pool balance. Call in the transaction that removes them"""
+    _move_member(member_id, -1)
+
+
+def record_settlement(pool, reservation):
+    """
+    One settlement entry per approved member who has paid, in a single
+    INSERT. Call inside the transaction that books the pool.
+    """
+    members = RoomPoolMember.objects.select_for_update().filter(pool=pool, status='approved', amount_paid__gt=0)
+    now = timezone.now()
+    return PaymentTransaction.objects.bulk_create([
+        PaymentTransaction(
+            pool_member=member,
+            transaction_type='settlement',
+            amount=member.amount_paid,
+            status='completed',
+            balance_after=member.amount_paid,
+            payment_method='pool_booking',
+            notes=f'Payment for pool booking - Reservation {reservation.id}',
+            completed_at=now,
+        )
+        for member in members
+    ])
+
+
+def pool_balances(pool_ids):
+    """{pool id: what its approved members have paid} in one query; pools without payments are absent"""
+    return dict(PoolBalance.objects.filter(pool_id__in=pool_ids).values_list('pool_id', 'total_collected'))
+
+
+def pool_collected(pool):
+    return pool_balances([pool.pk]).get(pool.pk, Decimal('0'))
+
+
+def replay(pool_ids=None, fix=False):
+    """
+    Recompute every member's and pool's (approved members') balance from the
+    entries and compare them with the stored running balances. Returns
+    [(kind, id, stored, replayed)] with kind 'entry' (balance_after),
+    'member' or 'pool'. With ``fix``, drifted member and pool balances are
+    re-summed from their entries under the row lock, so a payment landing
+    meanwhile is kept; entries are never touched.
+    """
+    members = RoomPoolMember.objects.all()
+    if pool_ids is not None:
+        members = members.filter(pool_id__in=pool_ids)
+    stored = {
+        member_id: (pool_id, status, amount_paid)
+        for member_id, pool_id, status, amount_paid in members.values_list(
+            'id', 'pool_id', 'status', 'amount_paid',
+        ).iterator()
+    }
+
+    entries = PaymentTransaction.objects.filter(pool_member__in=members).order_by('pool_member_id', 'created_at')
+    running = defaultdict(Decimal)
+    drift = []
+    for entry_id, member_id, transaction_type, amount, status, balance_after in entries.values_list(
+        'id', 'pool_member_id', 'transaction_type', 'amount', 'status', 'balance_after',
+    ).iterator(chunk_size=5000):
+        if status != 'completed':
+            continue
+        running[member_id] += effect(transaction_type, amount)
+        if balance_after != running[member_id]:
+            drift.append(('entry', entry_id, balance_after, running[member_id]))
+
+    collected = defaultdict(Decimal)
+    member_fixes = []
+    for member_id, (pool_id, status, amount_paid) in stored.items():
+        replayed = running[member_id]
+        if status == 'approved':
+            collected[pool_id] += replayed
+        if amount_paid != replayed:
+            drift.append(('member', member_id, amount_paid, replayed))
+            member_fixes.append(member_id)
+
+    balances = PoolBalance.objects.all()
+    if pool_ids is not None:
+        balances = balances.filter(pool_id__in=pool_ids)
+    balances = dict(balances.values_list('pool_id', 'total_collected'))
+    pool_fixes = []
+    for pool_id in set(collected) | set(balances):
+        stored_total = balances.get(pool_id, Decimal('0'))
+        if stored_total != collected[pool_id]:
+            drift.append(('pool', pool_id, stored_total, collected[pool_id]))
+            pool_fixes.append(pool_id)
+
+    if fix:
+        for member_id in member_fixes:
+            _rebuild_member(member_id)
+        for pool_id in pool_fixes:
+            _rebuild_pool(pool_id)
+    return drift
+
+
+def _ledger_total(entries):
+    return entries.filter(status='completed').aggregate(total=Coalesce(Sum(SIGNED_AMOUNT), ZERO))['total']
+
+
+@transaction.atomic
+def _rebuild_member(member_id):
+    member = RoomPoolMember.objects.select_for_update().get(pk=member_id)
+    member.amount_paid = _ledger_total(PaymentTransaction.objects.filter(pool_member=member))
+    member.payment_status = _payment_status(member)
+    member.save(update_fields=['amount_paid', 'payment_status'])
+
+
+@transaction.atomic
+def _rebuild_pool(pool_id):
+    PoolBalance.objects.get_or_create(pool_id=pool_id)
+    balance = PoolBalance.objects.select_for_update().get(pool_id=pool_id)
+    balance.total_collected = _ledger_total(
+        PaymentTransaction.objects.filter(pool_member__pool_id=pool_id, pool_member__status='approved'),
+    )
+    balance.save()
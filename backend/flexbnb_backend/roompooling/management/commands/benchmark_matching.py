@@ -0,0 +1,99 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from roompooling.matching import ProfileMatrix, compatibility, top_matches
+from roompooling.models import RoommateProfile
+from useraccount.models import User
+
+
+INTERESTS = [
+    'travel', 'reading', 'sports', 'music', 'cooking', 'gaming', 'hiking', 'movies',
+    'art', 'photography', 'yoga', 'tech', 'fitness', 'dancing', 'writing', 'fashion',
+    'gardening', 'cycling', 'swimming', 'coffee', 'board games', 'languages', 'history', 'science',
+]
+
+
+def _values(choices):
+    return [value for value, _ in choices]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the vectorized roommate scorer against the per-pair loop on seeded '
+        'profiles and check both produce identical scores and rankings (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=100000)
+        parser.add_argument('--probes', type=int, default=3, help='Profiles to match against everyone')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['profiles'], options['seed'])
+            self._run(options['probes'], options['seed'])
+            transaction.set_rollback(True)
+
+    def _seed(self, count, seed):
+        rng = random.Random(seed)
+        started = time.perf_counter()
+        users = User.objects.bulk_create([
+            User(email=f'benchmark-roommate-{i}@example.com', name=f'Roommate {i}')
+            for i in range(count)
+        ], batch_size=5000)
+        RoommateProfile.objects.bulk_create([
+            RoommateProfile(
+                user=user,
+                gender=rng.choice(_values(RoommateProfile.GENDER_CHOICES)),
+                preferred_gender=rng.choice(_values(RoommateProfile.GENDER_CHOICES)),
+                age_group=rng.choice(_values(RoommateProfile.AGE_GROUP_CHOICES)),
+                sleep_schedule=rng.choice(_values(RoommateProfile.SLEEP_SCHEDULE_CHOICES)),
+                cleanliness=rng.choice(_values(RoommateProfile.CLEANLINESS_CHOICES)),
+                noise_preference=rng.choice(_values(RoommateProfile.NOISE_CHOICES)),
+                smoking=rng.choice(_values(RoommateProfile.SMOKING_CHOICES)),
+                interests=rng.sample(INTERESTS, rng.randint(0, 6)),
+            )
+            for user in users
+        ], batch_size=5000)
+        self.stdout.write(f'Seeded {count} profiles in {time.perf_counter() - started:.1f}s')
+
+    def _run(self, probes, seed):
+        rng = random.Random(seed)
+        everyone = RoommateProfile.objects.filter(is_looking_for_roommate=True)
+        ids = list(everyone.values_list('id', flat=True))
+
+        self.stdout.write(f"{'probe':<8}{'loop ms':>10}{'load ms':>10}{'score ms':>10}{'top-k ms':>10}{'found':>8}")
+        for n, probe in enumerate(RoommateProfile.objects.filter(id__in=rng.sample(ids, probes))):
+            candidates = everyone.exclude(user_id=probe.user_id)
+
+            # Per-pair loop, as the view used to score
+            started = time.perf_counter()
+            loop_scores = [compatibility(probe, profile)[0] for profile in candidates.iterator(chunk_size=5000)]
+            loop_ms = (time.perf_counter() - started) * 1000
+            loop_top = sorted(range(len(loop_scores)), key=lambda i: loop_scores[i], reverse=True)
+            loop_top = [i for i in loop_top if loop_scores[i] > 40][:20]
+
+            started = time.perf_counter()
+            matrix = ProfileMatrix.from_queryset(candidates)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            scores = matrix.scores(probe)
+            score_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            winners, found = top_matches(scores, 20)
+            top_ms = (time.perf_counter() - started) * 1000
+
+            if not np.array_equal(scores, np.array(loop_scores)):
+                raise CommandError(f'Probe {n}: vectorized scores differ from the per-pair scorer')
+            if list(winners) != loop_top:
+                raise CommandError(f'Probe {n}: top 20 differs from the per-pair ranking')
+
+            self.stdout.write(f'{n:<8}{loop_ms:>10.0f}{load_ms:>10.0f}{score_ms:>10.1f}{top_ms:>10.1f}{found:>8}')
+
+        self.stdout.write(self.style.SUCCESS('Vectorized scores and rankings match the per-pair scorer'))
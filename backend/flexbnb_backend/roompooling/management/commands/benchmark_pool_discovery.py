@@ -0,0 +1,155 @@
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from property.models import Property
+from roompooling.discovery import discover_pools
+from roompooling.models import RoomPool, RoomPoolMember
+from roompooling.views import PublicPoolsView
+from useraccount.models import User
+
+
+COUNTRIES = [
+    ('France', 'FR'), ('Spain', 'ES'), ('Italy', 'IT'), ('United States', 'US'),
+    ('Japan', 'JP'), ('Maldives', 'MV'), ('Switzerland', 'CH'), ('Pakistan', 'PK'),
+    ('Brazil', 'BR'), ('Australia', 'AU'), ('Canada', 'CA'), ('Greece', 'GR'),
+]
+
+QUERIES = [
+    ('no filters', {}),
+    ('country name', {'location': 'france'}),
+    ('country code', {'location': 'JP'}),
+    ('dates', {'check_in': '2030-03-01', 'check_out': '2030-06-30'}),
+    ('max price', {'max_price': '60'}),
+    ('everything', {'location': 'ES', 'check_in': '2030-02-01', 'check_out': '2030-09-30', 'max_price': '120'}),
+    ('page size 50', {'page_size': 50}),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark public pool discovery on seeded pools (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pools', type=int, default=200000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--explain', action='store_true', help='Print the page query plan for each query')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer = self._seed(options['pools'], options['seed'])
+            self._run(viewer, options['repeat'], options['explain'])
+            transaction.set_rollback(True)
+
+    def _seed(self, count, seed):
+        rng = random.Random(seed)
+        tag = uuid.uuid4().hex[:8]
+        host = User.objects.create(email=f'benchmark-pool-host-{tag}@example.com', name='Benchmark Host')
+        creators = User.objects.bulk_create([
+            User(email=f'benchmark-pool-creator-{tag}-{i}@example.com', name=f'Creator {i}')
+            for i in range(200)
+        ])
+        viewer = User.objects.create(email=f'benchmark-pool-viewer-{tag}@example.com', name='Viewer')
+
+        started = time.perf_counter()
+        properties = Property.objects.bulk_create([
+            Property(
+                title=f'Benchmark pool property {i}',
+                description='Seeded for benchmark_pool_discovery',
+                price_per_night=rng.randint(40, 600),
+                bedrooms=rng.randint(2, 6),
+                bathrooms=rng.randint(1, 3),
+                guests=rng.randint(4, 12),
+                country=country,
+                country_code=code,
+                category='Top Cities',
+                image='uploads/properties/benchmark.jpg',
+                Host=host,
+                allow_room_pooling=True,
+            )
+            for i, (country, code) in enumerate(rng.choice(COUNTRIES) for _ in range(1000))
+        ])
+
+        now = timezone.now()
+        statuses = ['open'] * 6 + ['full', 'closed', 'booked', 'cancelled']
+        visibilities = ['public'] * 8 + ['private', 'friends']
+        batch = []
+        for i in range(count):
+            prop = rng.choice(properties)
+            check_in = date(2030, 1, 1) + timedelta(days=rng.randint(0, 364))
+            members = rng.randint(2, 8)
+            current = rng.randint(1, members)
+            status = rng.choice(statuses)
+            if status in ('open', 'full'):
+                # Keep to roompool_open_has_space / roompool_full_at_capacity
+                status = 'full' if current == members else 'open'
+            price = Decimal(rng.randint(100, 3000))
+            batch.append(RoomPool(
+                title=f'Benchmark pool {i}',
+                property=prop,
+                creator=rng.choice(creators),
+                check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=rng.randint(2, 14)),
+                max_members=members,
+                current_members=current,
+                total_price=price,
+                price_per_person=(price / members).quantize(Decimal('0.01')),
+                location_country=prop.country,
+                location_country_code=prop.country_code,
+                status=status,
+                visibility=rng.choice(visibilities),
+                # A fifth of the deadlines have already passed
+                booking_deadline=now + timedelta(days=rng.randint(-30, 120)),
+            ))
+            if len(batch) == 5000:
+                RoomPool.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            RoomPool.objects.bulk_create(batch)
+
+        joined = RoomPool.objects.filter(visibility='public').values_list('id', flat=True)[:500]
+        RoomPoolMember.objects.bulk_create([
+            RoomPoolMember(pool_id=pool_id, user=viewer, status='approved', share_amount=0)
+            for pool_id in joined
+        ])
+
+        if connection.vendor in ('postgresql', 'sqlite'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE roompooling_roompool')
+                cursor.execute('ANALYZE roompooling_roompoolmember')
+
+        self.stdout.write(f'Seeded {count} pools in {time.perf_counter() - started:.1f}s')
+        return viewer
+
+    def _run(self, viewer, repeat, explain):
+        factory = APIRequestFactory()
+        view = PublicPoolsView.as_view()
+
+        self.stdout.write(f"{'query':<16}{'results':>9}{'rows':>6}{'anon ms':>9}{'user ms':>9}{'queries':>9}")
+        for label, params in QUERIES:
+            timings = {'anon': [], 'user': []}
+            for _ in range(repeat):
+                for who in timings:
+                    request = factory.get('/api/roompooling/discover/', params)
+                    if who == 'user':
+                        force_authenticate(request, user=viewer)
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        response = view(request)
+                        timings[who].append(time.perf_counter() - started)
+
+            self.stdout.write(
+                f"{label:<16}{response.data['count']:>9}{len(response.data['results']):>6}"
+                f"{min(timings['anon']) * 1000:>9.1f}{min(timings['user']) * 1000:>9.1f}"
+                f'{len(queries.captured_queries):>9}'
+            )
+            if explain:
+                self.stdout.write(discover_pools(params).order_by('-created_at')[:10].explain())
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from roompooling.ledger import replay
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the pool payment ledger and compare every entry, member balance and pool '
+        'balance with what the entries add up to. Exits with an error on any drift.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', action='append', dest='pools', help='Only this pool id (repeatable)')
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted member and pool balances from the ledger')
+
+    def handle(self, *args, **options):
+        drift = replay(options['pools'], fix=options['fix'])
+        for kind, object_id, stored, replayed in drift:
+            self.stdout.write(f'{kind} {object_id}: stored {stored}, ledger {replayed}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Ledger and balances agree'))
+        elif options['fix']:
+            # balance_after on entries is history: reported, never rewritten
+            fixed = sum(1 for kind, _, _, _ in drift if kind != 'entry')
+            self.stdout.write(self.style.SUCCESS(f'Fixed {fixed} balance(s)'))
+        else:
+            raise CommandError(f'{len(drift)} balance(s) differ from the ledger')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from roompooling.match_lists import rebuild_match_lists
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored roommate match lists from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profile_ids',
+                            help='Build this profile\'s list, even if it has none yet (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_match_lists(options['profile_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} match lists'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from roompooling.membership import reconcile_pool_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute RoomPool.current_members and open/full status from approved RoomPoolMember rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', action='append', dest='pools', help='Only this pool id (repeatable)')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        fixes = reconcile_pool_counters(options['pools'], dry_run=options['dry_run'])
+        for pool_id, old_count, new_count, old_status, new_status in fixes:
+            self.stdout.write(f'{pool_id}: members {old_count} -> {new_count}, status {old_status} -> {new_status}')
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(fixes)} pool(s) out of sync'))
@@ -0,0 +1,103 @@
+import threading
+import uuid
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from property.models import Property
+from roompooling.membership import reconcile_pool_counters
+from roompooling.models import RoomPool, RoomPoolMember
+from roompooling.views import RoomPoolViewSet
+from useraccount.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire parallel joins at one auto-approving pool and check it fills exactly to '
+        'capacity with a counter that matches its members. The test pool and property '
+        'are deleted afterwards; the stress-* users are reused between runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=50)
+        parser.add_argument('--capacity', type=int, default=6)
+
+    def handle(self, *args, **options):
+        attempts = options['attempts']
+        capacity = options['capacity']
+        tag = uuid.uuid4().hex[:8]
+
+        host, _ = User.objects.get_or_create(email='stress-host@example.com', defaults={'name': 'Stress Host'})
+        creator, _ = User.objects.get_or_create(email='stress-pool-creator@example.com', defaults={'name': 'Stress Creator'})
+        joiners = [
+            User.objects.get_or_create(email=f'stress-guest-{i}@example.com', defaults={'name': f'Stress Guest {i}'})[0]
+            for i in range(attempts)
+        ]
+        prop = Property.objects.create(
+            title=f'Stress pool property {tag}', description='stress_pool_joins', price_per_night=100,
+            bedrooms=3, bathrooms=1, guests=capacity, country='France', country_code='FR',
+            category='Villas', image='uploads/properties/stress.jpg', Host=host, allow_room_pooling=True,
+        )
+        check_in = date.today() + timedelta(days=30)
+        pool = RoomPool.objects.create(
+            title=f'Stress pool {tag}', property=prop, creator=creator,
+            check_in_date=check_in, check_out_date=check_in + timedelta(days=3),
+            max_members=capacity, total_price=Decimal('900.00'),
+            price_per_person=(Decimal('900.00') / capacity).quantize(Decimal('0.01')),
+            visibility='public', use_compatibility_matching=False,
+            booking_deadline=timezone.now() + timedelta(days=7),
+        )
+        RoomPoolMember.objects.create(
+            pool=pool, user=creator, status='approved', is_creator=True, share_amount=pool.price_per_person,
+        )
+
+        factory = APIRequestFactory()
+        view = RoomPoolViewSet.as_view({'post': 'join'})
+        barrier = threading.Barrier(attempts)
+        results = Counter()
+        lock = threading.Lock()
+
+        def attempt(i):
+            request = factory.post(f'/api/roompooling/pools/{pool.id}/join/', {}, format='json')
+            force_authenticate(request, user=joiners[i])
+            try:
+                barrier.wait()
+                response = view(request, pk=pool.id)
+                outcome = response.status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            finally:
+                connection.close()
+            with lock:
+                results[outcome] += 1
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(attempts)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            pool.refresh_from_db()
+            approved = pool.members.filter(status='approved').count()
+            drift = reconcile_pool_counters([pool.id], dry_run=True)
+            for outcome, count in sorted(results.items(), key=str):
+                self.stdout.write(f'{outcome}: {count}')
+            self.stdout.write(
+                f'approved members: {approved}, current_members: {pool.current_members}, '
+                f'max_members: {pool.max_members}, status: {pool.status}'
+            )
+        finally:
+            prop.delete()
+
+        expected_joins = min(attempts, capacity - 1)
+        if approved > capacity or drift or results[200] != approved - 1:
+            raise CommandError('Pool counters drifted from its members')
+        if results[200] != expected_joins:
+            raise CommandError(f'Expected {expected_joins} successful joins, got {results[200]}')
+        self.stdout.write(self.style.SUCCESS(f'Pool filled to {approved}/{capacity} with no drift'))
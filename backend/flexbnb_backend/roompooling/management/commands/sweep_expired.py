@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from roompooling.expiry import BATCH_SIZE, sweep
+
+
+class Command(BaseCommand):
+    help = 'Expire pending pool invitations and close pools past their booking deadline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--every', type=int, help='Keep running, sweeping every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = sweep(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Expired {counts['invitations_expired']} invitation(s), closed {counts['pools_closed']} pool(s)"
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,199 @@
+"""
+Precomputed roommate match lists.
+
+Each RoommateMatchList holds a profile's best LIST_SIZE candidates, ranked
+as the vectorized scorer ranks them (equal scores may be ordered
+differently until the next full rebuild). A list is built in full when
+its owner first asks for matches or changes their own profile. When
+someone else's profile changes, only the lists that profile can enter,
+move within or leave are patched. A list is rebuilt in full only when a
+listed profile drops out and its replacement is unknown.
+
+Refreshes are queued on transaction commit and run on a background
+thread (ROOMMATE_MATCH_ASYNC = False runs them inline instead).
+"""
+import logging
+import queue
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .matching import MATRIX_FIELDS, MIN_MATCH_SCORE, ProfileMatrix, top_matches
+from .models import RoommateMatchList, RoommateProfile
+
+
+logger = logging.getLogger(__name__)
+
+LIST_SIZE = getattr(settings, 'ROOMMATE_MATCH_LIST_SIZE', 50)
+
+# Profile fields that affect anyone's match list
+SNAPSHOT_FIELDS = MATRIX_FIELDS + ('interests', 'is_looking_for_roommate')
+
+
+def profile_snapshot(profile):
+    # Read from __dict__ so deferred fields are never loaded from here
+    return {field: profile.__dict__.get(field) for field in SNAPSHOT_FIELDS}
+
+
+def looking_profiles():
+    return RoommateProfile.objects.filter(is_looking_for_roommate=True)
+
+
+class IndexedMatrix(ProfileMatrix):
+    """ProfileMatrix that also maps each key back to its row"""
+    def __init__(self, rows):
+        super().__init__(rows)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+
+
+def _ranked(matrix, scores, exclude_id=None):
+    if exclude_id is not None and exclude_id in matrix.index:
+        scores = scores.copy()
+        scores[matrix.index[exclude_id]] = -1
+    winners, total = top_matches(scores, LIST_SIZE)
+    return [[str(matrix.keys[i]), int(scores[i])] for i in winners], total
+
+
+def refresh_match_list(profile, matrix=None):
+    """Build ``profile``'s list from scratch; ``matrix`` may be shared between calls"""
+    if matrix is None:
+        matrix = IndexedMatrix.from_queryset(looking_profiles().exclude(id=profile.id))
+    matches, total = _ranked(matrix, matrix.scores(profile), exclude_id=profile.id)
+    match_list, _ = RoommateMatchList.objects.update_or_create(
+        profile=profile,
+        defaults={'matches': matches, 'total_found': total, 'computed_at': timezone.now()},
+    )
+    return match_list
+
+
+def rebuild_match_lists(profile_ids=None):
+    """Rebuild every stored list (or the given profiles' lists). Returns the count."""
+    matrix = IndexedMatrix.from_queryset(looking_profiles())
+    profiles = RoommateProfile.objects.all()
+    if profile_ids is None:
+        profiles = profiles.filter(match_list__isnull=False)
+    else:
+        profiles = profiles.filter(id__in=profile_ids)
+
+    count = 0
+    for profile in profiles.iterator(chunk_size=1000):
+        refresh_match_list(profile, matrix)
+        count += 1
+    return count
+
+
+def _insert(matches, profile_id, score):
+    # The changed profile was just saved, so it is the most recently active
+    # and ranks ahead of equal scores, as in a fresh computation
+    position = next((i for i, (_, s) in enumerate(matches) if s <= score), len(matches))
+    matches.insert(position, [profile_id, score])
+    del matches[LIST_SIZE:]
+
+
+def apply_profile_change(profile_id, before=None):
+    """
+    Bring match lists in line with a change to one profile.
+
+    ``before`` is the profile's snapshot (profile_snapshot) prior to the
+    change, None if it was just created. A profile that no longer exists
+    counts as not looking.
+    """
+    profile = RoommateProfile.objects.filter(id=profile_id).first()
+
+    if profile is not None and RoommateMatchList.objects.filter(profile=profile).exists():
+        refresh_match_list(profile)
+
+    owners = IndexedMatrix.from_queryset(
+        RoommateProfile.objects.filter(match_list__isnull=False).exclude(id=profile_id)
+    )
+    if not len(owners):
+        return
+
+    def scores_for(state):
+        if state is None or not state.is_looking_for_roommate:
+            return np.full(len(owners), -1, dtype=np.int16)
+        return owners.scores(state, reverse=True)
+
+    old = scores_for(SimpleNamespace(**before) if before else None)
+    new = scores_for(profile)
+    touched = np.flatnonzero(((old > MIN_MATCH_SCORE) | (new > MIN_MATCH_SCORE)) & (old != new))
+
+    key = str(profile_id)
+    rebuild = []
+    for i in touched:
+        owner_id = owners.keys[i]
+        old_score, new_score = int(old[i]), int(new[i])
+        with transaction.atomic():
+            match_list = RoommateMatchList.objects.select_for_update().filter(profile_id=owner_id).first()
+            if match_list is None:
+                continue
+            listed = match_list.matches
+            matches = [entry for entry in listed if entry[0] != key]
+            was_listed = len(matches) != len(listed)
+            # Qualifying candidates beyond the list all score at most the last entry
+            truncated = match_list.total_found > len(listed)
+
+            match_list.total_found += int(new_score > MIN_MATCH_SCORE) - int(old_score > MIN_MATCH_SCORE)
+            if new_score > MIN_MATCH_SCORE and (not truncated or new_score >= listed[-1][1]):
+                _insert(matches, key, new_score)
+            elif was_listed and truncated:
+                # Its slot may belong to someone not on the list; recompute
+                rebuild.append(owner_id)
+                continue
+            elif not was_listed:
+                match_list.save(update_fields=['total_found', 'updated_at'])
+                continue
+
+            match_list.matches = matches
+            match_list.save(update_fields=['matches', 'total_found', 'updated_at'])
+
+    if rebuild:
+        matrix = IndexedMatrix.from_queryset(looking_profiles())
+        for owner in RoommateProfile.objects.filter(id__in=rebuild):
+            refresh_match_list(owner, matrix)
+
+
+_jobs = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        profile_id, before = _jobs.get()
+        try:
+            apply_profile_change(profile_id, before)
+        except Exception:
+            logger.exception('Roommate match refresh failed for profile %s', profile_id)
+        finally:
+            close_old_connections()
+            _jobs.task_done()
+
+
+def _start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name='roommate-matches', daemon=True)
+            _worker.start()
+
+
+def schedule_profile_change(profile_id, before=None):
+    """Refresh the affected match lists once the current transaction commits"""
+    def enqueue():
+        if getattr(settings, 'ROOMMATE_MATCH_ASYNC', True):
+            _start_worker()
+            _jobs.put((profile_id, before))
+        else:
+            apply_profile_change(profile_id, before)
+
+    transaction.on_commit(enqueue)
+
+
+def wait_for_refreshes():
+    """Block until queued refreshes have run (management commands, tests)"""
+    _jobs.join()
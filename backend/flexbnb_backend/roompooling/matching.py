@@ -0,0 +1,278 @@
+"""
+Roommate compatibility scoring.
+
+compatibility() is the reference six-factor scorer for one pair of
+profiles. ProfileMatrix encodes many profiles into NumPy arrays (category
+codes plus an interest bitset) so one profile can be scored against all
+of them in a single vectorized pass; top_matches() then ranks exactly as
+sorting compatibility() scores would, ties kept in candidate order.
+"""
+import numpy as np
+
+from .models import RoommateProfile
+
+
+CLEANLINESS_RANK = {value: rank for rank, (value, _) in enumerate(RoommateProfile.CLEANLINESS_CHOICES)}
+
+# Fields read by the vectorized scorer, in ProfileMatrix column order
+MATRIX_FIELDS = ('gender', 'preferred_gender', 'sleep_schedule', 'cleanliness', 'noise_preference', 'smoking')
+
+MIN_MATCH_SCORE = 40
+
+# Raw points (0-100) -> reported percentage, as compatibility() rounds it
+PERCENT = np.array([int((points / 100) * 100) for points in range(101)], dtype=np.int16)
+
+
+def compatibility(profile1, profile2):
+    """Calculate compatibility score between two profiles"""
+    score = 0
+    max_score = 0
+    reasons = []
+    breakdown = {}
+
+    # Gender preference match (15 points)
+    max_score += 15
+    if (profile1.preferred_gender == 'no_preference' or
+        profile1.preferred_gender == profile2.gender):
+        if (profile2.preferred_gender == 'no_preference' or
+            profile2.preferred_gender == profile1.gender):
+            score += 15
+            breakdown['gender'] = {'score': 15, 'max': 15}
+        else:
+            score += 7
+            breakdown['gender'] = {'score': 7, 'max': 15}
+    else:
+        breakdown['gender'] = {'score': 0, 'max': 15}
+
+    # Sleep schedule (20 points)
+    max_score += 20
+    if profile1.sleep_schedule == profile2.sleep_schedule:
+        score += 20
+        reasons.append(f"Same sleep schedule ({profile1.get_sleep_schedule_display()})")
+        breakdown['sleep'] = {'score': 20, 'max': 20}
+    elif 'flexible' in [profile1.sleep_schedule, profile2.sleep_schedule]:
+        score += 15
+        breakdown['sleep'] = {'score': 15, 'max': 20}
+    else:
+        breakdown['sleep'] = {'score': 0, 'max': 20}
+
+    # Cleanliness (20 points)
+    max_score += 20
+    if profile1.cleanliness == profile2.cleanliness:
+        score += 20
+        reasons.append("Similar cleanliness standards")
+        breakdown['cleanliness'] = {'score': 20, 'max': 20}
+    elif abs(CLEANLINESS_RANK[profile1.cleanliness] - CLEANLINESS_RANK[profile2.cleanliness]) == 1:
+        score += 10
+        breakdown['cleanliness'] = {'score': 10, 'max': 20}
+    else:
+        breakdown['cleanliness'] = {'score': 0, 'max': 20}
+
+    # Noise preference (15 points)
+    max_score += 15
+    if profile1.noise_preference == profile2.noise_preference:
+        score += 15
+        reasons.append(f"Both prefer {profile1.get_noise_preference_display()}")
+        breakdown['noise'] = {'score': 15, 'max': 15}
+    elif 'moderate' in [profile1.noise_preference, profile2.noise_preference]:
+        score += 8
+        breakdown['noise'] = {'score': 8, 'max': 15}
+    else:
+        breakdown['noise'] = {'score': 0, 'max': 15}
+
+    # Smoking (15 points)
+    max_score += 15
+    smoke1 = profile1.smoking
+    smoke2 = profile2.smoking
+    if smoke1 == smoke2:
+        score += 15
+        breakdown['smoking'] = {'score': 15, 'max': 15}
+    elif 'no_preference' in [smoke1, smoke2]:
+        score += 12
+        breakdown['smoking'] = {'score': 12, 'max': 15}
+    elif ('non_smoker' in [smoke1, smoke2] and 'smoker' in [smoke1, smoke2]):
+        score += 0  # Non-smoker with smoker = bad match
+        breakdown['smoking'] = {'score': 0, 'max': 15}
+    else:
+        score += 7
+        breakdown['smoking'] = {'score': 7, 'max': 15}
+
+    # Shared interests (15 points)
+    max_score += 15
+    if profile1.interests and profile2.interests:
+        shared = set(profile1.interests) & set(profile2.interests)
+        if len(shared) >= 3:
+            score += 15
+            reasons.append(f"Share {len(shared)} interests: {', '.join(list(shared)[:3])}")
+            breakdown['interests'] = {'score': 15, 'max': 15, 'shared': list(shared)}
+        elif len(shared) >= 1:
+            score += len(shared) * 5
+            breakdown['interests'] = {'score': len(shared) * 5, 'max': 15, 'shared': list(shared)}
+        else:
+            breakdown['interests'] = {'score': 0, 'max': 15, 'shared': []}
+    else:
+        breakdown['interests'] = {'score': 5, 'max': 15}  # No data, neutral
+        score += 5
+
+    # Calculate percentage
+    final_score = int((score / max_score) * 100) if max_score > 0 else 0
+
+    return final_score, reasons, breakdown
+
+
+class _Codes:
+    """Stable small-integer codes for the values of one categorical field"""
+    def __init__(self, choices):
+        self.codes = {value: code for code, (value, _) in enumerate(choices)}
+
+    def __call__(self, value):
+        return self.codes.setdefault(value, len(self.codes))
+
+
+_GENDER = _Codes(RoommateProfile.GENDER_CHOICES)
+_CODES = {
+    'gender': _GENDER,
+    'preferred_gender': _GENDER,
+    'sleep_schedule': _Codes(RoommateProfile.SLEEP_SCHEDULE_CHOICES),
+    'cleanliness': _Codes(RoommateProfile.CLEANLINESS_CHOICES),
+    'noise_preference': _Codes(RoommateProfile.NOISE_CHOICES),
+    'smoking': _Codes(RoommateProfile.SMOKING_CHOICES),
+}
+
+NO_PREFERENCE = _GENDER('no_preference')
+FLEXIBLE = _CODES['sleep_schedule']('flexible')
+MODERATE_NOISE = _CODES['noise_preference']('moderate')
+SMOKING_NO_PREFERENCE = _CODES['smoking']('no_preference')
+SMOKER = _CODES['smoking']('smoker')
+NON_SMOKER = _CODES['smoking']('non_smoker')
+# Values outside CLEANLINESS_CHOICES are never "one step apart" from anything
+UNRANKED = 1000
+
+
+class ProfileMatrix:
+    """
+    Compact encoding of many profiles: one int16 column per categorical
+    field, the cleanliness rank, and the interests as a bitset of uint64
+    words over this matrix's own interest vocabulary.
+    """
+
+    def __init__(self, rows):
+        """``rows`` are (key, *MATRIX_FIELDS values, interests) tuples"""
+        self.keys = []
+        self.vocabulary = {}
+        codes = [_CODES[field] for field in MATRIX_FIELDS]
+        categories, ranks, has_interests = [], [], []
+        bit_rows, bits = [], []
+        for i, row in enumerate(rows):
+            self.keys.append(row[0])
+            values, interests = row[1:-1], row[-1]
+            categories.append([code(value) for code, value in zip(codes, values)])
+            ranks.append(CLEANLINESS_RANK.get(values[3], UNRANKED))
+            has_interests.append(bool(interests))
+            for interest in set(interests or ()):
+                bit_rows.append(i)
+                bits.append(self.vocabulary.setdefault(interest, len(self.vocabulary)))
+
+        self.categories = np.array(categories, dtype=np.int16).reshape(-1, len(MATRIX_FIELDS))
+        self.cleanliness_rank = np.array(ranks, dtype=np.int16)
+        self.has_interests = np.array(has_interests, dtype=bool)
+        self.words = max(1, -(-len(self.vocabulary) // 64))
+        self.interests = np.zeros((len(self.keys), self.words), dtype=np.uint64)
+        bits = np.array(bits, dtype=np.uint64)
+        np.bitwise_or.at(
+            self.interests,
+            (np.array(bit_rows, dtype=np.intp), (bits // np.uint64(64)).astype(np.intp)),
+            np.left_shift(np.uint64(1), bits % np.uint64(64)),
+        )
+
+    @classmethod
+    def from_queryset(cls, queryset, key='id'):
+        return cls(queryset.values_list(key, *MATRIX_FIELDS, 'interests').iterator(chunk_size=5000))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def column(self, field):
+        return self.categories[:, MATRIX_FIELDS.index(field)]
+
+    def _interest_mask(self, interests):
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for interest in set(interests or ()):
+            bit = self.vocabulary.get(interest)
+            if bit is not None:
+                mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask
+
+    def scores(self, profile, rows=None, reverse=False):
+        """
+        Compatibility percentages of ``profile`` against every row (or the
+        ``rows`` index array), identical to compatibility(profile, row)[0].
+        With ``reverse`` each row is the one asking: compatibility(row, profile)[0].
+        """
+        categories = self.categories if rows is None else self.categories[rows]
+        gender, preferred_gender, sleep, cleanliness, noise, smoking = categories.T
+        rank = self.cleanliness_rank if rows is None else self.cleanliness_rank[rows]
+        has_interests = self.has_interests if rows is None else self.has_interests[rows]
+        interests = self.interests if rows is None else self.interests[rows]
+
+        own = {field: _CODES[field](getattr(profile, field)) for field in MATRIX_FIELDS}
+
+        # Gender preference (15)
+        they_suit_me = (own['preferred_gender'] == NO_PREFERENCE) | (own['preferred_gender'] == gender)
+        i_suit_them = (preferred_gender == NO_PREFERENCE) | (preferred_gender == own['gender'])
+        if reverse:
+            # Only the gender factor depends on who is asking
+            they_suit_me, i_suit_them = i_suit_them, they_suit_me
+        points = np.where(they_suit_me, np.where(i_suit_them, 15, 7), 0).astype(np.int16)
+
+        # Sleep schedule (20)
+        same = sleep == own['sleep_schedule']
+        either_flexible = (sleep == FLEXIBLE) | (own['sleep_schedule'] == FLEXIBLE)
+        points += np.where(same, 20, np.where(either_flexible, 15, 0)).astype(np.int16)
+
+        # Cleanliness (20)
+        same = cleanliness == own['cleanliness']
+        own_rank = CLEANLINESS_RANK.get(profile.cleanliness, UNRANKED)
+        adjacent = np.abs(rank - own_rank) == 1
+        points += np.where(same, 20, np.where(adjacent, 10, 0)).astype(np.int16)
+
+        # Noise (15)
+        same = noise == own['noise_preference']
+        either_moderate = (noise == MODERATE_NOISE) | (own['noise_preference'] == MODERATE_NOISE)
+        points += np.where(same, 15, np.where(either_moderate, 8, 0)).astype(np.int16)
+
+        # Smoking (15)
+        same = smoking == own['smoking']
+        either_indifferent = (smoking == SMOKING_NO_PREFERENCE) | (own['smoking'] == SMOKING_NO_PREFERENCE)
+        clash = (
+            ((smoking == SMOKER) & (own['smoking'] == NON_SMOKER))
+            | ((smoking == NON_SMOKER) & (own['smoking'] == SMOKER))
+        )
+        points += np.where(same, 15, np.where(either_indifferent, 12, np.where(clash, 0, 7))).astype(np.int16)
+
+        # Shared interests (15), or a neutral 5 when either side has none
+        if profile.interests:
+            shared = np.bitwise_count(interests & self._interest_mask(profile.interests)).sum(axis=1)
+            points += np.where(has_interests, np.minimum(shared * 5, 15), 5).astype(np.int16)
+        else:
+            points += 5
+
+        return PERCENT[points]
+
+
+def top_matches(scores, k, min_score=MIN_MATCH_SCORE):
+    """
+    Indices of the best ``k`` scores above ``min_score``, highest first and
+    ties in original order, plus how many scores cleared ``min_score``.
+    """
+    eligible = np.flatnonzero(scores > min_score)
+    total = len(eligible)
+    if total > k:
+        eligible_scores = scores[eligible]
+        kth = np.argpartition(-eligible_scores, k - 1)[:k]
+        threshold = eligible_scores[kth].min()
+        above = eligible[eligible_scores > threshold]
+        tied = eligible[eligible_scores == threshold][:k - len(above)]
+        eligible = np.concatenate([above, tied])
+    order = np.lexsort((eligible, -scores[eligible].astype(np.int32)))
+    return eligible[order], total
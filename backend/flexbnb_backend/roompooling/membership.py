@@ -0,0 +1,213 @@
+"""
+Pool membership transitions.
+
+Every change to who is in a pool goes through here, so RoomPool's
+current_members counter and open/full status only ever move together with
+a member row, inside one transaction:
+
+- a seat is taken with a single conditional UPDATE (status = 'open' and
+  current_members < max_members, both re-checked under the row lock), so
+  concurrent joins can never oversubscribe a pool; the same statement
+  flips the pool to 'full' when it takes the last seat
+- a member's own status changes with a conditional UPDATE too (pending ->
+  approved, approved -> left), so a double click never counts twice
+- check constraints on RoomPool (capacity, open/full consistency) reject
+  anything that slips past
+
+reconcile_pool_counters() recomputes the counters from RoomPoolMember for
+anything written outside this module.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from .chat import broadcast_member_removed
+from .cost_split import apply_cost_split
+from .ledger import member_joined, member_left
+from .models import RoomPool, RoomPoolMember
+
+
+# Pool statuses the counters move between; the others are left alone
+SEAT_STATUSES = ('open', 'full')
+
+
+class MembershipConflict(Exception):
+    pass
+
+
+def _take_seat(pool):
+    taken = RoomPool.objects.filter(
+        pk=pool.pk,
+        status='open',
+        current_members__lt=F('max_members'),
+    ).update(
+        current_members=F('current_members') + 1,
+        # Right-hand sides see the row before the update
+        status=Case(
+            When(current_members__gte=F('max_members') - 1, then=Value('full')),
+            default=F('status'),
+        ),
+        updated_at=timezone.now(),
+    )
+    if not taken:
+        pool.refresh_from_db(fields=['status', 'current_members', 'max_members'])
+        if pool.status in SEAT_STATUSES and pool.is_full():
+            raise MembershipConflict('This pool is full')
+        raise MembershipConflict('This pool is not accepting new members')
+
+
+def _free_seat(pool):
+    RoomPool.objects.filter(pk=pool.pk, current_members__gt=0).update(
+        current_members=F('current_members') - 1,
+        status=Case(When(status='full', then=Value('open')), default=F('status')),
+        updated_at=timezone.now(),
+    )
+
+
+def _sync(pool):
+    pool.refresh_from_db(fields=['status', 'current_members', 'updated_at'])
+    apply_cost_split(pool)
+
+
+def join_pool(pool, user, approve, **fields):
+    """
+    Add ``user`` to ``pool``: approved at once (taking a seat) or pending
+    the creator's approval. ``fields`` go on the member row. A user who
+    left or was rejected before rejoins on their old row.
+    """
+    if pool.creator_id == user.pk:
+        raise MembershipConflict('You are the creator of this pool')
+
+    values = {
+        'status': 'approved' if approve else 'pending',
+        'approved_at': timezone.now() if approve else None,
+        **fields,
+    }
+    with transaction.atomic():
+        if approve:
+            _take_seat(pool)
+        else:
+            pool.refresh_from_db(fields=['status', 'current_members', 'max_members'])
+            if pool.status != 'open' or pool.is_full():
+                raise MembershipConflict('This pool is not accepting new members')
+
+        rejoined = RoomPoolMember.objects.filter(
+            pool=pool,
+            user=user,
+            status__in=['rejected', 'left', 'removed'],
+        ).update(**values)
+        if not rejoined:
+            try:
+                with transaction.atomic():
+                    RoomPoolMember.objects.create(pool=pool, user=user, **values)
+            except IntegrityError:
+                raise MembershipConflict('You already have a pending request or membership')
+
+        member = RoomPoolMember.objects.get(pool=pool, user=user)
+        if approve:
+            if rejoined:
+                # Whatever they paid before leaving counts towards the pool again
+                member_joined(member.pk)
+            _sync(pool)
+    return member
+
+
+def approve_member(pool, member_id):
+    """Approve a pending request, taking a seat"""
+    with transaction.atomic():
+        approved = RoomPoolMember.objects.filter(id=member_id, pool=pool, status='pending').update(
+            status='approved',
+            approved_at=timezone.now(),
+        )
+        if not approved:
+            raise MembershipConflict('Member not found')
+        member_joined(member_id)
+        _take_seat(pool)
+        _sync(pool)
+    return RoomPoolMember.objects.select_related('user').get(id=member_id)
+
+
+def reject_member(pool, member_id):
+    rejected = RoomPoolMember.objects.filter(id=member_id, pool=pool, status='pending').update(status='rejected')
+    if not rejected:
+        raise MembershipConflict('Member not found')
+
+
+def leave_pool(pool, user, status='left'):
+    """An approved member leaves (or, with status='removed', is removed), freeing their seat"""
+    if pool.creator_id == user.pk:
+        raise MembershipConflict('Creator cannot leave the pool. Cancel it instead.')
+    with transaction.atomic():
+        left = RoomPoolMember.objects.filter(pool=pool, user=user, status='approved').update(status=status)
+        if not left:
+            raise MembershipConflict('You are not a member of this pool')
+        # Leaving refunds nothing; their payments just stop counting towards the pool
+        member_left(RoomPoolMember.objects.get(pool=pool, user=user).pk)
+        _free_seat(pool)
+        _sync(pool)
+        broadcast_member_removed(pool.id, user.pk)
+
+
+def accept_invitation(invitation, user):
+    """Join the invitation's pool as an approved member and mark the invitation accepted"""
+    pool = invitation.pool
+    with transaction.atomic():
+        _take_seat(pool)
+        approved_at = timezone.now()
+        promoted = RoomPoolMember.objects.filter(pool=pool, user=user).exclude(status='approved').update(
+            status='approved',
+            approved_at=approved_at,
+        )
+        if promoted:
+            member_joined(RoomPoolMember.objects.get(pool=pool, user=user).pk)
+        else:
+            try:
+                with transaction.atomic():
+                    RoomPoolMember.objects.create(
+                        pool=pool,
+                        user=user,
+                        status='approved',
+                        approved_at=approved_at,
+                        share_amount=pool.price_per_person + pool.booking_fee_per_person,
+                    )
+            except IntegrityError:
+                raise MembershipConflict('You are already a member of this pool')
+        invitation.status = 'accepted'
+        invitation.responded_at = approved_at
+        invitation.save()
+        _sync(pool)
+    return RoomPoolMember.objects.get(pool=pool, user=user)
+
+
+def reconcile_pool_counters(pool_ids=None, dry_run=False):
+    """
+    Recompute current_members from approved RoomPoolMember rows, and
+    open/full from that, for every pool (or ``pool_ids``). Returns
+    [(pool id, old count, new count, old status, new status)] for pools
+    that were off.
+    """
+    pools = RoomPool.objects.annotate(approved=Count('members', filter=Q(members__status='approved')))
+    if pool_ids is not None:
+        pools = pools.filter(id__in=pool_ids)
+
+    fixes = []
+    for pool in pools.iterator(chunk_size=2000):
+        count = pool.approved
+        new_status = pool.status
+        if pool.status in SEAT_STATUSES:
+            new_status = 'full' if count >= pool.max_members else 'open'
+        if count == pool.current_members and new_status == pool.status:
+            continue
+        fixes.append((pool.id, pool.current_members, count, pool.status, new_status))
+        if dry_run:
+            continue
+        with transaction.atomic():
+            locked = RoomPool.objects.select_for_update().get(pk=pool.pk)
+            count = locked.members.filter(status='approved').count()
+            locked.current_members = count
+            # An oversubscribed pool keeps its members; capacity grows to fit them
+            locked.max_members = max(locked.max_members, count)
+            if locked.status in SEAT_STATUSES:
+                locked.status = 'full' if count >= locked.max_members else 'open'
+            locked.save(update_fields=['current_members', 'max_members', 'status', 'updated_at'])
+    return fixes
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roompooling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoommateMatchList',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='match_list', serialize=False, to='roompooling.roommateprofile')),
+                ('matches', models.JSONField(default=list)),
+                ('total_found', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:33
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def read_lists_to_cursors(apps, schema_editor):
+    """Each reader's cursor is the newest message (not their own) they had read"""
+    PoolChat = apps.get_model('roompooling', 'PoolChat')
+    PoolChatReadCursor = apps.get_model('roompooling', 'PoolChatReadCursor')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    cursors = {}
+    messages = PoolChat.objects.exclude(is_read_by=[]).values_list('pool_id', 'sender_id', 'created_at', 'is_read_by')
+    for pool_id, sender_id, created_at, is_read_by in messages.iterator(chunk_size=2000):
+        for user_id in is_read_by or ():
+            if user_id == str(sender_id) or not _is_uuid(user_id):
+                continue
+            key = (pool_id, user_id)
+            if key not in cursors or cursors[key] < created_at:
+                cursors[key] = created_at
+
+    existing = {str(pk) for pk in User.objects.filter(pk__in={user_id for _, user_id in cursors}).values_list('pk', flat=True)}
+    PoolChatReadCursor.objects.bulk_create(
+        [
+            PoolChatReadCursor(pool_id=pool_id, user_id=user_id, last_read_at=last_read_at)
+            for (pool_id, user_id), last_read_at in cursors.items()
+            if user_id in existing
+        ],
+        batch_size=1000,
+    )
+
+
+def cursors_to_read_lists(apps, schema_editor):
+    PoolChat = apps.get_model('roompooling', 'PoolChat')
+    PoolChatReadCursor = apps.get_model('roompooling', 'PoolChatReadCursor')
+
+    for cursor in PoolChatReadCursor.objects.iterator(chunk_size=1000):
+        messages = PoolChat.objects.filter(pool_id=cursor.pool_id, created_at__lte=cursor.last_read_at)
+        for message in messages.iterator(chunk_size=1000):
+            message.is_read_by = message.is_read_by + [str(cursor.user_id)]
+            message.save(update_fields=['is_read_by'])
+    for message in PoolChat.objects.filter(sender__isnull=False).iterator(chunk_size=1000):
+        if str(message.sender_id) not in message.is_read_by:
+            message.is_read_by = [str(message.sender_id)] + message.is_read_by
+            message.save(update_fields=['is_read_by'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roompooling', '0002_roommatematchlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolChatReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='poolchat',
+            index=models.Index(fields=['pool', 'created_at'], name='poolchat_pool_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='poolchatreadcursor',
+            name='pool',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_cursors', to='roompooling.roompool'),
+        ),
+        migrations.AddField(
+            model_name='poolchatreadcursor',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pool_chat_cursors', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='poolchatreadcursor',
+            constraint=models.UniqueConstraint(fields=('pool', 'user'), name='unique_pool_chat_cursor'),
+        ),
+        migrations.RunPython(read_lists_to_cursors, cursors_to_read_lists),
+        migrations.RemoveField(
+            model_name='poolchat',
+            name='is_read_by',
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:39
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_property_locations(apps, schema_editor):
+    RoomPool = apps.get_model('roompooling', 'RoomPool')
+    Property = apps.get_model('property', 'Property')
+    location = Property.objects.filter(pk=models.OuterRef('property_id'))
+    RoomPool.objects.update(
+        location_country=models.Subquery(location.values('country')[:1]),
+        location_country_code=models.Subquery(location.values('country_code')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_hostdashboardstats'),
+        ('property', '0006_search_indexes'),
+        ('roompooling', '0003_poolchatreadcursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roompool',
+            name='location_country',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='roompool',
+            name='location_country_code',
+            field=models.CharField(blank=True, default='', max_length=10),
+        ),
+        migrations.RunPython(copy_property_locations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='roompool',
+            index=models.Index(fields=['visibility', 'status', 'booking_deadline', 'check_in_date'], name='roompool_discovery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roompool',
+            index=models.Index(fields=['visibility', '-created_at'], name='roompool_visibility_new_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roompool',
+            index=models.Index(django.db.models.functions.text.Upper('location_country'), models.F('visibility'), models.F('status'), models.F('booking_deadline'), name='roompool_country_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roompool',
+            index=models.Index(fields=['location_country_code', 'visibility', 'status', 'booking_deadline'], name='roompool_country_code_idx'),
+        ),
+    ]
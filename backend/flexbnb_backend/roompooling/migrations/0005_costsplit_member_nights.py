@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roompooling', '0004_pool_discovery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='costsplit',
+            name='member_nights',
+            field=models.JSONField(default=dict),
+        ),
+    ]
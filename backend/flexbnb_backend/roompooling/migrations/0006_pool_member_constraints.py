@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def recount_members(apps, schema_editor):
+    """Bring every pool in line with the constraints before adding them"""
+    RoomPool = apps.get_model('roompooling', 'RoomPool')
+    pools = RoomPool.objects.annotate(
+        approved=models.Count('members', filter=models.Q(members__status='approved')),
+    )
+    for pool in pools.iterator(chunk_size=2000):
+        current_members = pool.approved
+        # An oversubscribed pool keeps its members; capacity grows to fit them
+        max_members = max(pool.max_members, current_members)
+        status = pool.status
+        if status in ('open', 'full'):
+            status = 'full' if current_members >= max_members else 'open'
+        if (current_members, max_members, status) != (pool.current_members, pool.max_members, pool.status):
+            RoomPool.objects.filter(pk=pool.pk).update(
+                current_members=current_members,
+                max_members=max_members,
+                status=status,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_hostdashboardstats'),
+        ('property', '0006_search_indexes'),
+        ('roompooling', '0005_costsplit_member_nights'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_members, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='roompool',
+            constraint=models.CheckConstraint(condition=models.Q(('current_members__gte', 0), ('current_members__lte', models.F('max_members'))), name='roompool_members_within_capacity'),
+        ),
+        migrations.AddConstraint(
+            model_name='roompool',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('status', 'open'), _negated=True), ('current_members__lt', models.F('max_members')), _connector='OR'), name='roompool_open_has_space'),
+        ),
+        migrations.AddConstraint(
+            model_name='roompool',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('status', 'full'), _negated=True), ('current_members', models.F('max_members')), _connector='OR'), name='roompool_full_at_capacity'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:54
+
+from collections import defaultdict
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+EFFECT = {'payment': 1, 'refund': -1, 'adjustment': 1, 'settlement': 0}
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Replay existing transactions into balance_after, record the difference
+    from each member's amount_paid as an opening adjustment, and open a
+    balance row per pool that has collected anything.
+    """
+    PaymentTransaction = apps.get_model('roompooling', 'PaymentTransaction')
+    PoolBalance = apps.get_model('roompooling', 'PoolBalance')
+    RoomPoolMember = apps.get_model('roompooling', 'RoomPoolMember')
+
+    # finalize_booking used to re-record every member's paid amount as a payment
+    PaymentTransaction.objects.filter(transaction_type='payment', payment_method='pool_booking').update(
+        transaction_type='settlement',
+    )
+
+    running = defaultdict(Decimal)
+    entries = PaymentTransaction.objects.order_by('pool_member_id', 'created_at')
+    for entry in entries.iterator(chunk_size=2000):
+        if entry.status == 'completed':
+            running[entry.pool_member_id] += EFFECT[entry.transaction_type] * entry.amount
+            PaymentTransaction.objects.filter(pk=entry.pk).update(balance_after=running[entry.pool_member_id])
+
+    collected = defaultdict(Decimal)
+    openings = []
+    members = RoomPoolMember.objects.filter(amount_paid__gt=0) | RoomPoolMember.objects.filter(id__in=list(running))
+    for member in members.iterator(chunk_size=2000):
+        collected[member.pool_id] += member.amount_paid
+        difference = member.amount_paid - running[member.id]
+        if difference:
+            openings.append(PaymentTransaction(
+                pool_member_id=member.id,
+                transaction_type='adjustment',
+                amount=difference,
+                status='completed',
+                notes='Opening balance',
+                balance_after=member.amount_paid,
+            ))
+    PaymentTransaction.objects.bulk_create(openings, batch_size=2000)
+    PoolBalance.objects.bulk_create(
+        [PoolBalance(pool_id=pool_id, total_collected=total) for pool_id, total in collected.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roompooling', '0006_pool_member_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoolBalance',
+            fields=[
+                ('pool', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='roompooling.roompool')),
+                ('total_collected', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='paymenttransaction',
+            name='balance_after',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AlterField(
+            model_name='paymenttransaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('payment', 'Payment'), ('refund', 'Refund'), ('adjustment', 'Adjustment'), ('settlement', 'Settlement')], default='payment', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['pool_member', 'created_at'], name='paytx_member_created_idx'),
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
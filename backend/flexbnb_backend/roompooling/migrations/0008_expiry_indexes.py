@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-16 23:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0006_hostdashboardstats'),
+        ('property', '0006_search_indexes'),
+        ('roompooling', '0007_payment_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poolinvitation',
+            index=models.Index(fields=['status', 'expires_at'], name='pool_invitation_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roompool',
+            index=models.Index(fields=['status', 'booking_deadline'], name='roompool_deadline_idx'),
+        ),
+    ]
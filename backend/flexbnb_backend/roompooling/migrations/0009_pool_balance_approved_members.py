@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Sum
+
+
+def recount_balances(apps, schema_editor):
+    """PoolBalance now covers approved members only: re-sum it from their amount_paid"""
+    PoolBalance = apps.get_model('roompooling', 'PoolBalance')
+    RoomPoolMember = apps.get_model('roompooling', 'RoomPoolMember')
+
+    collected = dict(
+        RoomPoolMember.objects.filter(status='approved').order_by().values_list('pool_id').annotate(total=Sum('amount_paid'))
+    )
+    balances = list(PoolBalance.objects.all())
+    for balance in balances:
+        balance.total_collected = collected.pop(balance.pool_id, None) or Decimal('0')
+    PoolBalance.objects.bulk_update(balances, ['total_collected'], batch_size=2000)
+    PoolBalance.objects.bulk_create(
+        [PoolBalance(pool_id=pool_id, total_collected=total) for pool_id, total in collected.items() if total],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roompooling', '0008_expiry_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_balances, migrations.RunPython.noop),
+    ]
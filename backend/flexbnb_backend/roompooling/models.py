@@ -1,5 +1,6 @@
 import uuid
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from useraccount.models import User
@@ -92,6 +93,23 @@ class RoommateProfile(models.Model):
         ordering = ['-last_active']
 
 
+class RoommateMatchList(models.Model):
+    """
+    Precomputed best matches for one profile, kept current in the
+    background as profiles change (see roompooling.match_lists).
+    """
+    profile = models.OneToOneField(RoommateProfile, related_name='match_list', on_delete=models.CASCADE, primary_key=True)
+    
+    matches = models.JSONField(default=list)  # [[profile id, score], ...] best first
+    total_found = models.IntegerField(default=0)  # candidates scoring above the match threshold
+    
+    computed_at = models.DateTimeField()  # last full computation
+    updated_at = models.DateTimeField(auto_now=True)  # last change, incremental or full
+    
+    def __str__(self):
+        return f"Matches for {self.profile_id}"
+
+
 class RoomPool(models.Model):
     """A pool/group for shared room booking"""
     
@@ -133,6 +151,11 @@ class RoomPool(models.Model):
     price_per_person = models.DecimalField(max_digits=10, decimal_places=2)
     booking_fee_per_person = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
+    # Copied from the property so discovery filters never join it
+    # (set on save, kept current by roompooling.signals)
+    location_country = models.CharField(max_length=255, blank=True, default='')
+    location_country_code = models.CharField(max_length=10, blank=True, default='')
+    
     # Settings
     status = models.CharField(max_length=20, choices=POOL_STATUS_CHOICES, default='open')
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default='public')
@@ -171,8 +194,51 @@ class RoomPool(models.Model):
     def is_full(self):
         return self.current_members >= self.max_members
     
+    def save(self, *args, **kwargs):
+        if self.property_id and (self._state.adding or not self.location_country):
+            self.location_country = self.property.country
+            self.location_country_code = self.property.country_code
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'location_country', 'location_country_code'}
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Public discovery (roompooling.discovery)
+            models.Index(
+                fields=['visibility', 'status', 'booking_deadline', 'check_in_date'],
+                name='roompool_discovery_idx',
+            ),
+            # Newest-first pages without sorting every discoverable pool
+            models.Index(fields=['visibility', '-created_at'], name='roompool_visibility_new_idx'),
+            models.Index(
+                Upper('location_country'), 'visibility', 'status', 'booking_deadline',
+                name='roompool_country_idx',
+            ),
+            models.Index(
+                fields=['location_country_code', 'visibility', 'status', 'booking_deadline'],
+                name='roompool_country_code_idx',
+            ),
+            # Deadline sweeps (roompooling.expiry)
+            models.Index(fields=['status', 'booking_deadline'], name='roompool_deadline_idx'),
+        ]
+        constraints = [
+            # Membership counters (roompooling.membership)
+            models.CheckConstraint(
+                condition=models.Q(current_members__gte=0, current_members__lte=models.F('max_members')),
+                name='roompool_members_within_capacity',
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(status='open') | models.Q(current_members__lt=models.F('max_members')),
+                name='roompool_open_has_space',
+            ),
+            models.CheckConstraint(
+                condition=~models.Q(status='full') | models.Q(current_members=models.F('max_members')),
+                name='roompool_full_at_capacity',
+            ),
+        ]
 
 
 class RoomPoolMember(models.Model):
@@ -259,6 +325,9 @@ class CostSplit(models.Model):
     # Custom splits stored as JSON: {user_id: percentage}
     custom_percentages = models.JSONField(default=dict)
     
+    # By-nights splits: {user_id: nights}; members not listed stay every night
+    member_nights = models.JSONField(default=dict)
+    
     # Individual amounts: {user_id: amount}
     individual_amounts = models.JSONField(default=dict)
     
@@ -270,16 +339,11 @@ class CostSplit(models.Model):
     
     def calculate_equal_split(self):
         """Calculate equal split among members"""
-        member_count = self.pool.members.filter(status='approved').count()
-        if member_count > 0:
-            per_person = self.total_amount / member_count
-            members = self.pool.members.filter(status='approved')
-            self.individual_amounts = {
-                str(m.user.id): float(per_person) for m in members
-            }
-            self.save()
-            return per_person
-        return 0
+        from .cost_split import apply_cost_split
+        
+        apply_cost_split(self.pool, 'equal')
+        self.refresh_from_db()
+        return next(iter(self.individual_amounts.values()), 0)
 
 
 class PoolChat(models.Model):
@@ -303,8 +367,6 @@ class PoolChat(models.Model):
     # For system messages
     metadata = models.JSONField(default=dict)
     
-    is_read_by = models.JSONField(default=list)  # List of user IDs who read this
-    
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
@@ -312,6 +374,30 @@ class PoolChat(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Chat history and unread counts (roompooling.chat.unread_count)
+            models.Index(fields=['pool', 'created_at'], name='poolchat_pool_created_idx'),
+        ]
+
+
+class PoolChatReadCursor(models.Model):
+    """
+    How far one user has read a pool's chat: every message created at or
+    before last_read_at counts as read, as do the user's own messages.
+    """
+    pool = models.ForeignKey(RoomPool, related_name='chat_cursors', on_delete=models.CASCADE)
+    user = models.ForeignKey(User, related_name='pool_chat_cursors', on_delete=models.CASCADE)
+    last_read_at = models.DateTimeField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.user_id} read {self.pool_id} up to {self.last_read_at}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['pool', 'user'], name='unique_pool_chat_cursor'),
+        ]
 
 
 class PoolInvitation(models.Model):
@@ -346,15 +432,23 @@ class PoolInvitation(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Expiry sweeps (roompooling.expiry)
+            models.Index(fields=['status', 'expires_at'], name='pool_invitation_expiry_idx'),
+        ]
 
 
 class PaymentTransaction(models.Model):
-    """Track individual payment transactions for pool members"""
+    """
+    Track individual payment transactions for pool members. Rows are an
+    append-only ledger written through roompooling.ledger.
+    """
     
     TRANSACTION_TYPE_CHOICES = [
         ('payment', 'Payment'),
         ('refund', 'Refund'),
         ('adjustment', 'Adjustment'),
+        ('settlement', 'Settlement'),  # Paid amount applied to the pool booking
     ]
     
     STATUS_CHOICES = [
@@ -377,6 +471,9 @@ class PaymentTransaction(models.Model):
     
     notes = models.TextField(blank=True)
     
+    # Member's amount_paid once this entry was applied
+    balance_after = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
@@ -385,4 +482,18 @@ class PaymentTransaction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['pool_member', 'created_at'], name='paytx_member_created_idx'),
+        ]
+
+
+class PoolBalance(models.Model):
+    """What a pool's approved members have paid (roompooling.ledger), so reading it is one row"""
+    pool = models.OneToOneField(RoomPool, related_name='balance', on_delete=models.CASCADE, primary_key=True)
+    total_collected = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.pool_id}: ${self.total_collected} collected"
 
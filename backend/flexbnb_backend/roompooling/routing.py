@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+
+websocket_urlpatterns = [
+    path('ws/pools/<uuid:pool_id>/chat/', consumers.PoolChatConsumer.as_asgi()),
+]
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from .models import (
     RoommateProfile, RoomPool, RoomPoolMember, CostSplit,
-    PoolChat, PoolInvitation, PaymentTransaction
+    PoolChat, PoolChatReadCursor, PoolInvitation, PaymentTransaction
 )
 from property.serializers import PropertiesListSerializer
 from useraccount.serializers import UserDetailSerializer
@@ -60,22 +60,29 @@ class CostSplitSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'pool', 'split_type',
             'base_accommodation', 'cleaning_fee', 'service_fee', 'taxes', 'total_amount',
-            'custom_percentages', 'individual_amounts',
+            'custom_percentages', 'member_nights', 'individual_amounts',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'pool', 'created_at', 'updated_at']
 
 
 class PoolChatSerializer(serializers.ModelSerializer):
+    """
+    Read state comes from the pool's PoolChatReadCursor rows, loaded once per
+    pool for a whole page of messages (or passed in as context['read_cursors']:
+    {pool id: {user id: last_read_at}}).
+    """
     sender_name = serializers.CharField(source='sender.name', read_only=True)
     sender_avatar = serializers.SerializerMethodField()
     is_mine = serializers.SerializerMethodField()
+    is_read_by = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = PoolChat
         fields = [
             'id', 'pool', 'sender', 'sender_name', 'sender_avatar',
-            'message_type', 'message', 'metadata', 'is_read_by',
+            'message_type', 'message', 'metadata', 'is_read_by', 'is_read',
             'created_at', 'is_mine'
         ]
         read_only_fields = ['id', 'pool', 'sender', 'created_at']
@@ -90,6 +97,36 @@ class PoolChatSerializer(serializers.ModelSerializer):
         if request and obj.sender:
             return obj.sender.id == request.user.id
         return False
+    
+    def _cursors(self, pool_id):
+        cursors = self.context.setdefault('read_cursors', {})
+        if pool_id not in cursors:
+            cursors[pool_id] = {
+                str(user_id): last_read_at
+                for user_id, last_read_at in PoolChatReadCursor.objects.filter(pool_id=pool_id).values_list(
+                    'user_id', 'last_read_at'
+                )
+            }
+        return cursors[pool_id]
+    
+    def get_is_read_by(self, obj):
+        readers = [
+            user_id for user_id, last_read_at in self._cursors(obj.pool_id).items()
+            if last_read_at >= obj.created_at
+        ]
+        if obj.sender_id and str(obj.sender_id) not in readers:
+            readers.insert(0, str(obj.sender_id))
+        return readers
+    
+    def get_is_read(self, obj):
+        request = self.context.get('request')
+        if not request:
+            return False
+        user_id = str(request.user.id)
+        if str(obj.sender_id) == user_id:
+            return True
+        last_read_at = self._cursors(obj.pool_id).get(user_id)
+        return last_read_at is not None and last_read_at >= obj.created_at
 
 
 class RoomPoolListSerializer(serializers.ModelSerializer):
@@ -272,10 +309,10 @@ class PaymentTransactionSerializer(serializers.ModelSerializer):
         model = PaymentTransaction
         fields = [
             'id', 'pool_member', 'transaction_type', 'amount', 'status',
-            'payment_method', 'transaction_id', 'notes',
+            'payment_method', 'transaction_id', 'notes', 'balance_after',
             'created_at', 'completed_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'balance_after', 'created_at']
 
 
 class CostSplitCalculatorSerializer(serializers.Serializer):
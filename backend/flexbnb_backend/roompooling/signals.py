@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from property.models import Property
+
+from .chat import broadcast_member_removed, broadcast_message
+from .match_lists import profile_snapshot, schedule_profile_change
+from .models import PoolChat, RoomPool, RoomPoolMember, RoommateProfile
+
+
+@receiver(post_init, sender=RoommateProfile)
+def remember_match_state(sender, instance, **kwargs):
+    instance._match_snapshot = profile_snapshot(instance)
+
+
+@receiver(post_save, sender=RoommateProfile)
+def refresh_match_lists(sender, instance, created, **kwargs):
+    """Queue a match list refresh when anything the scorer reads has changed"""
+    snapshot = profile_snapshot(instance)
+    if created:
+        schedule_profile_change(instance.id)
+    elif snapshot != instance._match_snapshot:
+        schedule_profile_change(instance.id, instance._match_snapshot)
+    instance._match_snapshot = snapshot
+
+
+@receiver(post_delete, sender=RoommateProfile)
+def drop_from_match_lists(sender, instance, **kwargs):
+    schedule_profile_change(instance.id, instance._match_snapshot)
+
+
+@receiver(post_save, sender=PoolChat)
+def push_chat_message(sender, instance, created, **kwargs):
+    if created:
+        broadcast_message(instance)
+
+
+@receiver(post_save, sender=RoomPoolMember)
+def close_chat_for_former_member(sender, instance, **kwargs):
+    if instance.status in ('rejected', 'left', 'removed') and not instance.is_creator:
+        broadcast_member_removed(instance.pool_id, instance.user_id)
+
+
+@receiver(post_delete, sender=RoomPoolMember)
+def close_chat_for_deleted_member(sender, instance, **kwargs):
+    if not instance.is_creator:
+        broadcast_member_removed(instance.pool_id, instance.user_id)
+
+
+@receiver(post_save, sender=Property)
+def sync_pool_locations(sender, instance, created, **kwargs):
+    """Keep the pools' denormalized location in step with their property"""
+    if created:
+        return
+    RoomPool.objects.filter(property=instance).exclude(
+        location_country=instance.country,
+        location_country_code=instance.country_code,
+    ).update(location_country=instance.country, location_country_code=instance.country_code)
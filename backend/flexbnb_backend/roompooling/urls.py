@@ -25,6 +25,9 @@ urlpatterns = [
     path('pools/<uuid:pool_id>/chat/mark-read/', views.PoolChatViewSet.as_view({
         'post': 'mark_read'
     }), name='pool-chat-mark-read'),
+    path('pools/<uuid:pool_id>/chat/unread/', views.PoolChatViewSet.as_view({
+        'get': 'unread'
+    }), name='pool-chat-unread'),
     
     # Payment Tracking
     path('pools/<uuid:pool_id>/payments/', views.PaymentTrackingView.as_view(), name='pool-payments'),
@@ -4,13 +4,24 @@ from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Avg
 from datetime import timedelta
 from useraccount.auth import ClerkAuthentication
 from .models import (
-    RoommateProfile, RoomPool, RoomPoolMember, CostSplit,
-    PoolChat, PoolInvitation, PaymentTransaction
+    RoommateProfile, RoommateMatchList, RoomPool, RoomPoolMember, CostSplit,
+    PoolChat, PoolInvitation
 )
+from .chat import is_pool_member, mark_read as mark_chat_read, unread_count
+from .cost_split import CostSplitError, apply_cost_split, payment_summary as pool_payment_summary, payment_totals
+from .discovery import discover_pools, for_listing, member_pool_ids
+from .ledger import LedgerError, pool_collected, record_entry, record_settlement
+from .match_lists import refresh_match_list
+from .membership import (
+    MembershipConflict, accept_invitation, approve_member as approve_pool_member, join_pool, leave_pool,
+    reject_member as reject_pool_member,
+)
+from .matching import compatibility
 from .serializers import (
     RoommateProfileSerializer, RoommateProfileMatchSerializer,
     RoomPoolListSerializer, RoomPoolDetailSerializer, CreateRoomPoolSerializer,
@@ -76,134 +87,44 @@ class RoommateMatchingView(APIView):
         
         # Ensure user has a profile
         user_profile, created = RoommateProfile.objects.get_or_create(user=user)
+
+        # Precomputed list, kept current in the background; built
+        # synchronously the first time this user asks
+        match_list = RoommateMatchList.objects.filter(profile=user_profile).first()
+        if match_list is None:
+            match_list = refresh_match_list(user_profile)
+        
+        top = match_list.matches[:20]  # Top 20 matches
+        profiles = {
+            str(profile.id): profile
+            for profile in RoommateProfile.objects.select_related('user').filter(
+                id__in=[profile_id for profile_id, _ in top]
+            )
+        }
         
-        # Find other users looking for roommates
-        potential_matches = RoommateProfile.objects.filter(
-            is_looking_for_roommate=True
-        ).exclude(user=user)
-        
-        # Optional filters from query params
-        location = request.query_params.get('location')
-        check_in = request.query_params.get('check_in')
-        check_out = request.query_params.get('check_out')
-        
+        # Explanations are built for the returned matches only
         matches = []
-        for profile in potential_matches:
-            score, reasons, breakdown = self._calculate_compatibility(user_profile, profile)
-            
-            # Only include good matches (score > 40)
-            if score > 40:
-                matches.append({
-                    'profile': RoommateProfileSerializer(profile).data,
-                    'compatibility_score': score,
-                    'match_reasons': reasons,
-                    'compatibility_breakdown': breakdown
-                })
-        
-        # Sort by compatibility score
-        matches.sort(key=lambda x: x['compatibility_score'], reverse=True)
+        for profile_id, _ in top:
+            profile = profiles.get(profile_id)
+            if profile is None:
+                continue  # deleted since the list was computed
+            score, reasons, breakdown = compatibility(user_profile, profile)
+            matches.append({
+                'profile': RoommateProfileSerializer(profile).data,
+                'compatibility_score': score,
+                'match_reasons': reasons,
+                'compatibility_breakdown': breakdown
+            })
         
         return Response({
-            'matches': matches[:20],  # Top 20 matches
-            'total_found': len(matches)
+            'matches': matches,
+            'total_found': match_list.total_found,
+            'updated_at': match_list.updated_at  # when this list was last refreshed
         })
     
     def _calculate_compatibility(self, profile1, profile2):
         """Calculate compatibility score between two profiles"""
-        score = 0
-        max_score = 0
-        reasons = []
-        breakdown = {}
-        
-        # Gender preference match (15 points)
-        max_score += 15
-        if (profile1.preferred_gender == 'no_preference' or 
-            profile1.preferred_gender == profile2.gender):
-            if (profile2.preferred_gender == 'no_preference' or
-                profile2.preferred_gender == profile1.gender):
-                score += 15
-                breakdown['gender'] = {'score': 15, 'max': 15}
-            else:
-                score += 7
-                breakdown['gender'] = {'score': 7, 'max': 15}
-        else:
-            breakdown['gender'] = {'score': 0, 'max': 15}
-        
-        # Sleep schedule (20 points)
-        max_score += 20
-        if profile1.sleep_schedule == profile2.sleep_schedule:
-            score += 20
-            reasons.append(f"Same sleep schedule ({profile1.get_sleep_schedule_display()})")
-            breakdown['sleep'] = {'score': 20, 'max': 20}
-        elif 'flexible' in [profile1.sleep_schedule, profile2.sleep_schedule]:
-            score += 15
-            breakdown['sleep'] = {'score': 15, 'max': 20}
-        else:
-            breakdown['sleep'] = {'score': 0, 'max': 20}
-        
-        # Cleanliness (20 points)
-        max_score += 20
-        if profile1.cleanliness == profile2.cleanliness:
-            score += 20
-            reasons.append("Similar cleanliness standards")
-            breakdown['cleanliness'] = {'score': 20, 'max': 20}
-        elif abs(list(dict(RoommateProfile.CLEANLINESS_CHOICES)).index(profile1.cleanliness) - 
-                list(dict(RoommateProfile.CLEANLINESS_CHOICES)).index(profile2.cleanliness)) == 1:
-            score += 10
-            breakdown['cleanliness'] = {'score': 10, 'max': 20}
-        else:
-            breakdown['cleanliness'] = {'score': 0, 'max': 20}
-        
-        # Noise preference (15 points)
-        max_score += 15
-        if profile1.noise_preference == profile2.noise_preference:
-            score += 15
-            reasons.append(f"Both prefer {profile1.get_noise_preference_display()}")
-            breakdown['noise'] = {'score': 15, 'max': 15}
-        elif 'moderate' in [profile1.noise_preference, profile2.noise_preference]:
-            score += 8
-            breakdown['noise'] = {'score': 8, 'max': 15}
-        else:
-            breakdown['noise'] = {'score': 0, 'max': 15}
-        
-        # Smoking (15 points)
-        max_score += 15
-        smoke1 = profile1.smoking
-        smoke2 = profile2.smoking
-        if smoke1 == smoke2:
-            score += 15
-            breakdown['smoking'] = {'score': 15, 'max': 15}
-        elif 'no_preference' in [smoke1, smoke2]:
-            score += 12
-            breakdown['smoking'] = {'score': 12, 'max': 15}
-        elif ('non_smoker' in [smoke1, smoke2] and 'smoker' in [smoke1, smoke2]):
-            score += 0  # Non-smoker with smoker = bad match
-            breakdown['smoking'] = {'score': 0, 'max': 15}
-        else:
-            score += 7
-            breakdown['smoking'] = {'score': 7, 'max': 15}
-        
-        # Shared interests (15 points)
-        max_score += 15
-        if profile1.interests and profile2.interests:
-            shared = set(profile1.interests) & set(profile2.interests)
-            if len(shared) >= 3:
-                score += 15
-                reasons.append(f"Share {len(shared)} interests: {', '.join(list(shared)[:3])}")
-                breakdown['interests'] = {'score': 15, 'max': 15, 'shared': list(shared)}
-            elif len(shared) >= 1:
-                score += len(shared) * 5
-                breakdown['interests'] = {'score': len(shared) * 5, 'max': 15, 'shared': list(shared)}
-            else:
-                breakdown['interests'] = {'score': 0, 'max': 15, 'shared': []}
-        else:
-            breakdown['interests'] = {'score': 5, 'max': 15}  # No data, neutral
-            score += 5
-        
-        # Calculate percentage
-        final_score = int((score / max_score) * 100) if max_score > 0 else 0
-        
-        return final_score, reasons, breakdown
+        return compatibility(profile1, profile2)
 
 
 # ==================== ROOM POOL MANAGEMENT ====================
@@ -377,24 +298,17 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
             not pool.use_compatibility_matching
         )
         
-        member = RoomPoolMember.objects.create(
-            pool=pool,
-            user=user,
-            status='approved' if auto_approve else 'pending',
-            share_amount=pool.price_per_person + pool.booking_fee_per_person,
-            compatibility_score=compatibility_score,
-            request_message=serializer.validated_data.get('message', ''),
-            approved_at=timezone.now() if auto_approve else None
-        )
-        
-        if auto_approve:
-            pool.current_members += 1
-            if pool.is_full():
-                pool.status = 'full'
-            pool.save()
-            
-            # Update cost split
-            self._recalculate_cost_split(pool)
+        try:
+            member = join_pool(
+                pool,
+                user,
+                auto_approve,
+                share_amount=pool.price_per_person + pool.booking_fee_per_person,
+                compatibility_score=compatibility_score,
+                request_message=serializer.validated_data.get('message', ''),
+            )
+        except MembershipConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Create system message in chat
         PoolChat.objects.create(
@@ -425,30 +339,16 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
             )
         
         member_id = request.data.get('member_id')
-        try:
-            member = RoomPoolMember.objects.get(id=member_id, pool=pool, status='pending')
-        except RoomPoolMember.DoesNotExist:
+        if not RoomPoolMember.objects.filter(id=member_id, pool=pool, status='pending').exists():
             return Response(
                 {'error': 'Member not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        if pool.is_full():
-            return Response(
-                {'error': 'Pool is already full'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        member.status = 'approved'
-        member.approved_at = timezone.now()
-        member.save()
-        
-        pool.current_members += 1
-        if pool.is_full():
-            pool.status = 'full'
-        pool.save()
-        
-        self._recalculate_cost_split(pool)
+        try:
+            member = approve_pool_member(pool, member_id)
+        except MembershipConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # System message
         PoolChat.objects.create(
@@ -470,17 +370,10 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        member_id = request.data.get('member_id')
         try:
-            member = RoomPoolMember.objects.get(id=member_id, pool=pool, status='pending')
-        except RoomPoolMember.DoesNotExist:
-            return Response(
-                {'error': 'Member not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        member.status = 'rejected'
-        member.save()
+            reject_pool_member(pool, request.data.get('member_id'))
+        except MembershipConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         
         return Response({'success': True})
     
@@ -490,29 +383,10 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
         pool = self.get_object()
         user = request.user
         
-        if pool.creator == user:
-            return Response(
-                {'error': 'Creator cannot leave the pool. Cancel it instead.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            member = RoomPoolMember.objects.get(pool=pool, user=user, status='approved')
-        except RoomPoolMember.DoesNotExist:
-            return Response(
-                {'error': 'You are not a member of this pool'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        member.status = 'left'
-        member.save()
-        
-        pool.current_members -= 1
-        if pool.status == 'full':
-            pool.status = 'open'
-        pool.save()
-        
-        self._recalculate_cost_split(pool)
+            leave_pool(pool, user)
+        except MembershipConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # System message
         PoolChat.objects.create(
@@ -528,8 +402,14 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
         """
         Finalize pool booking - creates a reservation and records host earnings.
         Only pool creator can finalize. All members must have paid.
+        Send an Idempotency-Key header to make client retries safe.
         """
-        from booking.models import Reservation, HostEarnings
+        from booking.services import run_idempotent
+        
+        return run_idempotent(request, f'finalize_pool_booking:{pk}', lambda: self._finalize_booking(request))
+    
+    def _finalize_booking(self, request):
+        from booking.services import BookingConflict, book_reservation
         from decimal import Decimal
         
         pool = self.get_object()
@@ -573,36 +453,46 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
             # For now, we'll allow but warn
             pass
         
-        # Calculate total collected
-        total_collected = sum(m.amount_paid for m in approved_members)
-        
         # Create the reservation
         try:
             booking_fee = pool.total_price * Decimal('0.1')  # 10% platform fee
             host_earnings_amount = pool.total_price - booking_fee
             
-            reservation = Reservation.objects.create(
-                property=pool.property,
-                guest=pool.creator,  # Creator is the primary contact
-                host=pool.property.Host,
-                check_in_date=pool.check_in_date,
-                check_out_date=pool.check_out_date,
-                guests_count=approved_members.count(),
-                total_price=pool.total_price,
-                booking_fee=booking_fee,
-                host_earnings=host_earnings_amount,
-                status='pending',  # Host still needs to approve
-                special_requests=f'Room Pool Booking: {pool.title}\nMembers: {", ".join([m.user.name for m in approved_members])}',
-                booking_type='room_pool',
-                is_room_pool=True,
-                room_pool_id=pool.id,
-                pool_members_count=approved_members.count()
-            )
-            
-            # Link reservation to pool
-            pool.reservation = reservation
-            pool.status = 'booked'
-            pool.save()
+            with transaction.atomic():
+                # Re-check under the pool row lock so concurrent finalize calls can't both book
+                locked_pool = RoomPool.objects.select_for_update().get(pk=pool.pk)
+                if locked_pool.status == 'booked' or locked_pool.reservation_id:
+                    return Response(
+                        {'error': 'This pool is already booked'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                reservation = book_reservation(
+                    property=pool.property,
+                    guest=pool.creator,  # Creator is the primary contact
+                    host=pool.property.Host,
+                    check_in_date=pool.check_in_date,
+                    check_out_date=pool.check_out_date,
+                    guests_count=approved_members.count(),
+                    total_price=pool.total_price,
+                    booking_fee=booking_fee,
+                    host_earnings=host_earnings_amount,
+                    status='pending',  # Host still needs to approve
+                    special_requests=f'Room Pool Booking: {pool.title}\nMembers: {", ".join([m.user.name for m in approved_members])}',
+                    booking_type='room_pool',
+                    is_room_pool=True,
+                    room_pool_id=pool.id,
+                    pool_members_count=approved_members.count()
+                )
+                
+                # Link reservation to pool, on the locked row so the member
+                # counter and anything else changed since get_object() is kept
+                locked_pool.reservation = reservation
+                locked_pool.status = 'booked'
+                locked_pool.save(update_fields=['reservation', 'status', 'updated_at'])
+                
+                # Record what each member paid towards it
+                record_settlement(locked_pool, reservation)
             
             # Create earnings record (pending until host approves)
             # Note: HostEarnings is created when reservation is approved
@@ -614,18 +504,6 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
                 message=f'🎉 Pool booking finalized! Reservation created and pending host approval.'
             )
             
-            # Update all member payment transactions
-            for member in approved_members:
-                if member.amount_paid > 0:
-                    PaymentTransaction.objects.create(
-                        pool_member=member,
-                        transaction_type='payment',
-                        amount=member.amount_paid,
-                        status='completed',
-                        payment_method='pool_booking',
-                        notes=f'Payment for pool booking - Reservation {reservation.id}'
-                    )
-            
             return Response({
                 'success': True,
                 'message': 'Pool booking finalized! Awaiting host approval.',
@@ -635,6 +513,11 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
                 'status': 'pending'
             })
             
+        except BookingConflict as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_409_CONFLICT
+            )
         except Exception as e:
             return Response(
                 {'error': f'Failed to create reservation: {str(e)}'},
@@ -648,17 +531,17 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
         
         if not pool.reservation:
             # Check readiness for booking
-            approved_members = pool.members.filter(status='approved')
-            total_paid = sum(m.amount_paid for m in approved_members)
-            total_due = sum(m.share_amount for m in approved_members)
+            totals = payment_totals(pool)
+            # Running balance of the approved members, the same ones total_due covers
+            collected = pool_collected(pool)
             
             return Response({
                 'has_reservation': False,
-                'can_finalize': approved_members.count() >= 2,
-                'members_count': approved_members.count(),
-                'total_paid': float(total_paid),
-                'total_due': float(total_due),
-                'payment_complete': total_paid >= total_due,
+                'can_finalize': totals['members_count'] >= 2,
+                'members_count': totals['members_count'],
+                'total_paid': float(collected),
+                'total_due': float(totals['total_due']),
+                'payment_complete': collected >= totals['total_due'],
                 'pool_status': pool.status
             })
         
@@ -672,28 +555,6 @@ class RoomPoolViewSet(viewsets.ModelViewSet):
             'pool_status': pool.status
         })
     
-    def _recalculate_cost_split(self, pool):
-        """Recalculate cost split after member changes"""
-        try:
-            cost_split = pool.cost_split
-        except CostSplit.DoesNotExist:
-            cost_split = CostSplit.objects.create(
-                pool=pool,
-                base_accommodation=pool.total_price,
-                total_amount=pool.total_price + (pool.booking_fee_per_person * pool.max_members)
-            )
-        
-        cost_split.calculate_equal_split()
-        
-        # Update member share amounts
-        approved_members = pool.members.filter(status='approved')
-        member_count = approved_members.count()
-        if member_count > 0:
-            share_amount = pool.total_price / member_count
-            for member in approved_members:
-                member.share_amount = share_amount + pool.booking_fee_per_person
-                member.save()
-
 
 # ==================== COST SPLITTING ====================
 
@@ -721,23 +582,13 @@ class CostSplitView(APIView):
         serializer = CostSplitSerializer(cost_split)
         
         # Get member payment statuses
-        members = pool.members.filter(status='approved')
-        payment_summary = []
-        for member in members:
-            payment_summary.append({
-                'user_id': str(member.user.id),
-                'user_name': member.user.name,
-                'share_amount': float(member.share_amount),
-                'amount_paid': float(member.amount_paid),
-                'payment_status': member.payment_status,
-                'remaining': float(member.share_amount - member.amount_paid)
-            })
+        payment_summary, totals = pool_payment_summary(pool)
         
         return Response({
             'cost_split': serializer.data,
             'payment_summary': payment_summary,
-            'total_collected': sum(m['amount_paid'] for m in payment_summary),
-            'total_remaining': sum(m['remaining'] for m in payment_summary)
+            'total_collected': float(totals['total_collected']),
+            'total_remaining': float(totals['total_remaining'])
         })
     
     def post(self, request, pool_id):
@@ -750,36 +601,16 @@ class CostSplitView(APIView):
         if pool.creator != request.user:
             return Response({'error': 'Only creator can modify cost split'}, status=status.HTTP_403_FORBIDDEN)
         
-        cost_split, created = CostSplit.objects.get_or_create(
-            pool=pool,
-            defaults={
-                'base_accommodation': pool.total_price,
-                'total_amount': pool.total_price
-            }
-        )
-        
         split_type = request.data.get('split_type', 'equal')
-        cost_split.split_type = split_type
-        
-        if split_type == 'custom':
-            custom_percentages = request.data.get('custom_percentages', {})
-            cost_split.custom_percentages = custom_percentages
-            
-            # Calculate individual amounts
-            individual_amounts = {}
-            for user_id, percentage in custom_percentages.items():
-                individual_amounts[user_id] = float(cost_split.total_amount) * (float(percentage) / 100)
-            cost_split.individual_amounts = individual_amounts
-            
-            # Update member share amounts
-            for member in pool.members.filter(status='approved'):
-                if str(member.user.id) in individual_amounts:
-                    member.share_amount = individual_amounts[str(member.user.id)]
-                    member.save()
-        else:
-            cost_split.calculate_equal_split()
-        
-        cost_split.save()
+        try:
+            cost_split = apply_cost_split(
+                pool,
+                split_type,
+                custom_percentages=request.data.get('custom_percentages', {}) if split_type == 'custom' else None,
+                member_nights=request.data.get('member_nights', {}) if split_type == 'by_nights' else None,
+            )
+        except CostSplitError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(CostSplitSerializer(cost_split).data)
 
@@ -807,7 +638,7 @@ class PoolChatViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         pool_id = self.kwargs.get('pool_id')
-        return PoolChat.objects.filter(pool_id=pool_id).order_by('-created_at')
+        return PoolChat.objects.filter(pool_id=pool_id).select_related('sender').order_by('-created_at')
     
     def get_serializer_context(self):
         return {'request': self.request}
@@ -859,7 +690,6 @@ class PoolChatViewSet(viewsets.ModelViewSet):
             sender=request.user,
             message_type='text',
             message=message_text,
-            is_read_by=[str(request.user.id)]
         )
         
         return Response(
@@ -870,15 +700,20 @@ class PoolChatViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_read(self, request, pool_id=None):
         """Mark messages as read"""
-        user_id = str(request.user.id)
+        if not is_pool_member(pool_id, request.user):
+            return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        messages = PoolChat.objects.filter(pool_id=pool_id)
-        for msg in messages:
-            if user_id not in msg.is_read_by:
-                msg.is_read_by.append(user_id)
-                msg.save()
+        mark_chat_read(pool_id, request.user)
         
         return Response({'success': True})
+    
+    @action(detail=False, methods=['get'])
+    def unread(self, request, pool_id=None):
+        """Number of messages the user has not read yet"""
+        if not is_pool_member(pool_id, request.user):
+            return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response({'unread_count': unread_count(pool_id, request.user)})
 
 
 # ==================== POOL INVITATIONS ====================
@@ -963,45 +798,21 @@ class PoolInvitationViewSet(viewsets.ModelViewSet):
         accept = request.data.get('accept', False)
         
         if accept:
-            # Check if pool is still available
-            pool = invitation.pool
-            if pool.is_full():
-                return Response({'error': 'Pool is now full'}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Create membership
-            member, created = RoomPoolMember.objects.get_or_create(
-                pool=pool,
-                user=request.user,
-                defaults={
-                    'status': 'approved',
-                    'share_amount': pool.price_per_person + pool.booking_fee_per_person,
-                    'approved_at': timezone.now()
-                }
-            )
-            
-            if not created:
-                member.status = 'approved'
-                member.approved_at = timezone.now()
-                member.save()
-            
-            pool.current_members += 1
-            if pool.is_full():
-                pool.status = 'full'
-            pool.save()
-            
-            invitation.status = 'accepted'
+            try:
+                accept_invitation(invitation, request.user)
+            except MembershipConflict as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
             # System message
             PoolChat.objects.create(
-                pool=pool,
+                pool=invitation.pool,
                 message_type='join',
                 message=f'{request.user.name} has joined via invitation!'
             )
         else:
             invitation.status = 'declined'
-        
-        invitation.responded_at = timezone.now()
-        invitation.save()
+            invitation.responded_at = timezone.now()
+            invitation.save()
         
         return Response({
             'success': True,
@@ -1028,38 +839,24 @@ class PaymentTrackingView(APIView):
         except RoomPoolMember.DoesNotExist:
             return Response({'error': 'You are not a member'}, status=status.HTTP_400_BAD_REQUEST)
         
-        amount = request.data.get('amount', 0)
-        
-        if amount <= 0:
-            return Response({'error': 'Invalid amount'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create transaction
-        transaction = PaymentTransaction.objects.create(
-            pool_member=member,
-            transaction_type='payment',
-            amount=amount,
-            status='completed',
-            payment_method=request.data.get('payment_method', 'manual'),
-            completed_at=timezone.now()
-        )
-        
-        # Update member payment
-        member.amount_paid += amount
-        if member.amount_paid >= member.share_amount:
-            member.payment_status = 'paid'
-        elif member.amount_paid > 0:
-            member.payment_status = 'partial'
-        member.save()
+        try:
+            entry = record_entry(
+                member,
+                request.data.get('amount', 0),
+                payment_method=request.data.get('payment_method', 'manual'),
+            )
+        except LedgerError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # System message
         PoolChat.objects.create(
             pool=pool,
             message_type='payment',
-            message=f'{request.user.name} made a payment of ${amount}',
-            metadata={'amount': float(amount), 'user_id': str(request.user.id)}
+            message=f'{request.user.name} made a payment of ${entry.amount}',
+            metadata={'amount': float(entry.amount), 'user_id': str(request.user.id)}
         )
         
-        return Response(PaymentTransactionSerializer(transaction).data)
+        return Response(PaymentTransactionSerializer(entry).data)
 
 
 # ==================== PUBLIC POOL DISCOVERY ====================
@@ -1071,51 +868,21 @@ class PublicPoolsView(APIView):
     
     def get(self, request):
         """Get list of open public pools"""
-        pools = RoomPool.objects.filter(
-            visibility='public',
-            status__in=['open', 'full'],  # Show both open and full pools
-            booking_deadline__gt=timezone.now()
-        )
-        
-        # Apply filters
-        location = request.query_params.get('location')
-        if location:
-            pools = pools.filter(
-                Q(property__country__icontains=location) |
-                Q(property__country_code__icontains=location)
-            )
-        
-        check_in = request.query_params.get('check_in')
-        check_out = request.query_params.get('check_out')
-        if check_in:
-            pools = pools.filter(check_in_date__gte=check_in)
-        if check_out:
-            pools = pools.filter(check_out_date__lte=check_out)
-        
-        max_price = request.query_params.get('max_price')
-        if max_price:
-            pools = pools.filter(price_per_person__lte=max_price)
+        try:
+            pools = discover_pools(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Pagination
         paginator = StandardPagination()
-        page = paginator.paginate_queryset(pools, request)
+        page = paginator.paginate_queryset(for_listing(pools), request)
         serializer = RoomPoolListSerializer(page, many=True, context={'request': request})
         
         # Add membership info if user is authenticated
         data = serializer.data
         if request.user and request.user.is_authenticated:
-            user_memberships = set(
-                RoomPoolMember.objects.filter(
-                    user=request.user,
-                    status__in=['approved', 'pending']
-                ).values_list('pool_id', flat=True)
-            )
-            for pool_data in data:
-                pool_id = pool_data.get('id')
-                if pool_id:
-                    from uuid import UUID
-                    pool_uuid = UUID(pool_id) if isinstance(pool_id, str) else pool_id
-                    pool_data['is_member'] = pool_uuid in user_memberships
+            memberships = member_pool_ids(request.user, page)
+            for pool, pool_data in zip(page, data):
+                pool_data['is_member'] = pool.id in memberships
         
         return paginator.get_paginated_response(data)
-
@@ -3,11 +3,27 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
 from django.conf import settings
 import jwt
-import requests
+import logging
 import os
 
+from .jwks import get_key_store
+from .token_cache import verified_tokens, clerk_users
+
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
+
+def get_clerk_key_store():
+    jwks_url = getattr(settings, 'CLERK_JWKS_URL', '') or f"{settings.CLERK_ISSUER}/.well-known/jwks.json"
+    return get_key_store(
+        jwks_url,
+        ttl=getattr(settings, 'CLERK_JWKS_CACHE_TTL', 3600),
+        refresh_ahead=getattr(settings, 'CLERK_JWKS_REFRESH_AHEAD', 300),
+        min_refetch_interval=getattr(settings, 'CLERK_JWKS_MIN_REFETCH_INTERVAL', 30),
+    )
+
+
 class ClerkAuthentication(BaseAuthentication):
     def authenticate(self, request):
         # Get the auth header
@@ -16,65 +32,71 @@ class ClerkAuthentication(BaseAuthentication):
             return None
 
         token = auth_header.split(' ')[1]
-        
+        return self.authenticate_token(token)
+
+    def authenticate_token(self, token):
+        """(user, None) for a Clerk session token; also used for WebSocket handshakes"""
         try:
-            # Get Clerk's JWKS (JSON Web Key Set)
-            clerk_issuer = settings.CLERK_ISSUER
-            jwks_url = f"{clerk_issuer}/.well-known/jwks.json"
-            
-            # Decode the token header to get the key ID (kid)
-            header = jwt.get_unverified_header(token)
-            kid = header.get('kid')
-            
-            if not kid:
-                raise AuthenticationFailed('Invalid token: no key ID')
-            
-            # Get the public key from Clerk
-            response = requests.get(jwks_url)
-            if response.status_code != 200:
-                raise AuthenticationFailed('Failed to fetch public key')
-            
-            jwks = response.json()
-            public_key = None
-            
-            # Find the correct public key
-            for key in jwks.get('keys', []):
-                if key.get('kid') == kid:
-                    public_key = jwt.algorithms.RSAAlgorithm.from_jwk(key)
-                    break
-            
-            if not public_key:
-                raise AuthenticationFailed('Public key not found')
-            
-            # First decode without verification to inspect claims
-            unverified_payload = jwt.decode(token, options={'verify_signature': False})
-            
-            # Verify and decode the token
-            try:
-                decoded = jwt.decode(
-                    token,
-                    public_key,
-                    algorithms=['RS256'],
-                    issuer=clerk_issuer,
-                    options={
-                        'verify_exp': True,
-                        'verify_iss': True,
-                        'verify_aud': False  # Accept default Clerk session tokens without custom audience
-                    }
-                )
-            except jwt.InvalidTokenError as e:
-                print(f"Token verification failed: {str(e)}")
-                print(f"Token payload: {unverified_payload}")
-                raise
+            # Hot path: this exact token was verified recently
+            decoded = verified_tokens.get_claims(token)
+            if decoded is None:
+                decoded = self._verify_token(token)
+                verified_tokens.set_claims(token, decoded)
             
             # Get user information from the token
             user_id = decoded.get('sub') or decoded.get('userId')
             if not user_id:
                 raise AuthenticationFailed('Invalid token: no user ID')
             
-            email = decoded.get('email') or ''
-            name = decoded.get('name') or ''
+            user = self._get_user(user_id, decoded.get('email') or '', decoded.get('name') or '')
+            return (user, None)
             
+        except jwt.ExpiredSignatureError:
+            raise AuthenticationFailed('Token has expired')
+        except jwt.InvalidTokenError as e:
+            raise AuthenticationFailed(f'Invalid token: {str(e)}')
+        except Exception as e:
+            logger.warning('Authentication error: %s', e)
+            raise AuthenticationFailed(f'Authentication failed: {str(e)}') 
+
+    def _verify_token(self, token):
+        clerk_issuer = settings.CLERK_ISSUER
+        
+        # Decode the token header to get the key ID (kid)
+        header = jwt.get_unverified_header(token)
+        kid = header.get('kid')
+        
+        if not kid:
+            raise AuthenticationFailed('Invalid token: no key ID')
+        
+        # Get the public key from the cached Clerk JWKS (JSON Web Key Set)
+        public_key = get_clerk_key_store().get_key(kid)
+        
+        if not public_key:
+            raise AuthenticationFailed('Public key not found')
+        
+        # Verify and decode the token
+        try:
+            return jwt.decode(
+                token,
+                public_key,
+                algorithms=['RS256'],
+                issuer=clerk_issuer,
+                options={
+                    'verify_exp': True,
+                    'verify_iss': True,
+                    'verify_aud': False  # Accept default Clerk session tokens without custom audience
+                }
+            )
+        except jwt.InvalidTokenError as e:
+            # The reason only: claims of a token that failed verification are not logged
+            logger.info('Token verification failed: %s', e)
+            raise
+
+    def _get_user(self, user_id, email, name):
+        user = clerk_users.get_user(user_id)
+        cached = user is not None
+        if not cached:
             # Get or create user
             user, created = User.objects.get_or_create(
                 clerk_id=user_id,
@@ -84,24 +106,18 @@ class ClerkAuthentication(BaseAuthentication):
                     'is_active': True
                 }
             )
-            
-            # Update user info if claims present and changed
-            updated = False
-            if email and user.email != email:
-                user.email = email
-                updated = True
-            if name and user.name != name:
-                user.name = name
-                updated = True
-            if updated:
-                user.save()
-            
-            return (user, None)
-            
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token has expired')
-        except jwt.InvalidTokenError as e:
-            raise AuthenticationFailed(f'Invalid token: {str(e)}')
-        except Exception as e:
-            print(f"Authentication error: {str(e)}")
-            raise AuthenticationFailed(f'Authentication failed: {str(e)}') 
\ No newline at end of file
+        
+        # Update user info if claims present and changed
+        updated = False
+        if email and user.email != email:
+            user.email = email
+            updated = True
+        if name and user.name != name:
+            user.name = name
+            updated = True
+        if updated:
+            user.save()
+        
+        if not cached or updated:
+            clerk_users.set_user(user)
+        return user
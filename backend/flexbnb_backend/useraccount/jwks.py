@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+
+import jwt
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSFetchError(Exception):
+    pass
+
+
+class JWKSKeyStore:
+    """
+    In-process cache of parsed JWKS public keys, keyed by ``kid``.
+
+    - Keys are served from memory until ``ttl`` seconds after the last fetch
+    - Within ``refresh_ahead`` seconds of expiry a background refresh is started
+    - An unknown ``kid`` forces a refetch; every refetch, expired or not, is
+      attempted at most once per ``min_refetch_interval``
+    - Concurrent refreshes are collapsed into a single in-flight request
+    - If a refresh fails, previously fetched (stale) keys keep being served
+    """
+
+    def __init__(self, jwks_url, ttl=3600, refresh_ahead=300, min_refetch_interval=30, timeout=5):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt_at = None
+        self._lock = threading.Lock()
+        self._inflight = None
+
+    def get_key(self, kid):
+        """Return the public key for ``kid`` or None if the JWKS does not contain it."""
+        now = time.monotonic()
+        key = self._keys.get(kid)
+
+        if key is not None:
+            age = now - self._fetched_at
+            if age < self.ttl - self.refresh_ahead:
+                return key
+            if not self._can_refetch(now):
+                # A refresh was just attempted (and, if expired, failed): no
+                # request waits on the endpoint again until the interval passes
+                return key
+            if age < self.ttl:
+                self._refresh(wait=False)
+                return key
+            # Expired: try to refresh, but serve the stale key if that fails
+            self._refresh(wait=True)
+            return self._keys.get(kid, key)
+
+        # Unknown kid: the signing key may have been rotated
+        if self._can_refetch(now):
+            self._refresh(wait=True)
+        return self._keys.get(kid)
+
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = None
+            self._last_attempt_at = None
+
+    def _can_refetch(self, now):
+        if self._last_attempt_at is None:
+            return True
+        return now - self._last_attempt_at >= self.min_refetch_interval
+
+    def _refresh(self, wait):
+        with self._lock:
+            done = self._inflight
+            if done is None:
+                done = threading.Event()
+                self._inflight = done
+                self._last_attempt_at = time.monotonic()
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            if wait:
+                self._run_refresh(done)
+            else:
+                threading.Thread(target=self._run_refresh, args=(done,), daemon=True).start()
+        elif wait:
+            done.wait(self.timeout)
+
+    def _run_refresh(self, done):
+        try:
+            keys = self._fetch()
+            with self._lock:
+                self._keys = keys
+                self._fetched_at = time.monotonic()
+        except Exception as e:
+            logger.warning('JWKS refresh failed, serving cached keys: %s', e)
+        finally:
+            with self._lock:
+                self._inflight = None
+            done.set()
+
+    def _fetch(self):
+        response = requests.get(self.jwks_url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise JWKSFetchError(f'JWKS endpoint returned {response.status_code}')
+
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            kid = jwk.get('kid')
+            if not kid:
+                continue
+            keys[kid] = jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+        return keys
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_key_store(jwks_url, **options):
+    """Return the process-wide key store for ``jwks_url``."""
+    with _stores_lock:
+        store = _stores.get(jwks_url)
+        if store is None:
+            store = JWKSKeyStore(jwks_url, **options)
+            _stores[jwks_url] = store
+        return store
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User
+from .token_cache import clerk_users
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached row so the next request reloads it from the database"""
+    clerk_users.invalidate(instance.clerk_id)
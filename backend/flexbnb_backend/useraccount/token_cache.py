@@ -0,0 +1,126 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU cache where every entry carries its own expiry
+    (a ``time.time()`` timestamp). Keeps hit/miss counters for monitoring.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, expires_at):
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class VerifiedTokenCache(LRUCache):
+    """Verified JWT claims keyed by token digest, never cached past the token's ``exp``."""
+
+    def __init__(self, maxsize=10000, max_ttl=300):
+        super().__init__(maxsize)
+        self.max_ttl = max_ttl
+
+    def get_claims(self, token):
+        return self.get(token_digest(token))
+
+    def set_claims(self, token, claims):
+        exp = claims.get('exp')
+        if not exp:
+            return
+        expires_at = min(float(exp), time.time() + self.max_ttl)
+        self.set(token_digest(token), claims, expires_at)
+
+
+class UserCache(LRUCache):
+    """
+    ``clerk_id`` -> User rows. Callers get a copy so per-request changes to
+    the instance never leak into other requests.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get_user(self, clerk_id):
+        user = self.get(clerk_id)
+        return copy.copy(user) if user is not None else None
+
+    def set_user(self, user):
+        if user.clerk_id:
+            self.set(user.clerk_id, copy.copy(user), time.time() + self.ttl)
+
+    def invalidate(self, clerk_id):
+        if clerk_id:
+            self.delete(clerk_id)
+
+
+verified_tokens = VerifiedTokenCache(
+    maxsize=getattr(settings, 'CLERK_TOKEN_CACHE_SIZE', 10000),
+    max_ttl=getattr(settings, 'CLERK_TOKEN_CACHE_MAX_TTL', 300),
+)
+clerk_users = UserCache(
+    maxsize=getattr(settings, 'CLERK_USER_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'CLERK_USER_CACHE_TTL', 300),
+)
+
+
+def cache_stats():
+    return {
+        'verified_tokens': verified_tokens.stats(),
+        'clerk_users': clerk_users.stats(),
+    }
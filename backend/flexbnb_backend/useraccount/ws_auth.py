@@ -0,0 +1,36 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+
+from .auth import ClerkAuthentication
+
+
+@database_sync_to_async
+def _user_for_token(token):
+    try:
+        user, _ = ClerkAuthentication().authenticate_token(token)
+        return user
+    except AuthenticationFailed:
+        return AnonymousUser()
+
+
+class ClerkWebSocketAuthMiddleware(BaseMiddleware):
+    """
+    Sets scope['user'] from a Clerk session token, once per connection.
+
+    Browsers cannot set headers on a WebSocket handshake, so the token is
+    read from the ``token`` query parameter, falling back to an
+    ``Authorization: Bearer`` header for other clients.
+    """
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        if not token:
+            auth_header = dict(scope.get('headers', [])).get(b'authorization', b'').decode()
+            if auth_header.startswith('Bearer '):
+                token = auth_header.split(' ')[1]
+
+        scope = dict(scope, user=await _user_for_token(token) if token else AnonymousUser())
+        return await super().__call__(scope, receive, send)